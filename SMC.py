@@ -1,5 +1,6 @@
 # smc_simple.py
 from include import *
+from smc_analytics import analyze
 
 # --- config: đổi đường dẫn CSV của mày ở đây ---
 # csv_path = "BTCUSDT_4h_20251101_to_20251120.csv"  # <-- đổi nếu cần
@@ -24,125 +25,36 @@ dates = df.index.to_numpy()
 n = len(df)
 
 # ======================================================================
-# 1) SWING HIGH / SWING LOW DETECTION (TradingView style: 2-left, 2-right)
+# 1-4) SWING / BOS + CHoCH / ORDER BLOCK / FVG (vectorized, see smc_analytics.py)
+#    - Swing: TradingView style 2-left, 2-right, unique extreme of the window
+#    - Bullish OB = last bearish candle before BOS_up, Bearish OB = last bullish candle before BOS_down
+#    - FVG: bull low[i] > high[i-1], bear high[i] < low[i-1]
 # ======================================================================
-def detect_swing(df, left=2, right=2):
-    highs = df["high"].values
-    lows  = df["low"].values
-    n = len(df)
+smc = analyze(df, left=2, right=2)
+sw_high, sw_low = smc["swing_high"], smc["swing_low"]
+
+# list of dicts for plotting: {"idx": i, "type": "BOS_up"/"CHoCH_down"/"BOS_down"/"CHoCH_up"}
+structure = []
+for i in np.flatnonzero(smc["bos_up"] | smc["choch_down"] | smc["bos_down"] | smc["choch_up"]):
+    if smc["bos_up"][i] or smc["choch_down"][i]:
+        structure.append({"idx": int(i), "type": "BOS_up" if smc["bos_up"][i] else "CHoCH_down"})
+    if smc["bos_down"][i] or smc["choch_up"][i]:
+        structure.append({"idx": int(i), "type": "BOS_down" if smc["bos_down"][i] else "CHoCH_up"})
+
+ob = smc["order_blocks"]
+order_blocks = [
+    {"type": "bull" if side > 0 else "bear", "idx": int(j), "high": float(h), "low": float(l), "time": df.index[j]}
+    for j, side, h, l in zip(ob["idx"], ob["side"], ob["high"], ob["low"])
+]
 
-    swing_high = np.zeros(n, dtype=bool)
-    swing_low  = np.zeros(n, dtype=bool)
-
-    for i in range(left, n-right):
-        if highs[i] == max(highs[i-left:i+right+1]):
-            if np.sum(highs[i-left:i+right+1] == highs[i]) == 1:
-                swing_high[i] = True
-
-        if lows[i] == min(lows[i-left:i+right+1]):
-            if np.sum(lows[i-left:i+right+1] == lows[i]) == 1:
-                swing_low[i] = True
-
-    return swing_high, swing_low
-
-sw_high, sw_low = detect_swing(df)
-
-# ======================================================================
-# 2) BREAK OF STRUCTURE (BOS) + CHoCH
-# ======================================================================
-structure = []   # list of dicts: {"idx": i, "type": "BOS_up"/"BOS_down"/"CHoCH_up"/"CHoCH_down"}
-
-last_peak = None
-last_valley = None
-trend = None   # "up" or "down"
-
-for i in range(n):
-    if sw_high[i]:
-        if last_peak is not None:
-            # new HH -> BOS up if breaking last high
-            if high[i] > high[last_peak]:
-                structure.append({"idx": i, "type": "BOS_up"})
-                trend = "up"
-            else:
-                structure.append({"idx": i, "type": "CHoCH_down"})
-        last_peak = i
-
-    if sw_low[i]:
-        if last_valley is not None:
-            # new LL -> BOS down
-            if low[i] < low[last_valley]:
-                structure.append({"idx": i, "type": "BOS_down"})
-                trend = "down"
-            else:
-                structure.append({"idx": i, "type": "CHoCH_up"})
-        last_valley = i
-
-# ======================================================================
-# 3) ORDER BLOCK DETECTION (ICT LOGIC)
-#    - Bullish OB = last bearish candle before BOS_up
-#    - Bearish OB = last bullish candle before BOS_down
-# ======================================================================
-order_blocks = []
-
-for s in structure:
-    idx = s["idx"]
-    t = s["type"]
-
-    # ---- Bullish OB ----
-    if t == "BOS_up":
-        j = idx-1
-        while j >= 0 and df["close"].iloc[j] >= df["open"].iloc[j]:
-            j -= 1
-        if j >= 0:
-            ob = {
-                "type": "bull",
-                "idx": j,
-                "high": float(df["high"].iloc[j]),
-                "low": float(df["low"].iloc[j]),
-                "time": df.index[j],
-            }
-            order_blocks.append(ob)
-
-    # ---- Bearish OB ----
-    elif t == "BOS_down":
-        j = idx-1
-        while j >= 0 and df["close"].iloc[j] <= df["open"].iloc[j]:
-            j -= 1
-        if j >= 0:
-            ob = {
-                "type": "bear",
-                "idx": j,
-                "high": float(df["high"].iloc[j]),
-                "low": float(df["low"].iloc[j]),
-                "time": df.index[j],
-            }
-            order_blocks.append(ob)
-
-# ======================================================================
-# 4) FAIR VALUE GAP (FVG) DETECTION (ICT 3-bar pattern)
-# ======================================================================
 fvg_list = []
-
-for i in range(1, n-1):
-    # Bullish FVG: low[i] > high[i-1]
-    if low[i] > high[i-1]:
-        fvg_list.append({
-            "type": "bull",
-            "idx": i,
-            "low": float(high[i-1]),
-            "high": float(low[i]),
-            "time": df.index[i]
-        })
-
-    # Bearish FVG: high[i] < low[i-1]
-    if high[i] < low[i-1]:
-        fvg_list.append({
-            "type": "bear",
-            "idx": i,
-            "low": float(high[i]),
-            "high": float(low[i-1]),
-            "time": df.index[i]
-        })
+for i in np.flatnonzero(smc["fvg_bull"] | smc["fvg_bear"]):
+    if smc["fvg_bull"][i]:
+        fvg_list.append({"type": "bull", "idx": int(i), "low": float(smc["fvg_bull_low"][i]),
+                         "high": float(smc["fvg_bull_high"][i]), "time": df.index[i]})
+    if smc["fvg_bear"][i]:
+        fvg_list.append({"type": "bear", "idx": int(i), "low": float(smc["fvg_bear_low"][i]),
+                         "high": float(smc["fvg_bear_high"][i]), "time": df.index[i]})
 
 # ======================================================================
 # 5) PLOT SMC CHART
@@ -0,0 +1,264 @@
+"""
+aggTrades store + order-flow bars (USDⓈ-M Futures).
+
+Store: data/aggtrades/<SYMBOL>/<SYMBOL>_<first_agg_id>_<last_agg_id>.atz, one delta_codec block per
+chunk (default 1M trades). Columns: agg_id, time (epoch-ms UTC), price / qty as int64 ticks (all
+delta-encoded + zstd) and is_buyer_maker as a bit mask. The block header keeps the time range and
+tick sizes, so range reads skip chunks without decompressing them.
+
+- sync_aggtrades(): incremental download, continues from the last stored agg_id (fromId paging)
+- load_trades():    NumPy arrays for [start, end]
+- build_flow_bars(): one vectorized pass -> per-bar VWAP, taker buy / sell volume, delta, trades, POC
+- volume_profile(): per-bar volume by price bucket (long format)
+- join_flow():      attach the flow columns to the 1m bars the engine consumes (UTC index)
+"""
+
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+import requests
+
+from delta_codec import (encode_ints, encode_bools, write_block, read_block, read_header,
+                         from_ticks, decimals_of)
+from get_history_1 import _interval_to_millis
+from rate_budget import RateBudget
+
+AGGTRADES_URL = "https://fapi.binance.com/fapi/v1/aggTrades"
+PAGE_LIMIT = 1000
+CHUNK_TRADES = 1_000_000
+
+
+def aggtrades_dir(symbol: str, data_dir: str = None) -> str:
+    return os.path.join(data_dir or os.path.join(os.getcwd(), "data", "aggtrades"), symbol.upper())
+
+
+def _chunk_ids(path: str):
+    """(first_agg_id, last_agg_id) from a chunk name; the symbol itself may contain '_' (BTCUSDT_250328)."""
+    _, first, last = os.path.basename(path)[:-len(".atz")].rsplit("_", 2)
+    return int(first), int(last)
+
+
+def _chunks(symbol: str, data_dir: str = None):
+    """Chunk files sorted by first agg_id."""
+    files = glob.glob(os.path.join(aggtrades_dir(symbol, data_dir), f"{symbol.upper()}_*_*.atz"))
+    return sorted(files, key=lambda p: _chunk_ids(p)[0])
+
+
+def _to_ms(t) -> int:
+    if isinstance(t, (int, np.integer)):
+        return int(t)
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value // 10**6)
+
+
+def _write_chunk(symbol: str, rows: list, data_dir: str = None) -> str:
+    """rows: raw aggTrades dicts (a, p, q, T, m) in agg_id order."""
+    n = len(rows)
+    agg_id = np.fromiter((r["a"] for r in rows), dtype=np.int64, count=n)
+    t = np.fromiter((r["T"] for r in rows), dtype=np.int64, count=n)
+    p_dec = decimals_of(r["p"] for r in rows)
+    q_dec = decimals_of(r["q"] for r in rows)
+    price = np.rint(np.array([r["p"] for r in rows], dtype=np.float64) * 10**p_dec).astype(np.int64)
+    qty = np.rint(np.array([r["q"] for r in rows], dtype=np.float64) * 10**q_dec).astype(np.int64)
+    maker = np.fromiter((r["m"] for r in rows), dtype=bool, count=n)
+
+    path = os.path.join(aggtrades_dir(symbol, data_dir), f"{symbol.upper()}_{agg_id[0]}_{agg_id[-1]}.atz")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    write_block(tmp, {
+        "agg_id": encode_ints(agg_id),
+        "time": encode_ints(t),
+        "price": encode_ints(price),
+        "qty": encode_ints(qty, delta=False),
+        "is_buyer_maker": encode_bools(maker),
+    }, meta={"symbol": symbol.upper(), "first_ms": int(t[0]), "last_ms": int(t[-1]),
+             "price_tick": 10.0**-p_dec, "qty_tick": 10.0**-q_dec})
+    os.replace(tmp, path)   # a chunk is either complete or absent
+    return path
+
+
+def _get(params: dict, budget: RateBudget, timeout: int = 10, max_retries: int = 5):
+    for attempt in range(max_retries + 1):
+        budget.acquire(weight=20)       # aggTrades weight is 20 on fapi
+        resp = requests.get(AGGTRADES_URL, params=params, timeout=timeout)
+        if resp.status_code in (418, 429):
+            budget.penalize(float(resp.headers.get("Retry-After", 2 ** attempt)))
+            continue
+        resp.raise_for_status()
+        return resp.json()
+    raise RuntimeError(f"Rate limited too many times: {params}")
+
+
+def sync_aggtrades(symbol: str, start=None, end=None, data_dir: str = None, budget: RateBudget = None,
+                   chunk_trades: int = CHUNK_TRADES) -> int:
+    """
+    Download aggTrades after the last stored agg_id (or from `start` for an empty store) until `end`
+    (default: now). Trades are written in chunks of `chunk_trades`; an interrupted run loses at most
+    the unwritten chunk. Returns number of trades stored.
+    """
+    symbol = symbol.upper()
+    budget = budget or RateBudget(rate=40, burst=400)       # ~2400 weight / min
+    end_ms = _to_ms(end) if end is not None else None
+    chunks = _chunks(symbol, data_dir)
+    if chunks:
+        from_id = _chunk_ids(chunks[-1])[1] + 1
+        params = {"symbol": symbol, "fromId": from_id, "limit": PAGE_LIMIT}
+    elif start is not None:
+        s = _to_ms(start)
+        params = {"symbol": symbol, "startTime": s, "endTime": s + 3_600_000 - 1, "limit": PAGE_LIMIT}
+    else:
+        raise ValueError("Empty store: pass start=... for the first sync")
+
+    buf, stored = [], 0
+    while True:
+        rows = _get(params, budget)
+        if not rows:
+            if "startTime" in params:
+                # quiet hour without trades: move the 1h window forward
+                nxt = params["endTime"] + 1
+                if (end_ms is not None and nxt > end_ms) or nxt > _to_ms(pd.Timestamp.now(tz="UTC")):
+                    break
+                params = {"symbol": symbol, "startTime": nxt, "endTime": nxt + 3_600_000 - 1, "limit": PAGE_LIMIT}
+                continue
+            break
+        if end_ms is not None:
+            rows = [r for r in rows if r["T"] <= end_ms]
+        buf.extend(rows)
+        if len(buf) >= chunk_trades:
+            _write_chunk(symbol, buf[:chunk_trades], data_dir)
+            stored += chunk_trades
+            buf = buf[chunk_trades:]
+        print(f"\rFetching {symbol} aggTrades: {stored + len(buf)} trades", end="", flush=True)
+        if not rows or (end_ms is not None and rows[-1]["T"] >= end_ms) or len(rows) < PAGE_LIMIT and "fromId" in params:
+            break
+        params = {"symbol": symbol, "fromId": int(rows[-1]["a"]) + 1, "limit": PAGE_LIMIT}
+    if buf:
+        _write_chunk(symbol, buf, data_dir)
+        stored += len(buf)
+    print()
+    return stored
+
+
+def load_trades(symbol: str, start=None, end=None, data_dir: str = None) -> dict:
+    """
+    Trades in [start, end] (inclusive) as NumPy arrays:
+    {'time': int64 ms, 'price': float64, 'qty': float64, 'is_buyer_maker': bool, 'agg_id': int64}
+    """
+    lo = None if start is None else _to_ms(start)
+    hi = None if end is None else _to_ms(end)
+    parts = []
+    for path in _chunks(symbol, data_dir):
+        meta = read_header(path)["meta"]
+        if (lo is not None and meta["last_ms"] < lo) or (hi is not None and meta["first_ms"] > hi):
+            continue
+        meta, cols = read_block(path)
+        t = cols["time"]
+        i = 0 if lo is None else np.searchsorted(t, lo, side="left")
+        j = len(t) if hi is None else np.searchsorted(t, hi, side="right")
+        parts.append({
+            "time": t[i:j],
+            "price": from_ticks(cols["price"][i:j], meta["price_tick"]),
+            "qty": from_ticks(cols["qty"][i:j], meta["qty_tick"]),
+            "is_buyer_maker": cols["is_buyer_maker"][i:j],
+            "agg_id": cols["agg_id"][i:j],
+        })
+    keys = ("time", "price", "qty", "is_buyer_maker", "agg_id")
+    if not parts:
+        return {k: np.empty(0, dtype=dt) for k, dt in zip(keys, (np.int64, np.float64, np.float64, bool, np.int64))}
+    return {k: np.concatenate([p[k] for p in parts]) for k in keys}
+
+
+def _bar_groups(time_ms: np.ndarray, step_ms: int):
+    """Bar key per trade + start offsets of each bar (trades are time-sorted)."""
+    keys = time_ms // step_ms * step_ms
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, np.int64)
+    return keys, starts
+
+
+def build_flow_bars(trades: dict, interval: str = "1m") -> pd.DataFrame:
+    """
+    Order-flow per bar in one pass (reduceat over bar boundaries):
+    volume, buy_volume (taker buys), sell_volume, delta, trades, vwap, poc (price with most volume).
+    Index: bar open time (UTC, named open_time), only bars that had trades.
+    """
+    step_ms = _interval_to_millis(interval)
+    t, px, q = trades["time"], trades["price"], trades["qty"]
+    cols = ["volume", "buy_volume", "sell_volume", "delta", "trades", "vwap", "poc"]
+    if len(t) == 0:
+        return pd.DataFrame(columns=cols, index=pd.DatetimeIndex([], tz="UTC", name="open_time"))
+
+    keys, starts = _bar_groups(t, step_ms)
+    buy = np.where(trades["is_buyer_maker"], 0.0, q)       # buyer is taker when the maker was the seller
+    volume = np.add.reduceat(q, starts)
+    buy_volume = np.add.reduceat(buy, starts)
+    notional = np.add.reduceat(px * q, starts)
+    n_trades = np.diff(np.r_[starts, len(t)])
+
+    # POC: price level with the largest volume inside each bar.
+    # (bar, price) pairs are folded into one int64 key: bar_id * n_prices + price rank
+    prices, rank = np.unique(px, return_inverse=True)
+    bar_id = np.repeat(np.arange(len(starts), dtype=np.int64), n_trades)
+    level, inv = np.unique(bar_id * len(prices) + rank, return_inverse=True)
+    level_vol = np.bincount(inv, weights=q)
+    level_bar = level // len(prices)
+    order = np.lexsort((-level_vol, level_bar))          # per bar, largest volume first
+    first = order[np.r_[True, level_bar[order][1:] != level_bar[order][:-1]]]
+    poc = prices[level[first] % len(prices)]
+
+    out = pd.DataFrame({
+        "volume": volume,
+        "buy_volume": buy_volume,
+        "sell_volume": volume - buy_volume,
+        "delta": 2 * buy_volume - volume,
+        "trades": n_trades,
+        "vwap": notional / volume,
+        "poc": poc,
+    }, index=pd.DatetimeIndex(pd.to_datetime(keys[starts], unit="ms", utc=True), name="open_time"))
+    return out[cols]
+
+
+def volume_profile(trades: dict, interval: str = "1m", price_step: float = 10.0) -> pd.DataFrame:
+    """
+    Long-format volume profile: one row per (bar, price bucket) with volume / buy_volume / sell_volume.
+    price is the lower edge of the bucket.
+    """
+    step_ms = _interval_to_millis(interval)
+    t, px, q = trades["time"], trades["price"], trades["qty"]
+    bar = t // step_ms
+    bucket = np.floor(px / price_step).astype(np.int64)
+    buy = np.where(trades["is_buyer_maker"], 0.0, q)
+    if len(t) == 0:
+        return pd.DataFrame(columns=["open_time", "price", "volume", "buy_volume", "sell_volume"])
+    # one int64 key per (bar, bucket)
+    b0, span = bucket.min(), int(bucket.max() - bucket.min()) + 1
+    keys, inv = np.unique((bar - bar[0]) * span + (bucket - b0), return_inverse=True)
+    vol = np.bincount(inv, weights=q, minlength=len(keys))
+    bvol = np.bincount(inv, weights=buy, minlength=len(keys))
+    return pd.DataFrame({
+        "open_time": pd.to_datetime((keys // span + bar[0]) * step_ms, unit="ms", utc=True),
+        "price": (keys % span + b0) * price_step,
+        "volume": vol,
+        "buy_volume": bvol,
+        "sell_volume": vol - bvol,
+    })
+
+
+def join_flow(bars: pd.DataFrame, flow: pd.DataFrame) -> pd.DataFrame:
+    """Left-join flow columns onto bars (tz-aware index); bars without trades get 0 volume / NaN prices."""
+    out = bars.join(flow.rename(columns={"volume": "flow_volume"}), how="left")
+    for c in ("flow_volume", "buy_volume", "sell_volume", "delta", "trades"):
+        if c in out.columns:
+            out[c] = out[c].fillna(0)
+    return out
+
+
+if __name__ == "__main__":
+    sym = "BTCUSDT"
+    now = pd.Timestamp.now(tz="UTC").floor("1min")
+    print(sync_aggtrades(sym, start=now - pd.Timedelta(minutes=30)), "trades stored")
+    tr = load_trades(sym, start=now - pd.Timedelta(minutes=30))
+    print(build_flow_bars(tr, "1m").tail())
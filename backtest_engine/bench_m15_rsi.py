@@ -0,0 +1,49 @@
+# bench_m15_rsi.py (run in backtest_engine dir)
+# Thời gian chạy m15_rsi.generate theo kích thước dữ liệu (1m random walk, 1 -> 24 tháng):
+# chi phí / bar phải gần như không đổi (tuyến tính). Phiên bản cũ (iterrows + lọc lại frame +
+# ghi CSV ở mỗi tín hiệu) bậc hai theo số tín hiệu.
+import os
+import time
+
+os.environ.setdefault('BT_INDICATOR_CACHE', 'off')     # synthetic data: keep the disk cache clean
+
+import numpy as np
+import pandas as pd
+
+import indicator_cache
+from mtf import build_mtf_pyramid
+from strategies import m15_rsi
+
+MONTHS = (1, 3, 6, 12, 24)
+BARS_PER_MONTH = 30 * 1440
+
+
+def make_1m(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 60_000 + np.cumsum(rng.normal(0, 40, n))
+    idx = pd.date_range('2023-01-01', periods=n, freq='1min', tz='UTC', name='open_time')
+    return pd.DataFrame({'open': close, 'high': close + 15, 'low': close - 15, 'close': close,
+                         'volume': rng.lognormal(3, 1, n)}, index=idx)
+
+
+rows = []
+for months in MONTHS:
+    df = make_1m(months * BARS_PER_MONTH)
+    mtf = build_mtf_pyramid(df, timeframes=('15m',), use_cache=False)
+    m15_rsi.generate(df, 0.01, mtf=mtf)                 # warm-up (imports)
+    best = float('inf')
+    for _ in range(3):
+        indicator_cache.clear()                         # time the RSI too, not a cache hit
+        t0 = time.perf_counter()
+        signals = m15_rsi.generate(df, 0.01, mtf=mtf)
+        best = min(best, time.perf_counter() - t0)
+    rows.append((months, len(df), len(signals), best))
+    print(f"{months:>3} tháng  {len(df):>9,} bars  {len(signals):>5} signals  "
+          f"{best * 1000:8.2f} ms  {best / len(df) * 1e9:7.1f} ns/bar")
+
+# linear scaling: ns/bar of the largest run stays within 3x of the mid-size runs
+per_bar = np.array([t / n for _, n, _, t in rows])
+ratio = per_bar[-1] / np.median(per_bar[1:])
+print(f"\nns/bar (24 tháng) / median = {ratio:.2f}")
+assert ratio < 3, "m15_rsi.generate is not scaling linearly"
+print("✅ linear")
@@ -5,33 +5,58 @@ from evaluation import calculate_performance_metrics
 import pandas as pd
 import numpy as np
 import warnings
-from init import clean_ohlc, get_data_path
+from init import get_backend, to_display_tz, DISPLAY_TZ
+from catalog import find_dataset
+from mtf import load_mtf
+from data_quality import scan_ohlcv, summarize, save_gap_index, gap_index_path
 import os
 from pathlib import Path
 
 warnings.filterwarnings("ignore", category=FutureWarning, message=".*deprecated.*")
  
-# load your 1m data here. Example fallback if file not found:
-file_path = get_data_path("BTCUSDT_1m_20251001_0000_to_20251127_2359.csv")
+# load your 1m data here: the data catalog picks the stored file covering the range
+SYMBOL = "BTCUSDT"
+# catalog bounds are UTC when naive; this run is the VN-local range the 1m file was downloaded for
+START = pd.Timestamp("2025-10-01", tz=DISPLAY_TZ)
+END = pd.Timestamp("2025-11-27 23:59", tz=DISPLAY_TZ)
+dataset = find_dataset(SYMBOL, "1m", START, END)
+if dataset is None:
+    raise FileNotFoundError(f"Không có dữ liệu 1m {SYMBOL} cho {START} -> {END} (chạy get_history_1.py rồi python catalog.py)")
+file_path = dataset["path"]
 
-df_1m_raw = pd.read_csv(file_path)
-# expected columns: Open, High, Low, Close, Volume, Time or index timestamp
-df_1m = clean_ohlc(df_1m_raw, timeframe='1min')
-
-# timezone handling (choose one)
-if df_1m.index.tz is None:
-    df_1m = df_1m.tz_localize('Asia/Ho_Chi_Minh')
+# expected columns: open_time, open, high, low, close, volume (typed pyarrow ingest)
+# load_mtf also derives 3m..1d bars from the 1m base (cached next to the CSV)
+# BT_BACKEND=polars switches loading / resampling / export to pl_backend.py
+# Everything runs on UTC timestamps; DISPLAY_TZ (VN) is only applied to the exported CSVs.
+BACKEND = get_backend()
+if BACKEND == 'polars':
+    from pl_backend import load_mtf_pl, export_csv_pl
+    df_1m, mtf = load_mtf_pl(file_path)
 else:
-    df_1m = df_1m.tz_convert('Asia/Ho_Chi_Minh')
+    df_1m, mtf = load_mtf(file_path)
+
+# data-quality scan: gaps / duplicates / bad OHLC -> <file>.gaps.csv (get_history_1.repair_gaps reads it)
+# written on every run, header-only when clean, so an index from before a repair never lingers
+quality = scan_ohlcv(df_1m, '1m')
+print(f"🔎 Data quality: {summarize(quality)}")
+save_gap_index(quality, gap_index_path(file_path))
  
 if __name__ == '__main__':
-    print("🚀 Bắt đầu Backtest (MTF workflow)...")
+    import argparse
+    import registry
+    parser = argparse.ArgumentParser(description="Backtest 1m + MTF")
+    parser.add_argument('--strategy', default=None,
+                        help=f"plugin in strategies/ ({', '.join(registry.available())}); default env BT_STRATEGY or {registry.DEFAULT_STRATEGY}")
+    args = parser.parse_args()
+    STRATEGY = registry.selected(args.strategy)
+
+    print(f"🚀 Bắt đầu Backtest (MTF workflow) — strategy: {STRATEGY}")
     INITIAL_CAPITAL = 1000.0
     TAKER_FEE = 0.00075
     SIZE = 1
     LEVERAGE = 2
     # 1) Generate signals from strategy (strategy does resample + indicators internally)
-    signals = generate_signals(df_1m, base_risk_pct=SIZE)
+    signals = generate_signals(df_1m, base_risk_pct=SIZE, mtf=mtf, strategy=STRATEGY)
     # Optional: inspect non-empty signals
     num_signals = signals['signal_side'].count()
     print(f"Signals generated: {signals['signal_side'].count()} non-null entries")
@@ -43,7 +68,8 @@ if __name__ == '__main__':
     engine = BacktestEngine(initial_capital=INITIAL_CAPITAL, fee_rate=TAKER_FEE,
                             slippage_pct=0.0002, slippage_ticks=0.0,
                             tick_size=0.0, leverage=LEVERAGE)
-    output_data, trades_df = engine.run_backtest(df_1m, signals_df=signals, prefer_risk_pct=True)
+    output_data, trades_df = engine.run_backtest(df_1m, signals_df=signals, prefer_risk_pct=True,
+                                                 bad_windows=quality['index'])
  
     # 3) Evaluate
     equity_curve = output_data['equity'].dropna()
@@ -106,6 +132,10 @@ if __name__ == '__main__':
         if 'position_side' in df_output.columns:
             rename_map['position_side'] = 'side'
         df_output.rename(columns=rename_map, inplace=True)
+
+        # local time only for the exported files
+        df_output = to_display_tz(df_output, DISPLAY_TZ)
+        trades_df = to_display_tz(trades_df, DISPLAY_TZ)
  
 
         # Tên folder lưu file
@@ -115,8 +145,12 @@ if __name__ == '__main__':
         os.makedirs(out_dir, exist_ok=True)
 
         # Xuất CSVs vào folder
-        df_output.to_csv(f"{out_dir}/backtest_output_detailed_mtf.csv")
-        trades_df.to_csv(f"{out_dir}/backtest_trades_summary_mtf.csv", index=False)
+        if BACKEND == 'polars':
+            export_csv_pl(df_output, f"{out_dir}/backtest_output_detailed_mtf.csv")
+            export_csv_pl(trades_df, f"{out_dir}/backtest_trades_summary_mtf.csv", index=False)
+        else:
+            df_output.to_csv(f"{out_dir}/backtest_output_detailed_mtf.csv")
+            trades_df.to_csv(f"{out_dir}/backtest_trades_summary_mtf.csv", index=False)
  
     except Exception as e:
         print(f"❌ Lỗi khi xuất file: {e}")
@@ -0,0 +1,221 @@
+# catalog.py
+"""
+Data catalog: a small SQLite index of every kline dataset stored under data/.
+One row per file: symbol, interval, start_ms, end_ms, rows, checksum, path (+ size/mtime to detect changes).
+
+    cat = DataCatalog()                                    # data/catalog.sqlite
+    hit = cat.find('BTCUSDT', '15m', '2025-10-01', '2025-11-27 16:59')
+    df  = cat.load_range('BTCUSDT', '15m', '2025-10-01', '2025-11-27 16:59')
+
+start/end are anything pd.Timestamp accepts; naive values are UTC like every other store
+(pass tz-aware bounds for local time, e.g. pd.Timestamp('2025-10-01', tz='Asia/Ho_Chi_Minh')).
+
+Lookups go through the (symbol, interval, start_ms, end_ms) index, so "which file covers [a, b]"
+is an index seek instead of guessing filenames. The index refreshes itself lazily (new / modified
+files are re-read, deleted ones dropped) the first time a process queries it.
+"""
+import hashlib
+import re
+import sqlite3
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from ohlc_data import find_data_dir, read_ohlc_csv, resample_data, _tf_to_ns
+
+DEFAULT_TZ = 'UTC'                  # naive start/end are UTC (VN local time only in get_history_1.py's CLI)
+CATALOG_FILE = 'catalog.sqlite'
+
+# BTCUSDT_15m_20251001_0000_to_20251127_2359.csv
+_FNAME_RE = re.compile(r'^(?P<symbol>[A-Z0-9]+)_(?P<interval>\d+[mhdwM])_')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+    path      TEXT PRIMARY KEY,
+    symbol    TEXT NOT NULL,
+    interval  TEXT NOT NULL,
+    start_ms  INTEGER NOT NULL,
+    end_ms    INTEGER NOT NULL,
+    rows      INTEGER NOT NULL,
+    checksum  TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_datasets_range ON datasets (symbol, interval, start_ms, end_ms);
+"""
+
+
+def _to_ms(t, tz: str = DEFAULT_TZ) -> int:
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(tz)
+    return int(ts.value // 1_000_000)
+
+
+def _interval_ms(interval: str) -> int:
+    period, is_month = _tf_to_ns(interval)
+    return (period * 28 * 86_400_000) if is_month else period // 1_000_000
+
+
+def _file_checksum(path: Path, chunk: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class DataCatalog:
+    def __init__(self, data_dir=None, db_path=None):
+        self.data_dir = Path(data_dir).resolve() if data_dir is not None else find_data_dir()
+        self.db_path = Path(db_path) if db_path is not None else self.data_dir / CATALOG_FILE
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        self._refreshed = False
+
+    # ---------- indexing ----------
+    def register(self, path) -> Optional[dict]:
+        """(Re)index one CSV file; returns its catalog row or None if the filename is not a kline dataset."""
+        path = Path(path).resolve()
+        m = _FNAME_RE.match(path.name)
+        if m is None or not path.is_file():
+            return None
+        st = path.stat()
+        idx = read_ohlc_csv(path, columns=[]).index
+        if len(idx) == 0:
+            return None
+        row = {
+            'path': str(path),
+            'symbol': m.group('symbol'),
+            'interval': m.group('interval'),
+            'start_ms': int(idx[0].value // 1_000_000),
+            'end_ms': int(idx[-1].value // 1_000_000),
+            'rows': len(idx),
+            'checksum': _file_checksum(path),
+            'size': st.st_size,
+            'mtime_ns': st.st_mtime_ns,
+        }
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO datasets VALUES "
+                "(:path, :symbol, :interval, :start_ms, :end_ms, :rows, :checksum, :size, :mtime_ns)", row)
+        return row
+
+    def refresh(self) -> int:
+        """Sync the index with data_dir: add new/changed CSVs, drop deleted ones. Returns #files (re)indexed."""
+        known = {r['path']: (r['size'], r['mtime_ns'])
+                 for r in self._conn.execute("SELECT path, size, mtime_ns FROM datasets")}
+        seen = set()
+        n = 0
+        for f in sorted(self.data_dir.glob('*.csv')):
+            if f.name.endswith('.gaps.csv'):
+                continue    # data_quality sidecar, not a dataset
+            p = str(f.resolve())
+            seen.add(p)
+            st = f.stat()
+            if known.get(p) == (st.st_size, st.st_mtime_ns):
+                continue
+            if self.register(f) is not None:
+                n += 1
+        gone = [p for p in known if p not in seen]
+        if gone:
+            with self._conn:
+                self._conn.executemany("DELETE FROM datasets WHERE path = ?", [(p,) for p in gone])
+        self._refreshed = True
+        return n
+
+    def _ensure_fresh(self):
+        if not self._refreshed:
+            self.refresh()
+
+    # ---------- queries ----------
+    def list(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> pd.DataFrame:
+        self._ensure_fresh()
+        q, args = "SELECT * FROM datasets WHERE 1=1", []
+        if symbol:
+            q += " AND symbol = ?"; args.append(symbol.upper())
+        if interval:
+            q += " AND interval = ?"; args.append(interval)
+        rows = [dict(r) for r in self._conn.execute(q + " ORDER BY symbol, interval, start_ms", args)]
+        return pd.DataFrame(rows)
+
+    def find(self, symbol: str, interval: str, start=None, end=None) -> Optional[dict]:
+        """
+        Smallest stored dataset of (symbol, interval) that covers [start, end] (inclusive), or None.
+        start/end None -> the dataset with the widest coverage.
+        """
+        self._ensure_fresh()
+        lo = _to_ms(start) if start is not None else None
+        hi = _to_ms(end) if end is not None else None
+        q = "SELECT * FROM datasets WHERE symbol = ? AND interval = ?"
+        args: List = [symbol.upper(), interval]
+        if lo is not None:
+            q += " AND start_ms <= ?"; args.append(lo)
+        if hi is not None:
+            # the last bar (opened at end_ms) covers up to end_ms + interval
+            q += " AND end_ms >= ?"; args.append(hi - _interval_ms(interval) + 1)
+        q += " ORDER BY (end_ms - start_ms) " + ("ASC" if (lo is not None or hi is not None) else "DESC") + " LIMIT 1"
+        r = self._conn.execute(q, args).fetchone()
+        return dict(r) if r is not None else None
+
+    def overlapping(self, symbol: str, interval: str, start, end) -> List[dict]:
+        """All datasets of (symbol, interval) that intersect [start, end], ordered by start."""
+        self._ensure_fresh()
+        rows = self._conn.execute(
+            "SELECT * FROM datasets WHERE symbol = ? AND interval = ? AND start_ms <= ? AND end_ms >= ? "
+            "ORDER BY start_ms", (symbol.upper(), interval, _to_ms(end), _to_ms(start)))
+        return [dict(r) for r in rows]
+
+    def load_range(self, symbol: str, interval: str, start, end, tz: str = 'UTC') -> pd.DataFrame:
+        """
+        OHLCV for [start, end] (inclusive) with index in `tz`.
+        Uses one covering file if there is one, else stitches overlapping files; if nothing is stored
+        at `interval`, derives it from stored 1m data with resample_data.
+        """
+        lo, hi = pd.Timestamp(_to_ms(start), unit='ms', tz='UTC'), pd.Timestamp(_to_ms(end), unit='ms', tz='UTC')
+        hit = self.find(symbol, interval, start, end)
+        parts = [hit] if hit is not None else self.overlapping(symbol, interval, start, end)
+        if not parts:
+            if interval != '1m' and self.overlapping(symbol, '1m', start, end):
+                # widen by one bar so the first bar is built from complete 1m data
+                wide_start = lo - pd.Timedelta(milliseconds=_interval_ms(interval))
+                df_1m = self.load_range(symbol, '1m', wide_start, end, tz=tz)
+                return resample_data(df_1m, interval).loc[lo.tz_convert(tz):hi.tz_convert(tz)]
+            raise FileNotFoundError(f"No stored {symbol} {interval} data covering {start} -> {end} in {self.data_dir}")
+
+        frames = [read_ohlc_csv(p['path']) for p in parts]
+        df = frames[0] if len(frames) == 1 else pd.concat(frames)
+        if len(frames) > 1:
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+        df = df.tz_convert(tz) if df.index.tz is not None else df.tz_localize(tz)
+        return df.loc[lo.tz_convert(tz):hi.tz_convert(tz)]
+
+    def close(self):
+        self._conn.close()
+
+
+_default: Optional[DataCatalog] = None
+
+
+def default_catalog() -> DataCatalog:
+    """Process-wide catalog over find_data_dir()."""
+    global _default
+    if _default is None:
+        _default = DataCatalog()
+    return _default
+
+
+def find_dataset(symbol: str, interval: str, start=None, end=None) -> Optional[dict]:
+    return default_catalog().find(symbol, interval, start, end)
+
+
+def load_range(symbol: str, interval: str, start, end, tz: str = 'UTC') -> pd.DataFrame:
+    return default_catalog().load_range(symbol, interval, start, end, tz=tz)
+
+
+if __name__ == '__main__':
+    cat = default_catalog()
+    print(f"Indexed {cat.refresh()} file(s) in {cat.data_dir}")
+    print(cat.list().drop(columns=['checksum', 'size', 'mtime_ns'], errors='ignore').to_string())
@@ -0,0 +1,83 @@
+# check_backend_parity.py (run in backtest_engine dir)
+# So sánh backend pandas (mặc định) và polars (BT_BACKEND=polars) trên cùng file 1m:
+# clean_ohlc, resample_data (mọi khung MTF), chuẩn bị tín hiệu boll_vol / m15_rsi, export CSV.
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from init import read_ohlc_csv, resample_data
+from catalog import find_dataset
+from mtf import DEFAULT_TIMEFRAMES
+import pl_backend as plb
+from strategies import boll_vol, m15_rsi
+
+TZ = 'Asia/Ho_Chi_Minh'
+OHLCV = ['open', 'high', 'low', 'close', 'volume']
+path = find_dataset("BTCUSDT", "1m")["path"]
+
+failures = []
+
+def check(name, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ''))
+    if not ok:
+        failures.append(name)
+
+def same_frame(a: pd.DataFrame, b: pd.DataFrame, cols):
+    if not a.index.equals(b.index):
+        return False, f"index {len(a)} vs {len(b)}"
+    diff = np.nanmax(np.abs(a[cols].to_numpy(float) - b[cols].to_numpy(float))) if len(a) else 0.0
+    nan_ok = (a[cols].isna().to_numpy() == b[cols].isna().to_numpy()).all()
+    return bool(nan_ok and diff <= 1e-9 * max(1.0, np.nanmax(np.abs(a[cols].to_numpy(float))))), f"max |diff| = {diff:.3g}"
+
+# 1) clean_ohlc
+df_pd = read_ohlc_csv(path).tz_convert(TZ)
+df_pl = plb.clean_ohlc_pl(path, tz=TZ)
+check('clean_ohlc', *same_frame(df_pd, df_pl, OHLCV))
+
+# lazy scan with a time range
+start, end = df_pd.index[100], df_pd.index[5000]
+rng = plb.clean_ohlc_pl(plb.scan_klines(path, start=start, end=end), tz=TZ)
+check('scan_klines(start, end)', *same_frame(df_pd.loc[start:end], rng, OHLCV))
+
+# naive string timestamps ('2025-10-01 00:00:00', no offset) = UTC, no rows dropped
+with tempfile.TemporaryDirectory() as tmp:
+    naive_path = os.path.join(tmp, 'naive.csv')
+    head = df_pd[OHLCV].head(3000).tz_convert('UTC')
+    head.set_axis(head.index.strftime('%Y-%m-%d %H:%M:%S'), axis=0).rename_axis('open_time').to_csv(naive_path)
+    naive_pd = read_ohlc_csv(naive_path).tz_localize('UTC')
+    naive_pd.index = naive_pd.index.as_unit('ns')
+    naive_pl = plb.clean_ohlc_pl(naive_path)
+    check('clean_ohlc naive strings', *same_frame(naive_pd, naive_pl, OHLCV))
+    check('clean_ohlc naive strings (no rows lost)', len(naive_pl) == len(head), f"{len(naive_pl)}/{len(head)} rows")
+
+# 2) resample_data for every MTF level
+for tf in DEFAULT_TIMEFRAMES:
+    if tf == '1m':
+        continue
+    check(f'resample_data {tf}', *same_frame(resample_data(df_pd, tf), plb.resample_data_pl(df_pd, tf), OHLCV))
+
+# 3) signal preparation on 15m
+df_15m = resample_data(df_pd, '15m')
+bv_pd = boll_vol.prepare_15m(df_15m.copy(), df_pd)
+bv_pl = plb.prepare_boll_vol_pl(df_15m.copy())
+check('boll_vol bands', *same_frame(bv_pd, bv_pl, ['bb_upper', 'bb_mid', 'bb_lower', 'vol_ma']))
+for c in ['signal_buy', 'signal_sell']:
+    check(f'boll_vol {c}', bool((bv_pd[c].to_numpy() == bv_pl[c].to_numpy()).all()), f"{int(bv_pd[c].sum())} signals")
+
+rsi_pd = m15_rsi.prepare_15m(df_15m.copy())
+rsi_pl = plb.prepare_m15_rsi_pl(df_15m.copy())
+check('m15_rsi rsi14', *same_frame(rsi_pd, rsi_pl, ['rsi14']))
+for c in ['signal_buy', 'signal_sell']:
+    check(f'm15_rsi {c}', bool((rsi_pd[c].fillna(False).to_numpy() == rsi_pl[c].to_numpy()).all()), f"{int(rsi_pd[c].sum())} signals")
+
+# 4) export
+with tempfile.TemporaryDirectory() as tmp:
+    out = df_pd[['close']].head(1000)
+    out.to_csv(os.path.join(tmp, 'pd.csv'))
+    plb.export_csv_pl(out, os.path.join(tmp, 'pl.csv'))
+    a = pd.read_csv(os.path.join(tmp, 'pd.csv'))
+    b = pd.read_csv(os.path.join(tmp, 'pl.csv'))
+    check('export csv', a.columns.tolist() == b.columns.tolist() and a.equals(b))
+
+print("\n" + ("✅ pandas == polars" if not failures else f"❌ {len(failures)} mismatch: {failures}"))
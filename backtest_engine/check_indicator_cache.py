@@ -0,0 +1,67 @@
+# check_indicator_cache.py (run in backtest_engine dir)
+# indicator_cache: disk cache stays under its byte cap (least recently used files go first),
+# and a precomputed fingerprint gives the same arrays as hashing the frame in every wrapper.
+import os
+import tempfile
+import time
+
+import numpy as np
+
+os.environ['BT_INDICATOR_CACHE'] = tempfile.mkdtemp(prefix='ind_cache_')
+import indicator_cache as ic
+from catalog import find_dataset
+from mtf import load_mtf
+from ohlc_data import dataset_fingerprint
+from strategies import boll_vol
+
+failures = []
+
+def check(name, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ''))
+    if not ok:
+        failures.append(name)
+
+cache_dir = ic._cache_dir()
+df_1m, mtf = load_mtf(find_dataset("BTCUSDT", "1m")["path"])
+df_15m = mtf['15m']
+fp = dataset_fingerprint(df_15m)
+
+# 1) disk cap: 40 RSI periods, each .npz ~ len(df_15m) * 8 bytes, cap at ~10 files
+one = len(df_15m) * 8
+ic.MAX_DISK_BYTES = 10 * one + 4096
+for period in range(2, 42):
+    ic.rsi(df_15m, '15m', period, fingerprint=fp)
+files = list(cache_dir.glob('*.npz'))
+size = sum(f.stat().st_size for f in files)
+check('disk cache <= MAX_DISK_BYTES', size <= ic.MAX_DISK_BYTES, f"{len(files)} files, {size} bytes")
+
+# the most recent entry survives eviction (read back from disk after the in-memory LRU is dropped)
+ic.clear()
+hits = ic.stats()['disk_hits']
+ic.rsi(df_15m, '15m', 41, fingerprint=fp)
+check('newest entry kept on disk', ic.stats()['disk_hits'] == hits + 1)
+removed = ic.prune(max_bytes=0)
+check('prune(max_bytes=0) empties the cache', removed > 0 and not list(cache_dir.glob('*.npz')), f"{removed} removed")
+
+# 2) precomputed fingerprint == hashing inside the wrappers
+ic.clear(disk=True)
+a = boll_vol.prepare_15m(df_15m.copy(), df_1m)
+ic.clear(disk=True)
+b = boll_vol.prepare_15m(df_15m.copy(), df_1m, fingerprint=fp)
+cols = ['bb_upper', 'bb_mid', 'bb_lower', 'vol_ma']
+check('prepare_15m(fingerprint=...) == prepare_15m()', np.allclose(a[cols], b[cols], equal_nan=True))
+
+t0 = time.perf_counter()
+for _ in range(20):
+    ic.bbands(df_15m, '15m', 20, 2)
+t_hash = (time.perf_counter() - t0) / 20
+t0 = time.perf_counter()
+for _ in range(20):
+    ic.bbands(df_15m, '15m', 20, 2, fingerprint=fp)
+t_fp = (time.perf_counter() - t0) / 20
+print(f"⏱ cached bbands, 15m frame ({len(df_15m)} bars): {t_hash * 1e6:.0f} µs hashing -> {t_fp * 1e6:.0f} µs with fingerprint")
+
+ic.clear(disk=True)
+if failures:
+    raise SystemExit(f"❌ {len(failures)} check(s) failed: {failures}")
+print("✅ indicator_cache ok")
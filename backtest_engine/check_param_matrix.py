@@ -0,0 +1,75 @@
+# check_param_matrix.py (run in backtest_engine dir)
+# param_matrix: bbands_matrix == talib.BBANDS (real 15m data + a synthetic 4-year 1m series),
+# boll_vol_signal_matrix flags == strategies/boll_vol.prepare_15m for 54 parameter sets,
+# boll_vol_screen counts == the signal matrix column sums.
+import itertools
+import os
+import tempfile
+
+import numpy as np
+import talib
+
+os.environ['BT_INDICATOR_CACHE'] = tempfile.mkdtemp(prefix='ind_cache_')
+import indicator_cache as ic
+import param_matrix as pm
+from catalog import find_dataset
+from mtf import load_mtf
+from strategies import boll_vol
+
+TOL = 1e-8
+BB_PERIODS, BB_STDS = (10, 20, 30), (1.5, 2.0, 2.5)
+VOL_PERIODS, VOL_MULTS = (10, 20), (1.25, 1.5, 2.0)
+
+failures = []
+
+def check(name, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ''))
+    if not ok:
+        failures.append(name)
+
+def max_rel(a, b):
+    ok = ~np.isnan(b)
+    return np.max(np.abs(a[ok] - b[ok]) / np.maximum(np.abs(b[ok]), 1e-300))
+
+df_1m, mtf = load_mtf(find_dataset("BTCUSDT", "1m")["path"])
+df_15m = mtf['15m']
+close = df_15m['close'].to_numpy(dtype=np.float64)
+
+# 1) BBANDS parity: mid / std (and so every band) per period
+mid, sd = pm.bbands_matrix(close, BB_PERIODS)
+for j, p in enumerate(BB_PERIODS):
+    upper, middle, _ = talib.BBANDS(close, p, 1, 1)
+    same_nan = np.array_equal(np.isnan(mid[:, j]), np.isnan(middle)) and np.array_equal(np.isnan(sd[:, j]), np.isnan(middle))
+    err = max(max_rel(mid[:, j], middle), max_rel(sd[:, j], upper - middle))
+    check(f'bbands_matrix period={p} vs talib (15m)', same_nan and err < TOL, f"max rel err {err:.1e}")
+
+# long trending series: the block-restarted sums must not drift with history length
+rng = np.random.default_rng(0)
+x = 20000 * np.exp(np.cumsum(rng.normal(1.5e-6, 8e-4, 4 * 365 * 1440)))
+sd_long = pm.rolling_std_matrix(x, (10, 20, 50))
+for j, p in enumerate((10, 20, 50)):
+    upper, middle, _ = talib.BBANDS(x, p, 1, 1)
+    err = max_rel(sd_long[:, j], upper - middle)
+    check(f'rolling_std_matrix period={p} vs talib (4y synthetic 1m)', err < TOL, f"max rel err {err:.1e}")
+
+# 2) signal flags for every parameter set vs the pandas strategy path
+combos = [dict(zip(('bb_period', 'bb_std', 'vol_period', 'vol_mult'), c))
+          for c in itertools.product(BB_PERIODS, BB_STDS, VOL_PERIODS, VOL_MULTS)]
+buy, sell = pm.boll_vol_signal_matrix(df_15m, combos)
+mismatch = 0
+for j, c in enumerate(combos):
+    ref = boll_vol.prepare_15m(df_15m.copy(), df_1m, **c)
+    mismatch += int((ref['signal_buy'].to_numpy() != buy[:, j]).sum() + (ref['signal_sell'].to_numpy() != sell[:, j]).sum())
+check(f'boll_vol_signal_matrix == prepare_15m ({len(combos)} parameter sets)', mismatch == 0,
+      f"{mismatch} flag mismatches, {int(buy.sum() + sell.sum())} signals")
+
+# 3) the matrix-product screen counts the same signals
+grid = pm.boll_vol_screen(df_15m, BB_PERIODS, BB_STDS, VOL_PERIODS, VOL_MULTS)
+same_order = grid[['bb_period', 'bb_std', 'vol_period', 'vol_mult']].to_dict('records') == combos
+check('boll_vol_screen counts == signal matrix sums',
+      same_order and np.array_equal(grid['n_buy'], buy.sum(axis=0)) and np.array_equal(grid['n_sell'], sell.sum(axis=0)))
+
+ic.clear(disk=True)
+if failures:
+    raise SystemExit(f"❌ {len(failures)} check(s) failed: {failures}")
+print("✅ param_matrix ok")
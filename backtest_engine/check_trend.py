@@ -0,0 +1,61 @@
+# check_trend.py (run in backtest_engine dir)
+# So sánh trend.py (vectorized, mọi bar) với strategy_signal.timeframe_trend / detect_market_trend
+# (linregress trên N nến cuối) tại từng bar, rồi đo thời gian cho cả lịch sử.
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import strategy_signal as live
+
+from catalog import find_dataset
+from mtf import load_mtf
+from init import _tf_to_ns
+from trend import (TREND_CFG, TREND_NAMES, rolling_slope_norm, timeframe_trend_series,
+                   market_trend_series, trend_labels)
+
+df_1m, mtf = load_mtf(find_dataset("BTCUSDT", "1m")["path"])
+failures = []
+
+def check(name, ok, detail=''):
+    print(f"{'✅' if ok else '❌'} {name}" + (f"  ({detail})" if detail else ''))
+    if not ok:
+        failures.append(name)
+
+# 1) slope per window vs linregress
+close_1h = mtf['1h']['close']
+slope = rolling_slope_norm(close_1h.to_numpy(), 40)
+ref = np.array([live.slope_of_series(close_1h.iloc[t - 39:t + 1]) for t in range(39, len(close_1h))])
+err = np.nanmax(np.abs(slope[39:] - ref))
+check("rolling_slope_norm == slope_of_series (1h, 40)", err < 1e-12, f"max |diff| {err:.2e}")
+
+# 2) per-bar timeframe trend vs the live function on the history up to that bar
+for interval, window in TREND_CFG:
+    df = mtf[interval]
+    vec = timeframe_trend_series(df, price_window=window, vol_recent=5, vol_prev=5)
+    ref = [live.timeframe_trend(df.iloc[:t + 1], price_window=window, vol_recent=5, vol_prev=5)
+           for t in range(len(df))]
+    bad = int((trend_labels(vec.to_numpy()) != np.array(ref, dtype=object)).sum())
+    check(f"timeframe_trend_series {interval} ({len(df)} bars)", bad == 0, f"{bad} mismatches")
+
+# 3) aligned majority vote vs detect_market_trend on the bars closed at a sample of timestamps
+mt = market_trend_series(mtf)
+sample = df_1m.index[::max(len(df_1m) // 300, 1)]
+bad = 0
+for ts in sample:
+    closed = {tf: mtf[tf][mtf[tf].index + pd.Timedelta(_tf_to_ns(tf)[0]) <= ts] for tf, _ in TREND_CFG}
+    bad += TREND_NAMES[int(mt.at[ts, 'trend'])] != live.detect_market_trend("BTCUSDT", mtf=closed)
+check(f"market_trend_series vs detect_market_trend ({len(sample)} timestamps)", bad == 0, f"{bad} mismatches")
+
+# 4) timing: whole history, every 1m bar
+t0 = time.perf_counter()
+mt = market_trend_series(mtf)
+dt = time.perf_counter() - t0
+print(f"⏱ market_trend_series: {len(mt)} bars x {len(TREND_CFG)} timeframes in {dt * 1000:.1f} ms "
+      f"| up {int((mt.trend == 1).sum())}, down {int((mt.trend == -1).sum())}, sideway {int((mt.trend == 0).sum())}")
+
+if failures:
+    raise SystemExit(f"❌ {len(failures)} check(s) failed: {failures}")
+print("✅ trend.py khớp strategy_signal")
@@ -1,5 +1,7 @@
 # engine.py (patched - robust column access, slippage, risk_pct to size conversion)
 from init import *   # giữ imports chung (pandas/numpy if defined). Nếu không, uncomment imports below.
+from data_quality import window_mask
+from signal_events import as_events
 # import pandas as pd
 # import numpy as np
  
@@ -233,15 +235,21 @@ class BacktestEngine:
             # unknown side
             return
  
-    def run_backtest(self, data_1m, signals_df=None, prefer_risk_pct=True, progress=True):
+    def run_backtest(self, data_1m, signals_df=None, prefer_risk_pct=True, progress=True,
+                     bad_windows=None, skip_bad_windows=True):
         """
         Replay 1m bars and execute precomputed signals.
  
         - data_1m: DataFrame indexed by DatetimeIndex (1-minute)
         - signals_df: DataFrame indexed by timestamps (subset of data_1m.index) with columns:
             'signal_side' (BUY/SELL), optional 'size', optional 'risk_pct', optional 'tp_price', 'sl_price'
+            or a signal_events.SignalEvents; either way it is walked as sorted event arrays with a
+            cursor (no per-bar index lookup)
         - prefer_risk_pct: if True and a signal provides 'risk_pct', engine converts to absolute size using current capital
         - progress: whether to print progress updates
+        - bad_windows: gap index from data_quality.scan_ohlcv (report['index'] or load_gap_index(...)).
+            Affected bars are marked in output column 'data_issue'; with skip_bad_windows=True no new
+            signal is executed on them (TP/SL exits still run).
  
         Returns:
         (output_data DataFrame, trades_df DataFrame)
@@ -259,13 +267,24 @@ class BacktestEngine:
         except Exception:
             self.output_data['position_side'] = pd.Series(index=self.output_data.index, dtype=object)
  
+        # bars touched by gaps / duplicates / bad OHLC (see data_quality.py)
+        bad_mask = window_mask(data_1m.index, bad_windows)
+        self.output_data['data_issue'] = bad_mask
+        skipped_signals = 0
+
         total_bars = len(data_1m)
         progress_increment = max(total_bars // 10, 1)
         next_progress_mark = progress_increment
         current_bar_count = 0
+
+        # signals as sorted event arrays; `cur` follows the bar loop
+        events = as_events(signals_df, data_1m.index)
+        ev_pos = events.pos if events is not None else np.empty(0, dtype=np.int64)
+        n_ev = len(ev_pos)
+        cur = 0
  
         # Main loop
-        for index, bar in data_1m.iterrows():
+        for pos, (index, bar) in enumerate(data_1m.iterrows()):
             # ---------- 1) Compute equity = capital + position * price ----------
             current_price = _to_float_safe(_val(bar, 'Close', 'close'))
             position_value = 0.0
@@ -332,8 +351,13 @@ class BacktestEngine:
                     position_closed_by_exit = True
  
             # ---------- 3) Execute signal at this timestamp (if any) ----------
-            if (not position_closed_by_exit) and (signals_df is not None) and (index in signals_df.index):
-                sig = signals_df.loc[index]
+            while cur < n_ev and ev_pos[cur] < pos:
+                cur += 1
+            has_sig = cur < n_ev and ev_pos[cur] == pos
+            if skip_bad_windows and bad_mask[pos] and has_sig:
+                skipped_signals += 1
+            elif (not position_closed_by_exit) and has_sig:
+                sig = events.event(cur)
                 side_sig = sig.get('signal_side', np.nan)
  
                 is_current_long = self.position > 1e-9  # Đang Long
@@ -441,6 +465,8 @@ class BacktestEngine:
  
         # done loop
         print(f"✅ Tiến độ Backtest: 100% hoàn thành ({total_bars}/{total_bars} bars)")
+        if skipped_signals:
+            print(f"⚠️ Bỏ qua {skipped_signals} tín hiệu nằm trong vùng dữ liệu lỗi (gap/duplicate/OHLC)")
  
         # convert trades log to DataFrame and return
         try:
@@ -0,0 +1,236 @@
+# indicator_cache.py
+"""
+Indicator result cache shared by the strategies and across runs.
+- key = (dataset fingerprint, timeframe, indicator name, params); the fingerprint is
+  init.dataset_fingerprint of the frame the indicator is computed on, so a changed / extended
+  dataset never hits a stale entry
+- level 1: in-process LRU (MAX_ENTRIES results), so a TP/SL sweep computes BBANDS / RSI once
+- level 2: one .npz per key in <data dir>/.indicator_cache/ (env BT_INDICATOR_CACHE=<dir>
+  moves it, BT_INDICATOR_CACHE=off keeps the cache in memory only), so the next run skips it too;
+  capped at MAX_DISK_BYTES (env BT_INDICATOR_CACHE_MB), least recently used files are deleted first
+- fingerprinting hashes the whole frame: callers that use several indicators of one frame
+  compute dataset_fingerprint once and pass fingerprint=... (pipeline.py, the strategies' prepare_15m)
+- cached(...) is the generic entry point; bbands / rsi / rolling_mean / ema / macd wrap the
+  TA-Lib / pandas calls the strategies use and return the same arrays as the direct call
+Results are returned as read-only arrays: callers copy them into DataFrame columns.
+"""
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ohlc_data import dataset_fingerprint, find_data_dir
+
+MAX_ENTRIES = 256
+MAX_DISK_BYTES = int(float(os.getenv('BT_INDICATOR_CACHE_MB', '512')) * 2**20)
+
+Result = Union[np.ndarray, Tuple[np.ndarray, ...]]
+
+_LRU: "OrderedDict[tuple, Tuple[np.ndarray, ...]]" = OrderedDict()
+_STATS = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+
+def _cache_dir() -> Optional[Path]:
+    env = os.getenv('BT_INDICATOR_CACHE', '').strip()
+    if env.lower() in ('off', '0', 'false', 'none'):
+        return None
+    if env:
+        return Path(env)
+    try:
+        return find_data_dir() / '.indicator_cache'
+    except FileNotFoundError:
+        return None
+
+
+def _key_file(key: tuple) -> str:
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=16).hexdigest() + '.npz'
+
+
+def _freeze(arrays: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, ...]:
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
+
+
+def _remember(key: tuple, arrays: Tuple[np.ndarray, ...]):
+    _LRU[key] = arrays
+    _LRU.move_to_end(key)
+    while len(_LRU) > MAX_ENTRIES:
+        _LRU.popitem(last=False)
+
+
+def _load_disk(key: tuple) -> Optional[Tuple[np.ndarray, ...]]:
+    d = _cache_dir()
+    if d is None:
+        return None
+    f = d / _key_file(key)
+    if not f.is_file():
+        return None
+    try:
+        with np.load(f, allow_pickle=False) as z:
+            if str(z['key']) != repr(key):       # hash collision / foreign file
+                return None
+            arrays = tuple(z[f'a{i}'] for i in range(int(z['n'])))
+    except (OSError, ValueError, KeyError):
+        return None
+    try:
+        os.utime(f)         # mtime = last use, for prune()
+    except OSError:
+        pass
+    return arrays
+
+
+def _save_disk(key: tuple, arrays: Tuple[np.ndarray, ...]):
+    d = _cache_dir()
+    if d is None:
+        return
+    try:
+        d.mkdir(parents=True, exist_ok=True)
+        f = d / _key_file(key)
+        tmp = f.with_suffix('.tmp.npz')
+        np.savez(tmp, key=np.array(repr(key)), n=np.array(len(arrays)),
+                 **{f'a{i}': a for i, a in enumerate(arrays)})
+        os.replace(tmp, f)
+    except OSError as e:
+        print(f"⚠️ Không ghi được indicator cache: {e}")
+        return
+    prune()
+
+
+def prune(max_bytes: Optional[int] = None) -> int:
+    """
+    Delete the least recently used .npz files until the disk cache is <= max_bytes
+    (default MAX_DISK_BYTES). Returns the number of files removed.
+    """
+    d = _cache_dir()
+    if d is None or not d.is_dir():
+        return 0
+    limit = MAX_DISK_BYTES if max_bytes is None else max_bytes
+    files = []
+    for f in d.glob('*.npz'):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, f))
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for _, size, f in sorted(files, key=lambda t: t[0]):
+        if total <= limit:
+            break
+        f.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def cached(fingerprint: str, tf: str, name: str, params: dict, compute: Callable[[], Result]) -> Result:
+    """
+    Return compute() for this key, from memory, disk or by computing it (then stored in both).
+    compute returns one array or a tuple of several arrays; a hit returns the same shape.
+    """
+    key = (fingerprint, tf, name, tuple(sorted(params.items())))
+    arrays = _LRU.get(key)
+    if arrays is not None:
+        _LRU.move_to_end(key)
+        _STATS['hits'] += 1
+    else:
+        arrays = _load_disk(key)
+        if arrays is not None:
+            _STATS['disk_hits'] += 1
+        else:
+            _STATS['misses'] += 1
+            res = compute()
+            arrays = tuple(np.asarray(a) for a in res) if isinstance(res, tuple) else (np.asarray(res),)
+            _save_disk(key, arrays)
+        _remember(key, _freeze(arrays))
+    return arrays if len(arrays) > 1 else arrays[0]
+
+
+def stats() -> dict:
+    return dict(_STATS, entries=len(_LRU))
+
+
+def clear(disk: bool = False):
+    """Drop the in-process LRU (and the on-disk entries when disk=True)."""
+    _LRU.clear()
+    if disk:
+        d = _cache_dir()
+        if d is not None and d.is_dir():
+            for f in d.glob('*.npz'):
+                f.unlink(missing_ok=True)
+
+
+def _fp(df: pd.DataFrame, fingerprint: Optional[str]) -> str:
+    return fingerprint or dataset_fingerprint(df)
+
+
+# ---------- wrappers used by the strategies ----------
+def bbands(df: pd.DataFrame, tf: str, period: int = 20, nbdev: float = 2,
+           fingerprint: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """talib.BBANDS(close) -> (upper, mid, lower)."""
+    def compute():
+        import talib
+        return talib.BBANDS(df['close'].to_numpy(dtype=np.float64), timeperiod=period,
+                            nbdevup=nbdev, nbdevdn=nbdev)
+    return cached(_fp(df, fingerprint), tf, 'BBANDS', {'period': period, 'nbdev': float(nbdev)}, compute)
+
+
+def rsi(df: pd.DataFrame, tf: str, period: int = 14, fingerprint: Optional[str] = None) -> np.ndarray:
+    def compute():
+        import talib
+        return talib.RSI(df['close'].to_numpy(dtype=np.float64), timeperiod=period)
+    return cached(_fp(df, fingerprint), tf, 'RSI', {'period': period}, compute)
+
+
+def ema(df: pd.DataFrame, tf: str, period: int, fingerprint: Optional[str] = None) -> np.ndarray:
+    def compute():
+        import talib
+        return talib.EMA(df['close'].to_numpy(dtype=np.float64), timeperiod=period)
+    return cached(_fp(df, fingerprint), tf, 'EMA', {'period': period}, compute)
+
+
+def macd(df: pd.DataFrame, tf: str, fast: int = 12, slow: int = 26, signal: int = 9,
+         fingerprint: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """talib.MACD(close) -> (macd, signal, hist)."""
+    def compute():
+        import talib
+        return talib.MACD(df['close'].to_numpy(dtype=np.float64), fastperiod=fast,
+                          slowperiod=slow, signalperiod=signal)
+    return cached(_fp(df, fingerprint), tf, 'MACD', {'fast': fast, 'slow': slow, 'signal': signal}, compute)
+
+
+def rolling_mean(df: pd.DataFrame, tf: str, column: str, period: int, min_periods: int = 1,
+                 fingerprint: Optional[str] = None) -> np.ndarray:
+    """df[column].rolling(period, min_periods).mean() as an array."""
+    def compute():
+        return df[column].rolling(period, min_periods=min_periods).mean().to_numpy(dtype=np.float64)
+    return cached(_fp(df, fingerprint), tf, f'SMA_{column}', {'period': period, 'min_periods': min_periods},
+                  compute)
+
+
+# ---------- feature specs (pipeline.py): declare once, compute once, share between strategies ----------
+_WRAPPERS = {
+    'BBANDS': lambda df, tf, fp, p: bbands(df, tf, fingerprint=fp, **p),
+    'RSI': lambda df, tf, fp, p: rsi(df, tf, fingerprint=fp, **p),
+    'EMA': lambda df, tf, fp, p: ema(df, tf, fingerprint=fp, **p),
+    'MACD': lambda df, tf, fp, p: macd(df, tf, fingerprint=fp, **p),
+    'SMA': lambda df, tf, fp, p: rolling_mean(df, tf, fingerprint=fp, **p),
+}
+
+
+def spec(name: str, **params) -> tuple:
+    """Hashable feature spec: spec('BBANDS', period=20, nbdev=2) -> ('BBANDS', (('nbdev', 2), ('period', 20)))."""
+    if name not in _WRAPPERS:
+        raise KeyError(f"Unknown feature '{name}' (known: {', '.join(_WRAPPERS)})")
+    return name, tuple(sorted(params.items()))
+
+
+def compute(df: pd.DataFrame, tf: str, feature_spec: tuple, fingerprint: Optional[str] = None) -> Result:
+    """Compute (or fetch from the cache) one feature spec on df."""
+    name, params = feature_spec
+    return _WRAPPERS[name](df, tf, fingerprint, dict(params))
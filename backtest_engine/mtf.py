@@ -0,0 +1,182 @@
+# mtf.py
+"""
+Multi-timeframe bar pyramid.
+- build_mtf_pyramid(df_1m): derive 3m/5m/15m/30m/1h/4h/1d bars from the 1m base, each level
+  aggregated from the largest built level whose period divides it (1m -> 3m, 1m -> 5m -> 15m
+  -> 30m -> 1h -> 4h -> 1d): the 1m arrays are scanned twice (for 3m and 5m), every higher
+  level reads a much smaller parent.
+- Results are memoized in-process (small LRU keyed by a fingerprint of the 1m arrays + tz) and,
+  when the 1m CSV path is known, cached on disk in '<csv stem>.mtf/' next to the data, so the
+  pyramid is rebuilt automatically when the base data changes.
+- Returned frames are shallow copies of the memoized ones: adding columns / replacing the index
+  is safe, but their values are shared, so treat them as read-only (copy() before editing in place).
+- load_mtf(path): read 1m CSV + pyramid in one call (what bt_main uses).
+Strategies receive the dict {'1m': df, '3m': df, ..., '1d': df} and never re-read CSVs.
+"""
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ohlc_data import read_ohlc_csv, dataset_fingerprint, _resample_ohlcv_arrays, _tf_to_ns
+
+DEFAULT_TIMEFRAMES = ('1m', '3m', '5m', '15m', '30m', '1h', '4h', '1d')
+OHLCV_COLS = ('open', 'high', 'low', 'close', 'volume')
+
+# in-process memo (LRU): (fingerprint, tz) -> {tf: DataFrame} for the derived levels ('1m' is never stored)
+MEMO_SIZE = 4
+_MEMO: 'OrderedDict[tuple, Dict[str, pd.DataFrame]]' = OrderedDict()
+
+
+def _parent_tf(tf: str, built: Sequence[str]) -> str:
+    """Largest already-built timeframe whose period divides `tf` (falls back to the base)."""
+    period, _ = _tf_to_ns(tf)
+    best = built[0]
+    for cand in built:
+        p, _ = _tf_to_ns(cand)
+        if p < period and period % p == 0 and p > _tf_to_ns(best)[0]:
+            best = cand
+    return best
+
+
+def _frame_to_arrays(df: pd.DataFrame):
+    ts = df.index.as_unit('ns').asi8
+    return (ts,) + tuple(df[c].to_numpy(dtype=np.float64) for c in OHLCV_COLS)
+
+
+def _arrays_to_frame(arrs, tz) -> pd.DataFrame:
+    ts = arrs[0]
+    idx = pd.DatetimeIndex(ts.astype('datetime64[ns]'), name='open_time')
+    if tz is not None:
+        idx = idx.tz_localize('UTC').tz_convert(tz)
+    return pd.DataFrame(dict(zip(OHLCV_COLS, arrs[1:])), index=idx)
+
+
+def _build(df_1m: pd.DataFrame, timeframes: Sequence[str]) -> Dict[str, pd.DataFrame]:
+    tz = df_1m.index.tz
+    if tz is None:
+        raise TypeError("build_mtf_pyramid: df_1m.index must be tz-aware (bars are anchored at 00:00 UTC)")
+    base = df_1m[list(OHLCV_COLS)]
+    if not base.index.is_monotonic_increasing:
+        base = base.sort_index()
+
+    arrays = {'1m': _frame_to_arrays(base)}
+    ordered = sorted(set(timeframes) | {'1m'}, key=lambda t: _tf_to_ns(t)[0])
+    for tf in ordered:
+        if tf in arrays:
+            continue
+        parent = _parent_tf(tf, list(arrays))
+        arrays[tf] = _resample_ohlcv_arrays(*arrays[parent], tf)
+
+    out = {tf: _arrays_to_frame(arrays[tf], tz) for tf in timeframes if tf != '1m'}
+    if '1m' in timeframes:
+        out['1m'] = base
+    return out
+
+
+def _cache_dir(source_path) -> Path:
+    p = Path(source_path)
+    return p.with_name(p.stem + '.mtf')
+
+
+def _load_cache(cache_dir: Path, fingerprint: str, timeframes: Sequence[str], tz) -> Optional[Dict[str, pd.DataFrame]]:
+    manifest = cache_dir / 'manifest.json'
+    if not manifest.is_file():
+        return None
+    try:
+        meta = json.loads(manifest.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if meta.get('fingerprint') != fingerprint:
+        return None
+    out = {}
+    for tf in timeframes:
+        f = cache_dir / f'{tf}.npz'
+        if not f.is_file():
+            return None
+        with np.load(f) as z:
+            out[tf] = _arrays_to_frame((z['ts'],) + tuple(z[c] for c in OHLCV_COLS), tz)
+    return out
+
+
+def _save_cache(cache_dir: Path, fingerprint: str, frames: Dict[str, pd.DataFrame]) -> None:
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for tf, df in frames.items():
+        if tf == '1m':
+            continue
+        arrs = _frame_to_arrays(df)
+        np.savez(cache_dir / f'{tf}.npz', ts=arrs[0], **dict(zip(OHLCV_COLS, arrs[1:])))
+    # manifest last: a half-written cache never matches
+    (cache_dir / 'manifest.json').write_text(
+        json.dumps({'fingerprint': fingerprint, 'timeframes': sorted(frames)}), encoding='utf-8')
+
+
+def _memo_get(key) -> Optional[Dict[str, pd.DataFrame]]:
+    frames = _MEMO.get(key)
+    if frames is not None:
+        _MEMO.move_to_end(key)
+    return frames
+
+
+def _memo_put(key, frames: Dict[str, pd.DataFrame]) -> None:
+    _MEMO[key] = {tf: df for tf, df in frames.items() if tf != '1m'}
+    _MEMO.move_to_end(key)
+    while len(_MEMO) > MEMO_SIZE:
+        _MEMO.popitem(last=False)
+
+
+def _result(df_1m: pd.DataFrame, frames: Dict[str, pd.DataFrame], timeframes: Sequence[str]) -> Dict[str, pd.DataFrame]:
+    """Shallow copies for the caller; '1m' is always the caller's own base."""
+    base = df_1m[list(OHLCV_COLS)]
+    if not base.index.is_monotonic_increasing:
+        base = base.sort_index()
+    return {tf: base if tf == '1m' else frames[tf].copy(deep=False) for tf in timeframes}
+
+
+def build_mtf_pyramid(df_1m: pd.DataFrame,
+                      timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+                      source_path=None,
+                      use_cache: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Return {tf: OHLCV DataFrame} for every tf in `timeframes` ('1m' returns the base columns).
+    - df_1m: 1m OHLCV with tz-aware DatetimeIndex (output frames keep the same tz)
+    - source_path: path of the 1m CSV; enables the on-disk cache next to it
+    - use_cache: False forces a rebuild (memo and disk cache are refreshed)
+    Frames are shallow copies of the memo: read-only values (see module docstring).
+    """
+    fingerprint = dataset_fingerprint(df_1m)
+    tz = df_1m.index.tz
+    key = (fingerprint, str(tz))
+    derived = [t for t in timeframes if t != '1m']
+
+    if use_cache:
+        memo = _memo_get(key)
+        if memo is not None and all(tf in memo for tf in derived):
+            return _result(df_1m, memo, timeframes)
+        if source_path is not None:
+            cached = _load_cache(_cache_dir(source_path), fingerprint, derived, tz)
+            if cached is not None:
+                _memo_put(key, cached)
+                return _result(df_1m, cached, timeframes)
+
+    frames = _build(df_1m, timeframes)
+    _memo_put(key, frames)
+    if source_path is not None:
+        try:
+            _save_cache(_cache_dir(source_path), fingerprint, frames)
+        except OSError as e:
+            print(f"⚠️ Không ghi được MTF cache: {e}")
+    return _result(df_1m, frames, timeframes)
+
+
+def load_mtf(path, timeframes: Sequence[str] = DEFAULT_TIMEFRAMES, tz: str = 'UTC'):
+    """Read a 1m kline CSV and return (df_1m, {tf: df}) using the on-disk pyramid cache."""
+    df_1m = read_ohlc_csv(path, timeframe='1min')
+    if df_1m.index.tz is None:
+        df_1m = df_1m.tz_localize(tz)
+    else:
+        df_1m = df_1m.tz_convert(tz)
+    return df_1m, build_mtf_pyramid(df_1m, timeframes, source_path=path)
@@ -0,0 +1,413 @@
+# ohlc_data.py
+"""
+Data helpers without the plotting / TA stack (init.py re-exports all of them):
+data-dir lookup, backend switch, UTC <-> display tz, OHLC CSV ingest / cleaning,
+dataset fingerprint and the Binance-anchored resampler.
+Modules that only need data (catalog, mtf, strategies.common, ...) import from here, so loading
+a strategy does not pay for init.py's talib / matplotlib / plotly / altair / scipy imports.
+"""
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+
+def find_data_dir() -> Path:
+    """Locate the 'data/' directory: walk up from this file, then fall back to cwd."""
+    this_file = Path(__file__).resolve()
+    for parent in this_file.parents[:6]:
+        cand = parent / "data"
+        if cand.is_dir():
+            return cand.resolve()
+    if (Path.cwd() / "data").is_dir():
+        return (Path.cwd() / "data").resolve()
+    raise FileNotFoundError("Could not find a 'data' directory (looked next to backtest_engine and in cwd).")
+
+
+def get_data_path(fname: str) -> Path:
+    """
+    Exact file inside the data directory. Raises FileNotFoundError if it does not exist.
+    Prefer catalog.DataCatalog (lookup by symbol / interval / time range) over hard-coded names.
+    """
+    p = find_data_dir() / fname
+    if not p.is_file():
+        raise FileNotFoundError(f"Could not find '{fname}' in {p.parent}")
+    return p
+
+
+def get_backend() -> str:
+    """Data/indicator backend: 'pandas' (default) or 'polars' (env var BT_BACKEND=polars, see pl_backend.py)."""
+    backend = os.getenv('BT_BACKEND', 'pandas').strip().lower()
+    if backend not in ('pandas', 'polars'):
+        raise ValueError(f"BT_BACKEND must be 'pandas' or 'polars', got '{backend}'")
+    return backend
+
+
+# Internal time representation: UTC (tz-aware DatetimeIndex = int64 epoch under the hood, int64
+# epoch-ms on disk). Local time is only applied when printing / exporting, see to_display_tz().
+DISPLAY_TZ = 'Asia/Ho_Chi_Minh'
+
+
+def to_epoch_ms(idx) -> np.ndarray:
+    """DatetimeIndex / datetime Series -> int64 epoch-ms array (naive values are taken as UTC)."""
+    idx = pd.DatetimeIndex(idx)
+    return idx.as_unit('ms').asi8
+
+
+def to_display_tz(df: pd.DataFrame, tz: str = DISPLAY_TZ) -> pd.DataFrame:
+    """Copy of df with its DatetimeIndex and tz-aware datetime columns converted to local time for export."""
+    out = df.copy()
+    if isinstance(out.index, pd.DatetimeIndex) and out.index.tz is not None:
+        out.index = out.index.tz_convert(tz)
+    for c in out.columns:
+        if isinstance(out[c].dtype, pd.DatetimeTZDtype):
+            out[c] = out[c].dt.tz_convert(tz)
+    return out
+
+
+# Kline CSV columns with a fixed dtype (lower-case names, as written by get_history_1.py)
+OHLC_DTYPES = {
+    'open': 'float64', 'high': 'float64', 'low': 'float64', 'close': 'float64',
+    'volume': 'float64', 'quote_asset_volume': 'float64',
+    'taker_buy_base': 'float64', 'taker_buy_quote': 'float64',
+    'num_trades': 'int64',
+}
+
+_TS_FORMATS = ('%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M:%S')
+
+
+def _parse_open_time(col: pd.Series) -> pd.Series:
+    """
+    open_time column -> datetime.
+    - already datetime: returned as-is
+    - integer: epoch milliseconds (Binance raw format)
+    - string: try the fixed formats written by our downloader first, generic parser last
+    """
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    if pd.api.types.is_integer_dtype(col):
+        return pd.to_datetime(col, unit='ms', utc=True)
+    if len(col) and isinstance(col.iloc[0], str) and col.iloc[0][-6:-5] in ('+', '-') and col.iloc[0][-3:-2] == ':':
+        # '2025-10-01 00:00:00+07:00': pandas parses per-row offsets slowly, so when the whole
+        # column shares one offset parse the naive part and attach the offset once
+        suffix = col.iloc[0][-6:]
+        if col.str.endswith(suffix).all():
+            try:
+                naive = pd.to_datetime(col.str.slice(0, -6), format=_TS_FORMATS[1])
+                return naive.dt.tz_localize(pd.Timestamp('2000-01-01 00:00:00' + suffix).tz)
+            except ValueError:
+                pass
+    for fmt in _TS_FORMATS:
+        try:
+            return pd.to_datetime(col, format=fmt)
+        except (ValueError, TypeError):
+            continue
+    return pd.to_datetime(col, errors='coerce')
+
+
+def _finalize_index(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Sort / floor the DatetimeIndex only when needed (already-clean data is left untouched)."""
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
+    step = pd.Timedelta(to_offset(timeframe)).value
+    ns = df.index.as_unit('ns').asi8
+    if len(ns) and (ns % step).any():
+        # Floor index theo timeframe
+        df.index = df.index.floor(timeframe)
+    return df
+
+
+def clean_ohlc(df_raw: pd.DataFrame, timeframe: str = '1min') -> pd.DataFrame:
+    """
+    Chuẩn hoá OHLC cho mọi khung thời gian:
+    timeframe ví dụ: '1min', '5min', '15min', '30min', '1h', '4h'
+    """
+    df = df_raw.rename(columns=str.lower)
+
+    # Convert open_time -> datetime
+    open_time = _parse_open_time(df['open_time'])
+    if open_time.isna().any():
+        keep = open_time.notna()
+        df, open_time = df[keep], open_time[keep]
+
+    # Set index (tz-aware input is normalised to UTC: metadata only, no per-row work)
+    df = df.drop(columns='open_time')
+    df.index = pd.DatetimeIndex(open_time, name='open_time')
+    if df.index.tz is not None:
+        df.index = df.index.tz_convert('UTC')
+
+    return _finalize_index(df, timeframe)
+
+
+def read_ohlc_csv(path, timeframe: str = '1min', columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Fast path for `clean_ohlc(pd.read_csv(path))`.
+    Reads with the pyarrow CSV engine, declares OHLCV dtypes up front and lets
+    pyarrow parse open_time natively (ISO strings with offset, or int epoch-ms).
+    columns: optional subset of (lower-case) columns to load besides open_time.
+    Falls back to pandas' C parser if pyarrow is not installed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        header = f.readline().strip().split(',')
+    names = {h.lower(): h for h in header}
+    if 'open_time' not in names:
+        raise ValueError(f"{path}: missing 'open_time' column")
+
+    wanted = [c for c in names if c != 'open_time'] if columns is None else [c.lower() for c in columns]
+    include = [names['open_time']] + [names[c] for c in wanted if c in names]
+
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        dtypes = {names[c]: OHLC_DTYPES[c] for c in wanted if c in names and c in OHLC_DTYPES}
+        return clean_ohlc(pd.read_csv(path, usecols=include, dtype=dtypes), timeframe=timeframe)
+
+    column_types = {names[c]: pa.from_numpy_dtype(np.dtype(OHLC_DTYPES[c]))
+                    for c in wanted if c in names and c in OHLC_DTYPES}
+    table = pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(column_types=column_types, include_columns=include),
+    )
+    return clean_ohlc(table.to_pandas(), timeframe=timeframe)
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content fingerprint of an OHLCV frame (timestamps + OHLCV values).
+    Used as cache key for derived data (MTF bars, indicators); changes whenever the data does.
+    """
+    import hashlib
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(df.index.as_unit('ns').asi8).tobytes())
+    cols = {c.lower(): c for c in df.columns}
+    for c in ('open', 'high', 'low', 'close', 'volume'):
+        if c in cols:
+            h.update(c.encode())
+            h.update(np.ascontiguousarray(df[cols[c]].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _normalize_tf_alias(tf: str) -> str:
+    """
+    Convert deprecated freq formats → new recommended ones.
+    '15T' → '15min'
+    '1H'  → '1h'
+    """
+    tf = str(tf).lower().strip()
+
+    # minute formats
+    if tf.endswith("t"):
+        return tf[:-1] + "min"
+    if "min" in tf:
+        return tf
+
+    # hour
+    if tf.endswith("h"):
+        return tf
+    if tf.endswith("hour"):
+        return tf.replace("hour", "h")
+
+    # day
+    if tf.endswith("d"):
+        return tf
+    if tf.endswith("day"):
+        return tf.replace("day", "d")
+
+    return tf
+
+
+def resample_data11(df_1m: pd.DataFrame, tf: str) -> pd.DataFrame:
+
+    """
+    Resample OHLCV từ 1 phút theo chuẩn Binance Futures.
+    - Các timeframe <= 1H dùng mốc 00:00 (KHÔNG offset)
+    - Các timeframe >= 4H và 1D, 1W, 1M dùng mốc 00:00 UTC => offset 7H (giờ VN)
+    1m '1T'
+
+    3m '3T'
+
+    5m '5T'
+
+    15m '15T'
+
+    30m '30T'
+
+    1h '1H'
+
+    2h '2H'
+    4h '4H'
+
+    6h '6H'
+
+    8h '8H'
+
+    12h '12H'
+
+    1D '1D'
+
+    1W '1W'
+
+    1M '1M'
+    Yêu cầu: df_1m.index phải là DatetimeIndex (tz-aware hoặc naive đều được).
+    """
+
+    """
+    Resample 1m -> tf for Binance-style CSV. 
+    return_label: 'left' to return start-of-interval timestamps (common in Binance CSV),
+                  'right' to return end-of-interval timestamps.
+    """
+    tf_norm = tf.upper().replace('M','T')  # 15m -> 15T
+    # decide offset for >=4H / 1D per Binance
+    no_offset = ['1T','3T','5T','15T','30T','1H','2H']
+    offset = None if tf_norm in no_offset else '7H'
+
+    if offset is None:
+        ohlc = df_1m['close'].resample(tf_norm, label='right', closed='right').ohlc()
+        vol  = df_1m['volume'].resample(tf_norm, label='right', closed='right').sum()
+    else:
+        ohlc = df_1m['close'].resample(tf_norm, label='right', closed='right',
+                                       origin='start_day', offset='7H').ohlc()
+        vol  = df_1m['volume'].resample(tf_norm, label='right', closed='right',
+                                        origin='start_day', offset='7H').sum()
+
+    out = pd.DataFrame(index=ohlc.index)
+    out['open'] = ohlc['open']; out['high'] = ohlc['high']
+    out['low']  = ohlc['low'];  out['close'] = ohlc['close']
+    out['volume']= vol
+
+    
+    # convert end-of-interval index -> start-of-interval index
+    # (works when above was computed with label='right')
+    period = pd.Timedelta(pd.tseries.frequencies.to_offset(tf_norm))
+    out.index = out.index - period
+
+    return out
+
+
+_MINUTE_NS = 60 * 1_000_000_000
+_DAY_NS = 24 * 60 * _MINUTE_NS
+_WEEK_ORIGIN_NS = 4 * _DAY_NS   # 1970-01-05 is a Monday (Binance weeks start Monday 00:00 UTC)
+
+
+def _tf_to_ns(tf: str):
+    """
+    Parse a timeframe string -> (period_ns, is_month).
+    Accepts Binance style ('1m','15m','1h','4h','1d','1w','1M') and pandas style ('15T','15min','1H','1D').
+    Following Binance, an upper-case trailing 'M' means months; 'm' / 'min' / 'T' mean minutes.
+    """
+    s = str(tf).strip()
+    if s.endswith('M') and not s.upper().endswith('MIN'):
+        n = int(s[:-1] or 1)
+        return n, True
+    s = s.lower()
+    for suffix, unit in (('min', _MINUTE_NS), ('t', _MINUTE_NS), ('m', _MINUTE_NS),
+                         ('h', 60 * _MINUTE_NS), ('d', _DAY_NS), ('w', 7 * _DAY_NS)):
+        if s.endswith(suffix):
+            return int(s[:-len(suffix)] or 1) * unit, False
+    raise ValueError(f"Unsupported timeframe: {tf}")
+
+
+def _bucket_starts(ts_ns: np.ndarray, tf: str, origin_ns: int = 0) -> np.ndarray:
+    """
+    Start (ns) of the `tf` bar each timestamp falls into.
+    Bars are left-closed and anchored at `origin_ns` (0 = 1970-01-01 00:00 UTC, the Binance anchor).
+    """
+    period, is_month = _tf_to_ns(tf)
+    if is_month:
+        months = (ts_ns - origin_ns).astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+        months -= months % period
+        return months.astype('datetime64[M]').astype('datetime64[ns]').astype(np.int64) + origin_ns
+    if period % (7 * _DAY_NS) == 0:
+        origin_ns += _WEEK_ORIGIN_NS
+    return ts_ns - (ts_ns - origin_ns) % period
+
+
+def _resample_ohlcv_arrays(ts_ns, o, h, l, c, v, tf: str, origin_ns: int = 0):
+    """
+    Aggregate sorted OHLCV arrays into `tf` bars in one pass.
+    Groups are contiguous runs of equal bucket start, so every output column is a single
+    take / ufunc.reduceat over the input arrays. Only non-empty bars are returned.
+    Returns (bar_start_ns, open, high, low, close, volume).
+    """
+    keys = _bucket_starts(ts_ns, tf, origin_ns)
+    if len(keys) == 0:
+        empty = np.empty(0)
+        return keys, empty, empty, empty, empty, empty
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return (
+        keys[starts],
+        o[starts],
+        np.fmax.reduceat(h, starts),
+        np.fmin.reduceat(l, starts),
+        c[ends],
+        np.add.reduceat(v, starts),
+    )
+
+
+def resample_data(
+    df_1m: pd.DataFrame,
+    tf: str,
+    day_start_hour: int = 7,
+    match_open_with_1m: bool = True,
+    volume_col_candidates: Optional[list] = None
+) -> pd.DataFrame:
+    """
+    Resample 1m OHLCV -> timeframe `tf` following Binance conventions.
+    - df_1m: must have DatetimeIndex and contain at least 'close' (case-insensitive).
+             'open','high','low' are used when present (true OHLC), else derived from close.
+    - tf: string like '15m','15T','30m','1H','4h','1D','1W','1M' (upper-case M = month).
+    - day_start_hour: local hour that corresponds to 00:00 UTC (7 for UTC+7 VN). Only used for
+      naive indexes; tz-aware indexes are anchored to 00:00 UTC directly.
+    - match_open_with_1m: kept for backward compatibility; open is always the first 1m open now.
+    - volume_col_candidates: list of possible volume column names to detect (defaults to ['volume','vol'])
+    Returns DataFrame indexed by bar start (like Binance CSV open_time) with columns:
+    ['open','high','low','close','volume']. Bars without any 1m data are not emitted.
+    """
+
+    if volume_col_candidates is None:
+        volume_col_candidates = ['volume', 'vol']
+
+    if not isinstance(df_1m.index, pd.DatetimeIndex):
+        raise TypeError("df_1m.index must be a DatetimeIndex")
+
+    cols = {c.lower(): c for c in df_1m.columns}
+    if 'close' not in cols:
+        raise TypeError("df_1m must contain 'close' column (case-insensitive)")
+
+    if not df_1m.index.is_monotonic_increasing:
+        df_1m = df_1m.sort_index()
+
+    close = df_1m[cols['close']].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(close)
+
+    def _col(name, fallback):
+        return df_1m[cols[name]].to_numpy(dtype=np.float64) if name in cols else fallback
+
+    o = _col('open', close)
+    h = _col('high', close)
+    l = _col('low', close)
+    vc = next((cols[c] for c in volume_col_candidates if c in cols), None)
+    v = np.nan_to_num(df_1m[vc].to_numpy(dtype=np.float64)) if vc is not None else np.zeros_like(close)
+
+    idx = df_1m.index
+    ts_ns = idx.as_unit('ns').asi8        # UTC epoch ns for tz-aware, wall-clock ns for naive
+    origin = 0 if idx.tz is not None else day_start_hour * 60 * _MINUTE_NS
+    if not valid.all():
+        ts_ns, o, h, l, close, v = ts_ns[valid], o[valid], h[valid], l[valid], close[valid], v[valid]
+
+    bar_ns, bo, bh, bl, bc, bv = _resample_ohlcv_arrays(ts_ns, o, h, l, close, v, tf, origin)
+
+    out_idx = pd.DatetimeIndex(bar_ns.astype('datetime64[ns]'), name='open_time')
+    if idx.tz is not None:
+        out_idx = out_idx.tz_localize('UTC').tz_convert(idx.tz)
+    return pd.DataFrame({'open': bo, 'high': bh, 'low': bl, 'close': bc, 'volume': bv}, index=out_idx)
+
+# -----------------------
+# Example usage:
+# res_4h = resample_data(df_1m, '4h')    # bars start 07:00, 11:00, ... VN time (00:00 UTC anchor)
+# res_15m = resample_data(df_1m, '15m')
@@ -0,0 +1,113 @@
+# pipeline.py
+"""
+Batched multi-strategy signal generation with shared feature computation.
+1. load the selected plugins (registry.py) and collect what they declare:
+   TIMEFRAMES and required_features(params) -> [(tf, indicator_cache.spec(...)), ...]
+2. build the MTF pyramid once for the union of timeframes, fingerprint each level once
+3. compute every distinct feature once (indicator_cache: also reused by later runs / sweeps)
+4. fan the shared bars + arrays out to every strategy: generate(..., mtf=mtf, features=features)
+
+    from pipeline import generate_signals_multi
+    out = generate_signals_multi(df_1m, ['boll_vol', 'm15_rsi', ('boll_vol', {'bb_std': 2.5})])
+    out['boll_vol'], out['m15_rsi'], out['boll_vol[bb_std=2.5]']
+
+Strategies without required_features() still run; they just compute their own indicators.
+"""
+import time
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import pandas as pd
+
+import indicator_cache
+import registry
+from ohlc_data import dataset_fingerprint
+from mtf import build_mtf_pyramid
+
+StrategySel = Union[str, Tuple[str, dict]]
+
+
+def _label(name: str, params: Optional[dict]) -> str:
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in sorted(params.items()))}]"
+
+
+def _normalize(strategies: Union[Iterable[StrategySel], Dict[str, StrategySel]]) -> Dict[str, Tuple[str, dict]]:
+    """-> {label: (plugin name, params)} from names, (name, params) pairs or an explicit {label: ...} dict."""
+    items = strategies.items() if isinstance(strategies, dict) else ((None, s) for s in strategies)
+    out = {}
+    for label, sel in items:
+        name, params = (sel, {}) if isinstance(sel, str) else (sel[0], dict(sel[1] or {}))
+        out[label or _label(name, params)] = (name, params)
+    return out
+
+
+def collect_requirements(selection: Dict[str, Tuple[str, dict]]):
+    """Union of timeframes and distinct (tf, spec) features over the selected strategies."""
+    timeframes, features = {'1m'}, {}
+    for name, params in selection.values():
+        timeframes.update(registry.timeframes_of(name))
+        req = getattr(registry.load(name), 'required_features', None)
+        for tf, spec in (req(params) if req is not None else ()):
+            features.setdefault((tf, spec), None)
+            timeframes.add(tf)
+    return sorted(timeframes), list(features)
+
+
+def compute_features(mtf: Dict[str, pd.DataFrame], feature_keys) -> dict:
+    """{(tf, spec): result}, each computed once; every timeframe is fingerprinted once."""
+    fingerprints = {}
+    out = {}
+    for tf, spec in feature_keys:
+        if tf not in fingerprints:
+            fingerprints[tf] = dataset_fingerprint(mtf[tf])
+        out[(tf, spec)] = indicator_cache.compute(mtf[tf], tf, spec, fingerprint=fingerprints[tf])
+    return out
+
+
+def generate_signals_multi(df_1m: pd.DataFrame,
+                           strategies: Union[Iterable[StrategySel], Dict[str, StrategySel]],
+                           base_risk_pct: float = 0.01,
+                           mtf: Optional[dict] = None,
+                           verbose: bool = False) -> Dict[str, pd.DataFrame]:
+    """
+    Run several strategies (or parameter variants of one) on the same 1m history.
+    strategies: ['boll_vol', ('m15_rsi', {'buy_level': 20}), ...] or {label: name | (name, params)}
+    Returns {label: signals DataFrame} (same frames strategy.generate_signals returns).
+    """
+    t0 = time.perf_counter()
+    selection = _normalize(strategies)
+    timeframes, feature_keys = collect_requirements(selection)
+
+    if mtf is None or any(tf not in mtf for tf in timeframes if tf != '1m'):
+        built = build_mtf_pyramid(df_1m, timeframes=timeframes)
+        mtf = {**built, **(mtf or {})}
+    t1 = time.perf_counter()
+    features = compute_features(mtf, feature_keys)
+    t2 = time.perf_counter()
+
+    out = {}
+    for label, (name, params) in selection.items():
+        plugin = registry.load(name)
+        kwargs = {'mtf': mtf}
+        if params:
+            kwargs['params'] = params
+        if hasattr(plugin, 'required_features'):
+            kwargs['features'] = features
+        out[label] = plugin.generate(df_1m, base_risk_pct, **kwargs)
+    if verbose:
+        print(f"⏱ pipeline: {len(selection)} strategies, {len(timeframes)} timeframes, {len(feature_keys)} features | "
+              f"MTF {1000 * (t1 - t0):.1f} ms, features {1000 * (t2 - t1):.1f} ms, "
+              f"signals {1000 * (time.perf_counter() - t2):.1f} ms")
+    return out
+
+
+if __name__ == '__main__':
+    import sys
+    from catalog import find_dataset
+    from mtf import load_mtf
+
+    names = sys.argv[1].split(',') if len(sys.argv) > 1 else registry.available()
+    df_1m, mtf = load_mtf(find_dataset('BTCUSDT', '1m')['path'])
+    for label, sig in generate_signals_multi(df_1m, names, mtf=mtf, verbose=True).items():
+        print(f"{label:<30} {sig['signal_side'].count():>5} signals")
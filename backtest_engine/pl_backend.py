@@ -0,0 +1,256 @@
+# pl_backend.py
+"""
+Optional Polars execution backend for the data / indicator pipeline.
+pandas stays the default; select this one with env var BT_BACKEND=polars (see init.get_backend).
+
+- scan_klines(): lazy CSV scan over one or many kline files, time-range filter pushed into the scan
+- clean_ohlc_pl(): same contract as init.clean_ohlc (lower-case cols, parsed/sorted/floored open_time)
+- resample_data_pl(): Binance-anchored OHLCV resample with group_by_dynamic (multithreaded)
+- prepare_boll_vol_pl() / prepare_m15_rsi_pl(): 15m signal preparation for the two strategies
+- load_mtf_pl(): 1m load + every MTF level (counterpart of mtf.load_mtf)
+- export_csv_pl(): CSV export used by bt_main
+Every public function takes / returns pandas objects at the boundary so the engine is unchanged;
+check_backend_parity.py compares both backends.
+"""
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # polars is optional
+    pl = None
+
+from ohlc_data import OHLC_DTYPES, _tf_to_ns
+
+_PL_DTYPES = {'float64': 'Float64', 'int64': 'Int64'}
+_TS_FORMAT_TZ = '%Y-%m-%d %H:%M:%S%z'
+_TS_FORMAT_NAIVE = '%Y-%m-%d %H:%M:%S'     # no offset -> read as UTC
+
+
+def _require_polars():
+    if pl is None:
+        raise ImportError("BT_BACKEND=polars cần cài polars: pip install polars")
+
+
+def _tf_to_polars(tf: str) -> str:
+    """'15m' / '15min' / '1H' / '1D' / '1M' -> polars duration string ('15m', '1h', '1d', '1mo')."""
+    period, is_month = _tf_to_ns(tf)
+    if is_month:
+        return f'{period}mo'
+    minutes = period // 60_000_000_000
+    if minutes % (7 * 1440) == 0:
+        return f'{minutes // (7 * 1440)}w'
+    if minutes % 1440 == 0:
+        return f'{minutes // 1440}d'
+    if minutes % 60 == 0:
+        return f'{minutes // 60}h'
+    return f'{minutes}m'
+
+
+def _open_time_expr(dtype, name: str = 'open_time') -> 'pl.Expr':
+    """
+    open_time / close_time (raw CSV column) -> Datetime[ms, UTC].
+    Strings: '...%z' (our downloader), then naive '%Y-%m-%d %H:%M:%S' taken as UTC, then polars'
+    format inference; whatever still fails is null (counted by clean_ohlc_pl).
+    """
+    col = pl.col(name)
+    if dtype.is_integer():
+        return pl.from_epoch(col, time_unit='ms').dt.replace_time_zone('UTC')
+    if isinstance(dtype, pl.Datetime):
+        return col if dtype.time_zone else col.dt.replace_time_zone('UTC')
+    return pl.coalesce(
+        col.str.to_datetime(_TS_FORMAT_TZ, time_unit='ms', time_zone='UTC', strict=False),
+        col.str.to_datetime(_TS_FORMAT_NAIVE, time_unit='ms', strict=False).dt.replace_time_zone('UTC'),
+        col.str.to_datetime(time_unit='ms', time_zone='UTC', strict=False),
+    )
+
+
+def scan_klines(paths: Union[str, Sequence[str]], start=None, end=None) -> 'pl.LazyFrame':
+    """
+    Lazy scan of kline CSV(s) -> LazyFrame with lower-case columns and open_time as Datetime(UTC).
+    start / end (inclusive, anything pd.Timestamp accepts) become a filter that polars pushes down
+    into the scan; for int epoch-ms stores it is evaluated on the raw column while reading.
+    """
+    _require_polars()
+    if isinstance(paths, (str, bytes)) or not isinstance(paths, Sequence):
+        paths = [str(paths)]
+    paths = [str(p) for p in paths]
+
+    with open(paths[0], 'r', encoding='utf-8') as f:
+        header = f.readline().strip().split(',')
+    overrides = {h: getattr(pl, _PL_DTYPES[OHLC_DTYPES[h.lower()]])
+                 for h in header if h.lower() in OHLC_DTYPES}
+    lf = pl.scan_csv(paths, schema_overrides=overrides)
+    lf = lf.rename({h: h.lower() for h in header if h != h.lower()})
+
+    schema = lf.collect_schema()
+    raw_dtype = schema['open_time']
+    if 'close_time' in schema:
+        lf = lf.with_columns(_open_time_expr(schema['close_time'], 'close_time'))
+    start_ms = None if start is None else _to_ms(start)
+    end_ms = None if end is None else _to_ms(end)
+    if raw_dtype.is_integer():
+        # filter on the raw int column -> evaluated inside the CSV reader
+        if start_ms is not None:
+            lf = lf.filter(pl.col('open_time') >= start_ms)
+        if end_ms is not None:
+            lf = lf.filter(pl.col('open_time') <= end_ms)
+        return lf.with_columns(_open_time_expr(raw_dtype))
+
+    lf = lf.with_columns(_open_time_expr(raw_dtype))
+    if start_ms is not None:
+        lf = lf.filter(pl.col('open_time') >= pd.Timestamp(start_ms, unit='ms', tz='UTC'))
+    if end_ms is not None:
+        lf = lf.filter(pl.col('open_time') <= pd.Timestamp(end_ms, unit='ms', tz='UTC'))
+    return lf
+
+
+def _to_ms(t) -> int:
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return int(ts.value // 1_000_000)
+
+
+def clean_ohlc_pl(data, timeframe: str = '1min', tz: Optional[str] = None) -> pd.DataFrame:
+    """
+    Polars version of init.clean_ohlc.
+    data: pandas DataFrame (raw CSV frame), polars DataFrame/LazyFrame, or a CSV path.
+    Returns a pandas DataFrame indexed by open_time (tz-aware; converted to `tz` when given).
+    """
+    _require_polars()
+    if isinstance(data, pd.DataFrame):
+        lf = pl.from_pandas(data).lazy()
+        lf = lf.rename({c: c.lower() for c in lf.collect_schema().names() if c != c.lower()})
+        lf = lf.with_columns(_open_time_expr(lf.collect_schema()['open_time']))
+    elif isinstance(data, pl.DataFrame):
+        lf = data.lazy()
+    elif isinstance(data, pl.LazyFrame):
+        lf = data
+    else:
+        lf = scan_klines(data)
+
+    df = (
+        lf.with_columns(pl.col('open_time').dt.truncate(_tf_to_polars(timeframe)))
+          .sort('open_time')
+          .collect()
+    )
+    bad = df['open_time'].null_count()
+    if bad:
+        print(f"⚠️ clean_ohlc_pl: bỏ {bad} dòng open_time không đọc được")
+        df = df.drop_nulls('open_time')
+    return _to_pandas(df, tz)
+
+
+def _to_pandas(df: 'pl.DataFrame', tz: Optional[str]) -> pd.DataFrame:
+    out = df.to_pandas().set_index('open_time')
+    if tz is not None:
+        out.index = out.index.tz_convert(tz)
+    out.index = out.index.as_unit('ns')
+    return out
+
+
+def resample_data_pl(df_1m, tf: str, tz: Optional[str] = None) -> pd.DataFrame:
+    """
+    Polars version of init.resample_data: true OHLCV bars, left-closed, anchored at 00:00 UTC
+    (Binance convention = 07:00 VN), weeks start Monday, '1M' = calendar month.
+    df_1m: pandas (tz-aware DatetimeIndex) or polars frame with an 'open_time' column.
+    Returns pandas indexed by bar start; tz defaults to the input index tz.
+    """
+    _require_polars()
+    if isinstance(df_1m, pd.DataFrame):
+        if tz is None:
+            tz = str(df_1m.index.tz) if df_1m.index.tz is not None else None
+        cols = {c.lower(): c for c in df_1m.columns}
+        src = pl.from_pandas(df_1m[[cols[c] for c in ('open', 'high', 'low', 'close', 'volume') if c in cols]]
+                             .rename(columns=str.lower)
+                             .rename_axis('open_time')
+                             .reset_index())
+    else:
+        src = df_1m
+    lf = src.lazy().with_columns(pl.col('open_time').dt.convert_time_zone('UTC'))
+    if 'open' not in lf.collect_schema().names():
+        lf = lf.with_columns(open=pl.col('close'), high=pl.col('close'), low=pl.col('close'))
+    if 'volume' not in lf.collect_schema().names():
+        lf = lf.with_columns(volume=pl.lit(0.0))
+
+    out = (
+        lf.drop_nulls('close')
+          .sort('open_time')
+          .group_by_dynamic('open_time', every=_tf_to_polars(tf), closed='left', label='left')
+          .agg(
+              pl.col('open').first(),
+              pl.col('high').max(),
+              pl.col('low').min(),
+              pl.col('close').last(),
+              pl.col('volume').fill_null(0.0).sum(),
+          )
+          .collect()
+    )
+    return _to_pandas(out, tz)
+
+
+def load_mtf_pl(path, timeframes: Sequence[str] = ('1m', '3m', '5m', '15m', '30m', '1h', '4h', '1d'),
+                tz: str = 'UTC'):
+    """Polars counterpart of mtf.load_mtf: (df_1m, {tf: df}) with every tf resampled from the 1m scan."""
+    _require_polars()
+    base = clean_ohlc_pl(scan_klines(path), timeframe='1min', tz=tz)
+    frames = {tf: (base if tf == '1m' else resample_data_pl(base, tf)) for tf in timeframes}
+    return base, frames
+
+
+def prepare_boll_vol_pl(df_15m: pd.DataFrame, bb_period: int = 20, bb_std: float = 2,
+                        vol_period: int = 20, vol_mult: float = 1.5) -> pd.DataFrame:
+    """
+    boll_vol 15m preparation in polars: BBANDS(SMA, population std) + volume MA + signal flags.
+    Same output columns as the pandas path in strategies/boll_vol.py.
+    """
+    _require_polars()
+    tz = df_15m.index.tz
+    d = pl.from_pandas(df_15m.rename_axis('open_time').reset_index())
+    if 'volume' not in d.columns:
+        d = d.with_columns(volume=pl.lit(None, dtype=pl.Float64))
+    close = pl.col('close')
+    mid = close.rolling_mean(bb_period)
+    std = close.rolling_std(bb_period, ddof=0)
+    d = d.with_columns(
+        bb_mid=mid,
+        bb_upper=mid + bb_std * std,
+        bb_lower=mid - bb_std * std,
+        vol_ma=pl.col('volume').rolling_mean(vol_period, min_samples=1),
+    ).with_columns(
+        vol_spike=(pl.col('volume') > pl.col('vol_ma') * vol_mult).fill_null(False),
+        bb_oversold=(close < pl.col('bb_lower')).fill_null(False),
+        bb_overbought=(close > pl.col('bb_upper')).fill_null(False),
+    ).with_columns(
+        signal_buy=pl.col('bb_oversold') & pl.col('vol_spike'),
+        signal_sell=pl.col('bb_overbought') & pl.col('vol_spike'),
+    )
+    return _to_pandas(d, str(tz) if tz is not None else None)
+
+
+def prepare_m15_rsi_pl(df_15m: pd.DataFrame, period: int = 14,
+                       buy_level: float = 15, sell_level: float = 80) -> pd.DataFrame:
+    """m15_rsi 15m preparation in polars: RSI (TA-Lib kernel via indicator_cache) + crossing flags."""
+    _require_polars()
+    import indicator_cache
+    tz = df_15m.index.tz
+    rsi = indicator_cache.rsi(df_15m, '15m', period=period)
+    d = pl.from_pandas(df_15m.rename_axis('open_time').reset_index())
+    d = d.with_columns(rsi14=pl.Series(rsi, nan_to_null=True)).with_columns(
+        rsi14_prev=pl.col('rsi14').shift(1),
+    ).with_columns(
+        signal_buy=((pl.col('rsi14_prev') >= buy_level) & (pl.col('rsi14') < buy_level)).fill_null(False),
+        signal_sell=((pl.col('rsi14_prev') <= sell_level) & (pl.col('rsi14') > sell_level)).fill_null(False),
+    )
+    return _to_pandas(d, str(tz) if tz is not None else None)
+
+
+def export_csv_pl(df: pd.DataFrame, path: str, index: bool = True) -> None:
+    """Write a pandas frame to CSV with polars' multithreaded writer (index becomes the first column)."""
+    _require_polars()
+    data = df.reset_index() if index else df
+    # same timestamp text as pandas.to_csv ('2025-10-01 00:00:00+07:00')
+    pl.from_pandas(data).write_csv(path, datetime_format='%Y-%m-%d %H:%M:%S%:z')
@@ -0,0 +1,70 @@
+# registry.py
+"""
+Strategy plugin registry.
+- every module in strategies/ (except common.py and _private ones) is a plugin; available()
+  lists them with pkgutil WITHOUT importing anything, so startup cost does not grow with the library
+- a plugin is imported only when selected: load('m15_rsi'), env BT_STRATEGY=m15_rsi or
+  `python bt_main.py --strategy m15_rsi`
+- plugin contract:
+    generate(df_1m, base_risk_pct=0.01, mtf=None, params=None) -> signals DataFrame
+    PARAMS = {name: default}     tunable parameters (params=... overrides them per call)
+    TIMEFRAMES = ('15m', ...)    MTF levels generate() reads from the mtf dict
+    required_features(params)    optional: [(tf, indicator_cache.spec(...))]; pipeline.py then
+                                 computes them once and passes generate(..., features={...})
+    generate(..., as_events=True)  optional: return a signal_events.SignalEvents instead
+  heavy imports (talib, ...) belong inside the functions that use them
+"""
+import importlib
+import os
+import pkgutil
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Optional
+
+STRATEGIES_DIR = Path(__file__).resolve().parent / 'strategies'
+DEFAULT_STRATEGY = 'boll_vol'
+_NOT_PLUGINS = {'common'}
+
+_LOADED: Dict[str, ModuleType] = {}
+
+
+def available() -> List[str]:
+    """Plugin names found in strategies/ (no module is imported)."""
+    return sorted(m.name for m in pkgutil.iter_modules([str(STRATEGIES_DIR)])
+                  if not m.ispkg and not m.name.startswith('_') and m.name not in _NOT_PLUGINS)
+
+
+def selected(name: Optional[str] = None) -> str:
+    """Explicit name > env BT_STRATEGY > DEFAULT_STRATEGY."""
+    return (name or os.getenv('BT_STRATEGY', '') or DEFAULT_STRATEGY).strip()
+
+
+def load(name: Optional[str] = None) -> ModuleType:
+    """Import (once) and validate the selected plugin."""
+    name = selected(name)
+    mod = _LOADED.get(name)
+    if mod is not None:
+        return mod
+    if name not in available():
+        raise KeyError(f"Strategy '{name}' không có trong {STRATEGIES_DIR} (có: {', '.join(available())})")
+    mod = importlib.import_module(f'strategies.{name}')
+    if not callable(getattr(mod, 'generate', None)):
+        raise TypeError(f"strategies/{name}.py thiếu hàm generate(df_1m, base_risk_pct, mtf, params)")
+    _LOADED[name] = mod
+    return mod
+
+
+def params_of(name: Optional[str] = None) -> dict:
+    """Declared PARAMS of a plugin (copy; {} when it declares none)."""
+    return dict(getattr(load(name), 'PARAMS', {}))
+
+
+def timeframes_of(name: Optional[str] = None) -> tuple:
+    """Declared TIMEFRAMES of a plugin ('1m' is always included)."""
+    tfs = tuple(getattr(load(name), 'TIMEFRAMES', ()))
+    return tfs if '1m' in tfs else ('1m',) + tfs
+
+
+if __name__ == '__main__':
+    for n in available():
+        print(f"{n:<12} TIMEFRAMES={timeframes_of(n)}  PARAMS={params_of(n)}")
@@ -0,0 +1,149 @@
+# signal_events.py
+"""
+Sparse event-array signal format.
+A strategy's signals are a handful of events on a long 1m history, so instead of a DataFrame
+with object 'signal_side' / 'note' columns (hash lookup + .loc per bar in the engine) they can be
+kept as parallel arrays sorted by bar:
+    ts    int64    entry bar open time (ns since epoch, UTC)
+    pos   int64    position of that bar in the 1m index the events were aligned to
+    side  int8     +1 BUY, -1 SELL
+    tp    float64  take-profit price (NaN = none)
+    sl    float64  stop-loss price (NaN = none)
+    risk  float32  risk_pct (NaN = none)
+    size  float32  explicit size (NaN = none)
+tp / sl stay float64: float32 would move BTC-sized prices by up to ~0.01 and change fills.
+The engine walks the events with a cursor alongside the bar loop (engine.run_backtest accepts
+either form); from_frame / to_frame convert to and from the DataFrame form strategies return.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+SIDE_CODES = {'BUY': 1, 'SELL': -1}
+SIDE_NAMES = {1: 'BUY', -1: 'SELL'}
+
+
+def _ts_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_convert('UTC')
+    return idx.as_unit('ns').asi8
+
+
+def _match(bar_ts: np.ndarray, ts: np.ndarray):
+    """(positions of ts in the sorted bar_ts, mask of ts that are bars)."""
+    pos = np.searchsorted(bar_ts, ts, side='left')
+    if not len(bar_ts):
+        return pos, np.zeros(len(ts), dtype=bool)
+    return pos, (pos < len(bar_ts)) & (bar_ts[np.minimum(pos, len(bar_ts) - 1)] == ts)
+
+
+@dataclass
+class SignalEvents:
+    ts: np.ndarray
+    pos: np.ndarray
+    side: np.ndarray
+    tp: np.ndarray
+    sl: np.ndarray
+    risk: np.ndarray
+    size: np.ndarray
+    note: Optional[np.ndarray] = None      # optional labels, only kept for to_frame()
+
+    def __len__(self):
+        return len(self.pos)
+
+    # ---------- construction ----------
+    @classmethod
+    def from_arrays(cls, index: pd.DatetimeIndex, pos, is_buy, tp, sl, risk_pct=np.nan, size=np.nan,
+                    note=None) -> 'SignalEvents':
+        """Events from bar positions into `index` (what vectorized strategies already compute)."""
+        pos = np.asarray(pos, dtype=np.int64)
+        n = len(pos)
+        order = np.argsort(pos, kind='stable')
+        full = lambda v, dt: np.broadcast_to(np.asarray(v, dtype=dt), (n,))[order].copy()
+        return cls(ts=_ts_ns(index)[pos][order], pos=pos[order],
+                   side=np.where(np.asarray(is_buy, dtype=bool), 1, -1).astype(np.int8)[order],
+                   tp=full(tp, np.float64), sl=full(sl, np.float64),
+                   risk=full(risk_pct, np.float32), size=full(size, np.float32),
+                   note=None if note is None else np.broadcast_to(np.asarray(note, dtype=object), (n,))[order].copy())
+
+    @classmethod
+    def from_frame(cls, signals: pd.DataFrame, index: pd.DatetimeIndex) -> 'SignalEvents':
+        """
+        DataFrame form (index = signal timestamps, 'signal_side' + optional size / risk_pct /
+        tp_price / sl_price / note) -> events aligned to the bar `index`. Rows without a BUY/SELL
+        side or whose timestamp is not a bar of `index` are dropped, as the engine ignores them.
+        """
+        if signals is None or len(signals) == 0:
+            return cls.empty(index)
+        side = signals['signal_side'].astype(object).map(
+            lambda s: SIDE_CODES.get(str(s).upper(), 0) if pd.notna(s) else 0).to_numpy(dtype=np.int8)
+        keep = side != 0
+        signals, side = signals[keep], side[keep]
+        sig_ts = _ts_ns(signals.index)
+        pos, on_bar = _match(_ts_ns(index), sig_ts)
+
+        def col(name, dt):
+            if name not in signals.columns:
+                return np.full(int(on_bar.sum()), np.nan, dtype=dt)
+            return pd.to_numeric(signals[name], errors='coerce').to_numpy(dtype=np.float64)[on_bar].astype(dt)
+
+        note = signals['note'].to_numpy(dtype=object)[on_bar] if 'note' in signals.columns else None
+        ev = cls(ts=sig_ts[on_bar], pos=pos[on_bar].astype(np.int64), side=side[on_bar],
+                 tp=col('tp_price', np.float64), sl=col('sl_price', np.float64),
+                 risk=col('risk_pct', np.float32), size=col('size', np.float32), note=note)
+        return ev.sorted()
+
+    @classmethod
+    def empty(cls, index: pd.DatetimeIndex = None) -> 'SignalEvents':
+        e = np.empty(0)
+        return cls(ts=e.astype(np.int64), pos=e.astype(np.int64), side=e.astype(np.int8), tp=e.copy(),
+                   sl=e.copy(), risk=e.astype(np.float32), size=e.astype(np.float32))
+
+    # ---------- transforms ----------
+    def sorted(self) -> 'SignalEvents':
+        """Sort by bar; for several events on one bar the last one wins (as DataFrame .loc assignment did)."""
+        order = np.argsort(self.pos, kind='stable')
+        pos = self.pos[order]
+        last = np.r_[pos[1:] != pos[:-1], True] if len(pos) else np.zeros(0, dtype=bool)
+        sel = order[last]
+        return SignalEvents(ts=self.ts[sel], pos=self.pos[sel], side=self.side[sel], tp=self.tp[sel],
+                            sl=self.sl[sel], risk=self.risk[sel], size=self.size[sel],
+                            note=None if self.note is None else self.note[sel])
+
+    def align(self, index: pd.DatetimeIndex) -> 'SignalEvents':
+        """Recompute `pos` against another bar index (events on missing bars are dropped)."""
+        pos, ok = _match(_ts_ns(index), self.ts)
+        return SignalEvents(ts=self.ts[ok], pos=pos[ok].astype(np.int64), side=self.side[ok], tp=self.tp[ok],
+                            sl=self.sl[ok], risk=self.risk[ok], size=self.size[ok],
+                            note=None if self.note is None else self.note[ok])
+
+    def to_frame(self, tz: str = 'UTC') -> pd.DataFrame:
+        """Back to the DataFrame form strategies return (index 'timestamp')."""
+        idx = pd.DatetimeIndex(pd.to_datetime(self.ts, unit='ns', utc=True), name='timestamp')
+        if tz is not None and tz != 'UTC':
+            idx = idx.tz_convert(tz)
+        return pd.DataFrame({
+            'signal_side': np.where(self.side > 0, 'BUY', 'SELL').astype(object),
+            'note': self.note if self.note is not None else np.full(len(self), None, dtype=object),
+            'size': self.size.astype(np.float64),
+            'risk_pct': self.risk.astype(np.float64),
+            'tp_price': self.tp,
+            'sl_price': self.sl,
+        }, index=idx)
+
+    def event(self, k: int) -> dict:
+        """Event k as the mapping the engine reads (same keys as a DataFrame signal row)."""
+        return {'signal_side': SIDE_NAMES[int(self.side[k])], 'size': float(self.size[k]),
+                'risk_pct': float(self.risk[k]), 'tp_price': float(self.tp[k]), 'sl_price': float(self.sl[k])}
+
+
+def as_events(signals, index: pd.DatetimeIndex) -> Optional[SignalEvents]:
+    """Engine helper: None / DataFrame / SignalEvents -> SignalEvents aligned to `index` (or None)."""
+    if signals is None:
+        return None
+    if isinstance(signals, SignalEvents):
+        return signals.align(index)
+    return SignalEvents.from_frame(signals, index)
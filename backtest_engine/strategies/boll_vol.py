@@ -1,17 +1,83 @@
 import pandas as pd
 import numpy as np
-import talib
 from typing import List, Optional
 # from common import *
 from strategies.common import *
+from signal_events import SignalEvents
+
+
+SYMBOL = "BTCUSDT"   # 15m fallback data is looked up in the data catalog by symbol + range
+
+# plugin metadata (registry.py): tunable parameters and the MTF levels generate() reads
+TIMEFRAMES = ('15m',)
+PARAMS = {
+    'bb_period': 20,
+    'bb_std': 2,
+    'vol_period': 20,
+    'vol_mult': 1.5,               # volume phải lớn hơn trung bình * vol_mult để coi là spike
+    'require_1m_vol_spike': False,  # True: entry 1m bar must also be a volume spike vs its 1h mean
+    'tp_factor': 0.04,
+    'sl_factor': 0.02,
+}
+
+def required_features(params: Optional[dict] = None) -> list:
+    """(tf, indicator_cache.spec) pairs generate() reads; pipeline.py computes them once for all strategies."""
+    p = {**PARAMS, **(params or {})}
+    return [('15m', indicator_cache.spec('BBANDS', period=p['bb_period'], nbdev=p['bb_std'])),
+            ('15m', indicator_cache.spec('SMA', column='volume', period=p['vol_period'], min_periods=1))]
+
+
+def prepare_15m(df_15m: pd.DataFrame, df_base: pd.DataFrame,
+                bb_period: int = 20, bb_std: float = 2,
+                vol_period: int = 20, vol_mult: float = 1.5,
+                features: Optional[dict] = None, fingerprint: Optional[str] = None) -> pd.DataFrame:
+    """
+    pandas path: add bb_upper/bb_mid/bb_lower, vol_ma, vol_spike, bb_oversold/overbought,
+    signal_buy/signal_sell columns to a (copied, normalized) 15m frame.
+    fingerprint: dataset_fingerprint(df_15m) if known (sweeps), else hashed once here for both indicators.
+    pl_backend.prepare_boll_vol_pl is the polars equivalent.
+    """
+    # --- Compute Bollinger Bands & volume avg on 15m (indicator_cache: computed once per dataset + params)
+    if fingerprint is None and features is None:
+        fingerprint = dataset_fingerprint(df_15m)
+    upper, mid, lower = feature(features, df_15m, '15m', 'BBANDS', fingerprint=fingerprint,
+                                period=bb_period, nbdev=bb_std)
+    df_15m['bb_upper'] = upper
+    df_15m['bb_mid'] = mid
+    df_15m['bb_lower'] = lower
+
+    # Volume moving average
+    if 'volume' in df_15m.columns:
+        df_15m['vol_ma'] = feature(features, df_15m, '15m', 'SMA', fingerprint=fingerprint,
+                                   column='volume', period=vol_period, min_periods=1)
+    else:
+        # If no volume in 15m, try to aggregate from 1m
+        if 'volume' in df_base.columns:
+            # aggregate 1m -> 15m sum volume aligned by floor
+            vol_15_from_1m = df_base['volume'].resample('15min').sum()
+            df_15m = df_15m.join(vol_15_from_1m.rename('volume'), how='left')
+            df_15m['vol_ma'] = indicator_cache.rolling_mean(df_15m, '15m', 'volume', vol_period)
+        else:
+            df_15m['volume'] = np.nan
+            df_15m['vol_ma'] = np.nan
+
+    # signals columns on 15m
+    df_15m['vol_spike'] = df_15m['volume'] > (df_15m['vol_ma'] * vol_mult)
+    df_15m['bb_oversold'] = df_15m['close'] < df_15m['bb_lower']
+    df_15m['bb_overbought'] = df_15m['close'] > df_15m['bb_upper']
 
+    df_15m['signal_buy'] = df_15m['bb_oversold'] & df_15m['vol_spike']
+    df_15m['signal_sell'] = df_15m['bb_overbought'] & df_15m['vol_spike']
+
+    return df_15m
 
-file_path = get_data_path("BTCUSDT_15m_20251001_0000_to_20251127_2359.csv")
-# file_path = 'BTCUSDT_15m_20251001_0000_to_20251127_2359.csv'
-# file_4h_path = "data\BTCUSDT_4h_20251001_0000_to_20251127_2359.csv"
 
 def generate(df_base: pd.DataFrame,
-             base_risk_pct: float = 0.01) -> pd.DataFrame:
+             base_risk_pct: float = 0.01,
+             mtf: Optional[dict] = None,
+             params: Optional[dict] = None,
+             features: Optional[dict] = None,
+             as_events: bool = False):
     """
     Strategy: Bollinger Bands (20,2) on 15m + Volume spike confirmation.
     - Buy when 15m close < lower_band AND 15m volume > avg_volume_20 * VOL_MULT
@@ -19,26 +85,25 @@ def generate(df_base: pd.DataFrame,
     - Entry price taken as last 1m close inside that 15m block
     - TP/SL factors same as trước (TP 4%, SL 2%)
     - Returns signals DataFrame containing only actual signals (no full-index)
+    - params: overrides for PARAMS (e.g. {'tp_factor': 0.03})
+    - features: shared indicator arrays from pipeline.generate_signals_multi (optional)
+    - as_events: return a signal_events.SignalEvents (sparse arrays the engine walks directly)
     """
 
-    # --- CONFIG (tweak these if cần)
-    BB_PERIOD = 20
-    BB_STD = 2
-    VOL_PERIOD = 20
-    VOL_MULT = 1.5   # volume phải lớn hơn trung bình * VOL_MULT để coi là spike
-    TP_FACTOR = 0.04
-    SL_FACTOR = 0.02
-
-    # --- read precomputed 15m CSV (keeps same pattern như hàm cũ)
-    # NOTE: `file_path` must exist in the calling scope (same as hàm cũ)
-    df_15m_raw = pd.read_csv(file_path)
-    # Normalize/clean 15m using the same helper (expect clean_ohlc exists)
-    df_15m = clean_ohlc(df_15m_raw, timeframe='15min')
-
-    # --- COPY & normalize incoming 1m base
     if df_base is None:
         raise ValueError("generate: df_base must not be None")
 
+    # --- CONFIG: PARAMS defaults + per-call overrides
+    p = {**PARAMS, **(params or {})}
+    BB_PERIOD = p['bb_period']
+    BB_STD = p['bb_std']
+    VOL_PERIOD = p['vol_period']
+    VOL_MULT = p['vol_mult']
+    REQUIRE_1M_VOL_SPIKE = p['require_1m_vol_spike']
+    TP_FACTOR = p['tp_factor']
+    SL_FACTOR = p['sl_factor']
+
+    # --- COPY & normalize incoming 1m base
     df_base = df_base.copy()
     # ensure index is datetime
     try:
@@ -60,6 +125,12 @@ def generate(df_base: pd.DataFrame,
     # normalize column names to lowercase for safe access
     df_base.columns = [c.lower() for c in df_base.columns]
 
+    # --- 15m bars: from the in-memory MTF pyramid if given, else stored 15m data covering df_base
+    if mtf is not None and '15m' in mtf:
+        df_15m = mtf['15m']
+    else:
+        df_15m = load_range(SYMBOL, '15m', df_base.index[0], df_base.index[-1])
+
     # same normalization for 15m df
     df_15m = df_15m.copy()
     if not isinstance(df_15m.index, pd.DatetimeIndex):
@@ -72,98 +143,53 @@ def generate(df_base: pd.DataFrame,
     df_15m.index = df_15m.index.floor('15min')
     df_15m.columns = [c.lower() for c in df_15m.columns]
 
-    # --- Compute Bollinger Bands & volume avg on 15m
-    close_15 = df_15m['close'].values
-    upper, mid, lower = talib.BBANDS(close_15, timeperiod=BB_PERIOD, nbdevup=BB_STD, nbdevdn=BB_STD)
-    df_15m['bb_upper'] = upper
-    df_15m['bb_mid'] = mid
-    df_15m['bb_lower'] = lower
-
-    # Volume moving average
-    if 'volume' in df_15m.columns:
-        df_15m['vol_ma'] = df_15m['volume'].rolling(VOL_PERIOD, min_periods=1).mean()
+    # --- Compute Bollinger Bands, volume avg and signal flags on 15m (pandas or polars backend)
+    if get_backend() == 'polars' and 'volume' in df_15m.columns:
+        from pl_backend import prepare_boll_vol_pl
+        df_15m = prepare_boll_vol_pl(df_15m, bb_period=BB_PERIOD, bb_std=BB_STD,
+                                     vol_period=VOL_PERIOD, vol_mult=VOL_MULT)
     else:
-        # If no volume in 15m, try to aggregate from 1m
-        if 'volume' in df_base.columns:
-            # aggregate 1m -> 15m sum volume aligned by floor
-            vol_15_from_1m = df_base['volume'].resample('15min').sum()
-            df_15m = df_15m.join(vol_15_from_1m.rename('volume'), how='left')
-            df_15m['vol_ma'] = df_15m['volume'].rolling(VOL_PERIOD, min_periods=1).mean()
-        else:
-            df_15m['volume'] = np.nan
-            df_15m['vol_ma'] = np.nan
-
-    # signals columns on 15m
-    df_15m['vol_spike'] = df_15m['volume'] > (df_15m['vol_ma'] * VOL_MULT)
-    df_15m['bb_oversold'] = df_15m['close'] < df_15m['bb_lower']
-    df_15m['bb_overbought'] = df_15m['close'] > df_15m['bb_upper']
-
-    df_15m['signal_buy'] = df_15m['bb_oversold'] & df_15m['vol_spike']
-    df_15m['signal_sell'] = df_15m['bb_overbought'] & df_15m['vol_spike']
-
-    # --- prepare signals DataFrame indexed by 1m times (we will only keep rows with signals)
-    signals = pd.DataFrame(columns=['signal_side','note','size','risk_pct','tp_price','sl_price'])
-    # We'll populate rows by timestamp (entry_ts) as index
-
-    # --- iterate over 15m candles that have signal
-    for ts, row in df_15m.iterrows():
-        if not (row.get('signal_buy', False) or row.get('signal_sell', False)):
-            continue
-
-        block_start = ts
-        block_end = ts + pd.Timedelta(minutes=15)
-        # select 1m candles inside the 15m block (inclusive start, inclusive end -1min)
-        slice_1m = df_base.loc[block_start : block_end - pd.Timedelta(minutes=1)]
-
-        if slice_1m.empty:
-            # no 1m data for this block -> skip
-            continue
-
-        # Optional: additional confirmation using 1m volume spike inside the block
-        vol1m = None
-        if 'volume' in df_base.columns:
-            # compare last 1m volume to its rolling mean (e.g., last 60 1m candles approx 1h)
-            last_vol = slice_1m['volume'].iloc[-1]
-            vol_ma_1h = df_base['volume'].rolling(60, min_periods=1).mean().iloc[-1]
-            vol1m = last_vol > (vol_ma_1h * VOL_MULT)
-            # require at least either 15m vol spike or 1m vol spike (we already had 15m vol_spike)
-            # Here we don't require extra — but you can uncomment below to require both:
-            # if not vol1m:
-            #     continue
-
-        last_candle = slice_1m.iloc[-1]
-        entry_price = last_candle['close']
-        entry_ts = last_candle.name
-
-        if row['signal_buy']:
-            sig_side = 'BUY'
-            note = 'M15_BB_vol_buy'
-            tp = entry_price * (1 + TP_FACTOR)
-            sl = entry_price * (1 - SL_FACTOR)
-        else:
-            sig_side = 'SELL'
-            note = 'M15_BB_vol_sell'
-            tp = entry_price * (1 - TP_FACTOR)
-            sl = entry_price * (1 + SL_FACTOR)
-
-        # append into signals (index = entry timestamp)
-        signals.loc[entry_ts] = {
-            'signal_side': sig_side,
-            'note': note,
-            'size': np.nan,
-            'risk_pct': base_risk_pct,
-            'tp_price': tp,
-            'sl_price': sl
-        }
-
-    # only keep rows with signals (already only appended signals) and sort by time
-    if not signals.empty:
-        signals.index.name = 'timestamp'
-        signals = signals.sort_index()
-
-            # Tên folder lưu file
-    out_dir = "strategies/debug_output"
-        # Tạo folder nếu chưa có
-    os.makedirs(out_dir, exist_ok=True)
-    signals.to_csv(f"{out_dir}/debug_boll_vol_signals.csv")
+        df_15m = prepare_15m(df_15m, df_base, bb_period=BB_PERIOD, bb_std=BB_STD,
+                             vol_period=VOL_PERIOD, vol_mult=VOL_MULT, features=features)
+
+    # --- map every 15m signal block to its last 1m bar in one pass (no per-signal slicing / row inserts)
+    sig_buy = df_15m['signal_buy'].to_numpy(dtype=bool)
+    sig_sell = df_15m['signal_sell'].to_numpy(dtype=bool)
+    is_sig = sig_buy | sig_sell
+    block_start = df_15m.index[is_sig]
+    is_buy = sig_buy[is_sig]
+
+    # last 1m bar with block_start <= t < block_start + 15m; blocks without 1m data are skipped
+    base_idx = df_base.index
+    j = last_bar_in_block(base_idx, block_start)
+    j, is_buy = j[j >= 0], is_buy[j >= 0]
+
+    # Optional: additional confirmation using the 1m volume spike on the entry bar
+    # (1m volume vs its 60-bar rolling mean, computed once for the whole history)
+    if REQUIRE_1M_VOL_SPIKE and 'volume' in df_base.columns:
+        vol_1m = df_base['volume'].to_numpy(dtype=np.float64)
+        vol_ma_1h = df_base['volume'].rolling(60, min_periods=1).mean().to_numpy()
+        keep = vol_1m[j] > vol_ma_1h[j] * VOL_MULT
+        j, is_buy = j[keep], is_buy[keep]
+
+    entry_price = df_base['close'].to_numpy(dtype=np.float64)[j]
+    tp = np.where(is_buy, entry_price * (1 + TP_FACTOR), entry_price * (1 - TP_FACTOR))
+    sl = np.where(is_buy, entry_price * (1 - SL_FACTOR), entry_price * (1 + SL_FACTOR))
+
+    if as_events:
+        return SignalEvents.from_arrays(base_idx, j, is_buy, tp, sl, risk_pct=base_risk_pct,
+                                        note=np.where(is_buy, 'M15_BB_vol_buy', 'M15_BB_vol_sell'))
+
+    # signals frame in one allocation, indexed by the entry (1m) timestamps, only rows with signals
+    signals = pd.DataFrame({
+        'signal_side': np.where(is_buy, 'BUY', 'SELL').astype(object),
+        'note': np.where(is_buy, 'M15_BB_vol_buy', 'M15_BB_vol_sell').astype(object),
+        'size': np.nan,
+        'risk_pct': float(base_risk_pct),
+        'tp_price': tp,
+        'sl_price': sl,
+    }, index=pd.DatetimeIndex(base_idx[j], name='timestamp'))
+
+    # debug CSV only with BT_DEBUG_SIGNALS=1 (pipeline runs many variants of this strategy)
+    write_debug_signals(signals, "debug_boll_vol_signals.csv")
     return signals
\ No newline at end of file
@@ -3,44 +3,47 @@
 import pandas as pd
 import os
 from pathlib import Path
+from typing import Optional
 
-def get_data_path(fname: str) -> Path:
-    # find data dir relative to this file
-    this_file = Path(__file__).resolve()
-    for parent in this_file.parents[:6]:
-        cand = parent / "data"
-        if cand.is_dir():
-            p = cand / fname
-            if p.is_file():
-                return p.resolve()
-            # if not file but dir exists return dir for caller to inspect
-            return cand.resolve()
-    # fallback cwd
-    if (Path.cwd() / "data").is_dir():
-        return (Path.cwd() / "data" / fname).resolve()
-    raise FileNotFoundError(f"Could not find '{fname}' in any data directories.")
-
-
-def clean_ohlc(df_raw: pd.DataFrame, timeframe: str = '1min') -> pd.DataFrame:
+# data lookup / OHLC cleaning / fast CSV ingest live in ohlc_data.py + catalog.py (shared with the engine)
+from ohlc_data import clean_ohlc, read_ohlc_csv, get_backend, get_data_path, dataset_fingerprint
+from catalog import load_range
+import indicator_cache
+
+import numpy as np
+
+# BT_DEBUG_SIGNALS=1: strategies write their signals to strategies/debug_output/ (once per run)
+DEBUG_SIGNALS = os.getenv('BT_DEBUG_SIGNALS', '0').strip().lower() in ('1', 'true', 'yes')
+
+
+def last_bar_in_block(base_index: pd.DatetimeIndex, block_start: pd.DatetimeIndex,
+                      block: pd.Timedelta = pd.Timedelta(minutes=15)) -> np.ndarray:
     """
-    Chuẩn hoá OHLC cho mọi khung thời gian:
-    timeframe ví dụ: '1min', '5min', '15min', '30min', '1h', '4h'
+    Position in base_index of the last bar with block_start <= t < block_start + block, for every
+    block (searchsorted, sorted base_index); -1 where the block has no base bar.
     """
-    df = df_raw.copy()
+    j = base_index.searchsorted(block_start + block, side='left') - 1
+    ok = j >= 0
+    ok[ok] = base_index[j[ok]] >= block_start[ok]
+    return np.where(ok, j, -1)
 
-    df.columns = [c.lower() for c in df.columns]
-    # Convert open_time -> datetime
-    df['open_time'] = pd.to_datetime(df['open_time'], errors='coerce')
-    df = df.dropna(subset=['open_time'])
 
-    # Set index
-    df = df.set_index('open_time')
-    df = df.sort_index()
+def write_debug_signals(signals: pd.DataFrame, name: str, out_dir: str = "strategies/debug_output"):
+    if DEBUG_SIGNALS:
+        os.makedirs(out_dir, exist_ok=True)
+        signals.to_csv(f"{out_dir}/{name}")
 
-    # Floor index theo timeframe
-    df.index = df.index.floor(timeframe)
 
-    # Capitalize column names
-    df.columns = [c.lower() for c in df.columns]
-
-    return df
\ No newline at end of file
+def feature(features: Optional[dict], df: pd.DataFrame, tf: str, name: str,
+            fingerprint: Optional[str] = None, **params):
+    """
+    One indicator for a strategy: taken from the arrays the pipeline computed once for all
+    selected strategies (features = {(tf, indicator_cache.spec(...)): result}), else computed
+    through indicator_cache (standalone run). fingerprint: dataset_fingerprint(df) if the caller
+    already has it (skips re-hashing df for every indicator).
+    """
+    key = (tf, indicator_cache.spec(name, **params))
+    res = None if features is None else features.get(key)
+    if res is None or len(res[0] if isinstance(res, tuple) else res) != len(df):
+        res = indicator_cache.compute(df, tf, key[1], fingerprint=fingerprint)
+    return res
@@ -4,76 +4,98 @@ import numpy as np
 from typing import List, Optional
 # from common import *
 from strategies.common import *
-import talib
+from signal_events import SignalEvents
 # strategies/m15_rsi.py
 
 
-file_path = get_data_path("BTCUSDT_15m_20251001_0000_to_20251127_2359.csv")
- 
-
-def generate(df_base: pd.DataFrame,
-             base_risk_pct: float = 0.01) -> pd.DataFrame:
+SYMBOL = "BTCUSDT"   # 15m fallback data is looked up in the data catalog by symbol + range
 
+# plugin metadata (registry.py): tunable parameters and the MTF levels generate() reads
+TIMEFRAMES = ('15m',)
+PARAMS = {
+    'rsi_period': 14,
+    'buy_level': 15,      # BUY when RSI crosses below
+    'sell_level': 80,     # SELL when RSI crosses above
+    'tp_factor': 0.04,
+    'sl_factor': 0.02,
+}
 
-    df_15m_raw = pd.read_csv(file_path)
 
-    df_15m = clean_ohlc(df_15m_raw, timeframe='15min')
+def required_features(params: Optional[dict] = None) -> list:
+    """(tf, indicator_cache.spec) pairs generate() reads; pipeline.py computes them once for all strategies."""
+    p = {**PARAMS, **(params or {})}
+    return [('15m', indicator_cache.spec('RSI', period=p['rsi_period']))]
 
-    # -------------------------------
-    # FIX LỖI INDEX LÀ INT
-    df_base1 = df_base.copy()
-    df_mtf = df_15m.copy()
 
-    close = df_mtf['close'].values
-    df_mtf['rsi14'] = talib.RSI(close, timeperiod=14)
+def prepare_15m(df_mtf: pd.DataFrame, period: int = 14,
+                buy_level: float = 15, sell_level: float = 80,
+                features: Optional[dict] = None, fingerprint: Optional[str] = None) -> pd.DataFrame:
+    """
+    pandas path: RSI + crossing flags (pl_backend.prepare_m15_rsi_pl is the polars equivalent).
+    fingerprint: dataset_fingerprint(df_mtf) if the caller has it (skips hashing the frame).
+    """
+    df_mtf['rsi14'] = feature(features, df_mtf, '15m', 'RSI', fingerprint=fingerprint, period=period)
     df_mtf['rsi14_prev'] = df_mtf['rsi14'].shift(1)
 
-    df_mtf['signal_buy'] = (df_mtf['rsi14_prev'] >= 15) & (df_mtf['rsi14'] < 15)
-    df_mtf['signal_sell'] = (df_mtf['rsi14_prev'] <= 80) & (df_mtf['rsi14'] > 80)
-
-    signals = pd.DataFrame(index=df_base1.index)
-    signals['signal_side'] = None
-    signals['note'] = None
-    signals['size'] = np.nan
-    signals['risk_pct'] = np.nan
-    signals['tp_price'] = np.nan
-    signals['sl_price'] = np.nan
-
-    TP_FACTOR = 0.04
-    SL_FACTOR = 0.02
-
-    for ts, row in df_mtf.iterrows():
-        if not (row['signal_buy'] or row['signal_sell']):
-            continue
-
-        block_start = ts
-        block_end = ts + pd.Timedelta(minutes=15)
-        slice_1m = df_base.loc[block_start:block_end - pd.Timedelta(minutes=1)]
+    df_mtf['signal_buy'] = (df_mtf['rsi14_prev'] >= buy_level) & (df_mtf['rsi14'] < buy_level)
+    df_mtf['signal_sell'] = (df_mtf['rsi14_prev'] <= sell_level) & (df_mtf['rsi14'] > sell_level)
+    return df_mtf
 
-        if slice_1m.empty:
-            continue
 
-        last_candle = slice_1m.iloc[-1]
-        entry_price = last_candle['close']
-        entry_ts = last_candle.name
-
-        if row['signal_buy']:
-            signals.at[entry_ts, 'signal_side'] = 'BUY'
-            signals.at[entry_ts, 'tp_price'] = entry_price * (1 + TP_FACTOR)
-            signals.at[entry_ts, 'sl_price'] = entry_price * (1 - SL_FACTOR)
-
-        elif row['signal_sell']:
-            signals.at[entry_ts, 'signal_side'] = 'SELL'
-            signals.at[entry_ts, 'tp_price'] = entry_price * (1 - TP_FACTOR)
-            signals.at[entry_ts, 'sl_price'] = entry_price * (1 + SL_FACTOR)
-
-        signals.at[entry_ts, 'risk_pct'] = base_risk_pct
-        signals = signals[signals['signal_side'].notna()]
+def generate(df_base: pd.DataFrame,
+             base_risk_pct: float = 0.01,
+             mtf: Optional[dict] = None,
+             params: Optional[dict] = None,
+             features: Optional[dict] = None,
+             as_events: bool = False):
+    """
+    RSI14 on 15m: BUY when RSI crosses below 15, SELL when it crosses above 80.
+    Entry = last 1m close inside the signal block, TP 4% / SL 2% (params overrides PARAMS;
+    features: shared indicator arrays from pipeline.generate_signals_multi; as_events=True returns
+    a signal_events.SignalEvents instead of the DataFrame).
+    Returns only the signal rows, indexed by the 1m entry timestamp (BT_DEBUG_SIGNALS=1 also
+    writes them to strategies/debug_output/). bench_m15_rsi.py times it against data size.
+    """
+    if mtf is not None and '15m' in mtf:
+        df_15m = mtf['15m']
+    else:
+        df_15m = load_range(SYMBOL, '15m', df_base.index[0], df_base.index[-1])
 
-        out_dir = "strategies/debug_output"
-            # Tạo folder nếu chưa có
-        os.makedirs(out_dir, exist_ok=True)
-        signals.to_csv(f"{out_dir}/debug_boll_rsi15_signals.csv")
+    df_mtf = df_15m.copy()
 
+    p = {**PARAMS, **(params or {})}
+    levels = dict(period=p['rsi_period'], buy_level=p['buy_level'], sell_level=p['sell_level'])
+    if get_backend() == 'polars':
+        from pl_backend import prepare_m15_rsi_pl
+        df_mtf = prepare_m15_rsi_pl(df_mtf, **levels)
+    else:
+        df_mtf = prepare_15m(df_mtf, features=features, **levels)
+
+    TP_FACTOR = p['tp_factor']
+    SL_FACTOR = p['sl_factor']
+
+    # --- RSI crossings (vectorized in prepare_15m) -> entry = last 1m bar of each signal block
+    sig_buy = df_mtf['signal_buy'].to_numpy(dtype=bool)
+    sig_sell = df_mtf['signal_sell'].to_numpy(dtype=bool)
+    is_sig = sig_buy | sig_sell
+    j = last_bar_in_block(df_base.index, df_mtf.index[is_sig])
+    is_buy = sig_buy[is_sig][j >= 0]
+    j = j[j >= 0]
+
+    entry_price = df_base['close'].to_numpy(dtype=np.float64)[j]
+    tp = np.where(is_buy, entry_price * (1 + TP_FACTOR), entry_price * (1 - TP_FACTOR))
+    sl = np.where(is_buy, entry_price * (1 - SL_FACTOR), entry_price * (1 + SL_FACTOR))
+    if as_events:
+        return SignalEvents.from_arrays(df_base.index, j, is_buy, tp, sl, risk_pct=base_risk_pct)
+
+    signals = pd.DataFrame({
+        'signal_side': np.where(is_buy, 'BUY', 'SELL').astype(object),
+        'note': np.full(len(j), None, dtype=object),
+        'size': np.nan,
+        'risk_pct': float(base_risk_pct),
+        'tp_price': tp,
+        'sl_price': sl,
+    }, index=df_base.index[j])
+
+    write_debug_signals(signals, "debug_boll_rsi15_signals.csv")
     return signals
-
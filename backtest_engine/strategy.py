@@ -1,23 +1,41 @@
-import os, importlib, pkgutil
+import inspect
+
 import pandas as pd
-import numpy as np
-from init import *
-from strategies.boll_vol import generate as strategy_generate
+from mtf import build_mtf_pyramid
+import registry
+from signal_events import SignalEvents
 
 
 
 def generate_signals(df_1m: pd.DataFrame,
-                     base_risk_pct: float = 0.01) -> pd.DataFrame:
+                     base_risk_pct: float = 0.01,
+                     mtf: dict = None,
+                     strategy: str = None,
+                     params: dict = None,
+                     as_events: bool = False):
     """
-    Fixed entry point — không đổi chữ ký.
-    Internally: loads strategies/active.py -> generate(df_1m, mtf_dict, base_risk_pct)
-    If not present, uses a tiny builtin example.
+    Fixed entry point — không đổi chữ ký (strategy / params are optional extras).
+    Internally: registry.load(strategy) -> strategies/<name>.py generate(df_1m, base_risk_pct, mtf, params)
+    strategy: plugin name; default env BT_STRATEGY, else registry.DEFAULT_STRATEGY (boll_vol).
+    Only the selected plugin is imported (see registry.py).
+    mtf: optional {tf: DataFrame} pyramid (see mtf.py); built from df_1m when omitted.
     Returns a DataFrame indexed by 1m timestamps with columns:
       ['signal_side','note','size','risk_pct','tp_price','sl_price']
+    as_events=True: a signal_events.SignalEvents instead (plugins without an as_events flag are
+    converted with SignalEvents.from_frame); engine.run_backtest accepts both.
     """
+    plugin = registry.load(strategy)
 
-    # Precompute MTF như cũ
-
+    # Precompute MTF như cũ (only the levels the plugin declares)
+    if mtf is None:
+        mtf = build_mtf_pyramid(df_1m, timeframes=registry.timeframes_of(strategy))
 
     # Gọi chiến thuật và trả về kết quả
-    return strategy_generate(df_1m, base_risk_pct)
+    kwargs = {'mtf': mtf}
+    if params:
+        kwargs['params'] = params
+    if not as_events:
+        return plugin.generate(df_1m, base_risk_pct, **kwargs)
+    if 'as_events' in inspect.signature(plugin.generate).parameters:
+        return plugin.generate(df_1m, base_risk_pct, as_events=True, **kwargs)
+    return SignalEvents.from_frame(plugin.generate(df_1m, base_risk_pct, **kwargs), df_1m.index)
@@ -0,0 +1,136 @@
+# trend.py
+"""
+Historical (vectorized) version of strategy_signal.detect_market_trend / timeframe_trend.
+The live functions fit scipy linregress on the last N closes of REST data, i.e. one answer for
+"now"; here the same rules are evaluated for EVERY bar of the history at once:
+- rolling_slope_norm(close, window): slope of the regression line over the last `window` closes
+  divided by their mean, closed form from cumulative sums of y and i*y (no per-bar fit)
+- volume_confirm(volume, vol_recent, vol_prev): mean of the last vol_recent volumes >= mean of
+  the vol_prev before them
+- timeframe_trend_series(df, ...): +1 up / -1 down / 0 sideway per bar; value at bar t equals
+  strategy_signal.timeframe_trend(df.iloc[:t + 1]) (see check_trend.py)
+- market_trend_series(mtf, index): 1d / 4h / 1h votes aligned to `index` + the majority vote
+
+No lookahead: a higher-timeframe bar only counts once it has closed (open time + period <= t),
+so the trend read at a 1m / 15m timestamp uses what the live bot could have known then.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ohlc_data import _tf_to_ns
+
+# (interval, price_window) as strategy_signal.detect_market_trend / LiveIndicators.TREND_CFG
+TREND_CFG: Tuple[Tuple[str, int], ...] = (('1d', 50), ('4h', 40), ('1h', 40))
+TREND_CODES = {'up': 1, 'down': -1, 'sideway': 0}
+TREND_NAMES = {1: 'up', -1: 'down', 0: 'sideway'}
+
+
+def rolling_slope_norm(close, window: int) -> np.ndarray:
+    """
+    slope / mean of close[t - window + 1 .. t] for every t (NaN before `window` bars or when the
+    window holds a NaN); same value as strategy_signal.slope_of_series on that window.
+    """
+    y = np.asarray(close, dtype=np.float64)
+    n = int(window)
+    T = len(y)
+    out = np.full(T, np.nan)
+    if n < 3 or T < n:
+        return out
+    valid = np.isfinite(y)
+    # centered values: slope is shift-invariant and the cumulative sums stay small
+    center = y[valid].mean() if valid.any() else 0.0
+    yc = np.where(valid, y - center, 0.0)
+    k = np.arange(T, dtype=np.float64)
+    cs_y = np.concatenate(([0.0], np.cumsum(yc)))
+    cs_ky = np.concatenate(([0.0], np.cumsum(k * yc)))
+    cs_bad = np.concatenate(([0], np.cumsum(~valid)))
+
+    end = np.arange(n, T + 1)                 # window = [end - n, end)
+    start = end - n
+    sy = cs_y[end] - cs_y[start]
+    sxy = (cs_ky[end] - cs_ky[start]) - start * sy        # local x = k - start
+    sx = n * (n - 1) / 2.0
+    div = n * (n - 1) * (2 * n - 1) / 6.0 * n - sx * sx
+    slope = (n * sxy - sx * sy) / div
+    mean = sy / n + center
+    with np.errstate(invalid='ignore', divide='ignore'):
+        res = slope / np.where(mean != 0, mean, 1.0)
+    res[(cs_bad[end] - cs_bad[start]) > 0] = np.nan
+    out[n - 1:] = res
+    return out
+
+
+def volume_confirm(volume, vol_recent: int = 5, vol_prev: int = 5) -> np.ndarray:
+    """recent volume mean >= the mean of the vol_prev bars before it (True when vol_prev == 0)."""
+    vol = pd.Series(np.asarray(volume, dtype=np.float64))
+    recent = vol.rolling(vol_recent, min_periods=1).mean().to_numpy()
+    if vol_prev <= 0:
+        return np.ones(len(vol), dtype=bool)
+    prev = vol.rolling(vol_prev, min_periods=1).mean().shift(vol_recent).to_numpy()
+    return recent >= prev
+
+
+def timeframe_trend_series(df: pd.DataFrame, price_col: str = 'close', vol_col: str = 'volume',
+                           price_window: int = 20, vol_recent: int = 5, vol_prev: int = 5,
+                           slope_thresh: float = 0.0004) -> pd.Series:
+    """strategy_signal.timeframe_trend for every bar of df -> int8 Series (+1 up, -1 down, 0 sideway)."""
+    slope = rolling_slope_norm(df[price_col].to_numpy(dtype=np.float64), price_window)
+    vol_ok = volume_confirm(df[vol_col].to_numpy(dtype=np.float64), vol_recent, vol_prev)
+    code = np.zeros(len(df), dtype=np.int8)
+    code[(slope > slope_thresh) & vol_ok] = 1
+    code[(slope < -slope_thresh) & vol_ok] = -1
+    code[:max(price_window, vol_recent + vol_prev + 1) - 1] = 0      # live: too few bars -> sideway
+    return pd.Series(code, index=df.index, name='trend')
+
+
+def align_closed(series: pd.Series, tf: str, index: pd.DatetimeIndex, fill: int = 0) -> np.ndarray:
+    """
+    Value of the last `tf` bar CLOSED at each timestamp of `index` (bar open + period <= t);
+    `fill` before the first closed bar.
+    """
+    period, is_month = _tf_to_ns(tf)
+    if is_month:
+        raise ValueError("align_closed: month bars are not supported")
+    src = pd.DatetimeIndex(series.index)
+    dst = pd.DatetimeIndex(index)
+    if (src.tz is None) != (dst.tz is None):
+        raise TypeError("align_closed: series.index and index must both be tz-aware or both naive")
+    closed_at = src.as_unit('ns').asi8 + period
+    k = np.searchsorted(closed_at, dst.as_unit('ns').asi8, side='right') - 1
+    vals = series.to_numpy()
+    return np.where(k >= 0, vals[np.maximum(k, 0)], fill)
+
+
+def market_trend_series(mtf: Dict[str, pd.DataFrame], index: Optional[pd.DatetimeIndex] = None,
+                        cfg: Sequence[Tuple[str, int]] = TREND_CFG, vol_recent: int = 5,
+                        vol_prev: int = 5, slope_thresh: float = 0.0004) -> pd.DataFrame:
+    """
+    detect_market_trend for every timestamp of `index` (default: the 1m bars of mtf).
+    Returns a DataFrame of int8 codes: one vote column per timeframe + 'trend' (up when >= 2 votes
+    are up, down when >= 2 are down, else sideway). Timeframes missing from mtf vote sideway,
+    as detect_market_trend does on errors.
+    """
+    if index is None:
+        index = mtf['1m'].index
+    out = pd.DataFrame(index=index)
+    for interval, price_window in cfg:
+        if interval not in mtf:
+            out[interval] = np.int8(0)
+            continue
+        tt = timeframe_trend_series(mtf[interval], price_window=price_window, vol_recent=vol_recent,
+                                    vol_prev=vol_prev, slope_thresh=slope_thresh)
+        out[interval] = align_closed(tt, interval, index).astype(np.int8)
+    votes = out[[tf for tf, _ in cfg]].to_numpy()
+    trend = np.zeros(len(out), dtype=np.int8)
+    trend[(votes == 1).sum(axis=1) >= 2] = 1
+    trend[(votes == -1).sum(axis=1) >= 2] = -1
+    out['trend'] = trend
+    return out
+
+
+def trend_labels(codes) -> np.ndarray:
+    """int codes -> 'up' / 'down' / 'sideway' (object array)."""
+    c = np.asarray(codes)
+    return np.where(c > 0, 'up', np.where(c < 0, 'down', 'sideway')).astype(object)
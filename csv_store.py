@@ -0,0 +1,70 @@
+"""
+Helpers shared by the append-only CSV stores (get_history_1.py klines, funding_store.py funding).
+
+Every store writes one header line, then rows whose first column is the time key
+(int64 epoch-ms UTC; old kline files may still hold tz-suffixed timestamp strings).
+"""
+
+import os
+
+import pandas as pd
+
+
+def last_key_in_csv(filename: str):
+    """
+    Return the first-column time key (epoch ms) of the last complete row of a store CSV,
+    or None if the file is missing / empty / header-only.
+    A trailing partial line (download killed mid-write) is truncated away so the next
+    append starts on a clean row boundary. The header is recognised as the file's first
+    line, whatever its column names are (open_time, funding_time, ...).
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return None
+
+    with open(filename, "rb+") as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        block = min(size, 64 * 1024)
+        f.seek(size - block)
+        tail = f.read(block)
+        if not tail.endswith(b"\n"):
+            cut = tail.rfind(b"\n")
+            if cut < 0:
+                return None     # not even a full header line
+            f.truncate(size - block + cut + 1)
+            tail = tail[:cut + 1]
+            size = size - block + cut + 1
+
+    if size <= len(header):
+        return None             # header only (possibly after dropping a torn first row)
+    last = tail.rstrip(b"\n").rsplit(b"\n", 1)[-1].decode("utf-8")
+    return _key_ms(last)
+
+
+def first_key_in_csv(filename: str):
+    """Time key (epoch ms) of the first data row, or None if there is none."""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, "r", encoding="utf-8") as f:
+        f.readline()
+        first = f.readline()
+    return _key_ms(first) if first.endswith("\n") else None
+
+
+def count_rows_in_csv(filename: str) -> int:
+    """Number of complete data rows (newline count minus the header), read in 1 MB blocks."""
+    if not os.path.exists(filename):
+        return 0
+    lines = 0
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
+
+
+def _key_ms(line: str) -> int:
+    first_field = line.split(",", 1)[0].strip()
+    if first_field.isdigit():
+        return int(first_field)
+    return int(pd.Timestamp(first_field).value // 10**6)
@@ -0,0 +1,153 @@
+"""
+Shared column codec for the compressed stores (aggtrades_store.py, kline_archive.py).
+
+- integer columns are delta-encoded (first value + np.diff), narrowed to the smallest int dtype
+  that holds the deltas, byte-shuffled (all 1st bytes, then all 2nd bytes, ...) so the mostly-zero
+  high bytes compress well, then compressed with zstd (zstandard package) or zlib as fallback
+- float prices / quantities become int64 multiples of a fixed tick first (to_ticks / from_ticks)
+- a block file is: b'DCB1' | uint32 header length | JSON header | column blobs
+  the header holds per-column codec info + free-form metadata, so a reader can check metadata
+  (time range, tick size, ...) without decompressing any column
+"""
+
+import json
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard as zstd
+except ImportError:     # optional dependency
+    zstd = None
+
+BLOCK_MAGIC = b"DCB1"
+_INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _compress(raw: bytes, level: int = 3):
+    if zstd is not None:
+        return "zstd", zstd.ZstdCompressor(level=level).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def _decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstd is None:
+            raise ImportError("This file is zstd-compressed: pip install zstandard")
+        return zstd.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    if codec == "raw":
+        return blob
+    raise ValueError(f"Unknown codec '{codec}'")
+
+
+def _narrow(values: np.ndarray) -> np.ndarray:
+    if len(values) == 0:
+        return values.astype(np.int8)
+    lo, hi = values.min(), values.max()
+    for dt in _INT_DTYPES:
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dt, copy=False)
+    return values
+
+
+def encode_ints(values, delta: bool = True, level: int = 3):
+    """int array -> (column info dict, compressed bytes)."""
+    values = np.ascontiguousarray(values, dtype=np.int64)
+    first = int(values[0]) if (delta and len(values)) else 0
+    body = np.diff(values) if (delta and len(values)) else values
+    body = _narrow(body)
+    raw = np.ascontiguousarray(body.view(np.uint8).reshape(-1, body.itemsize).T).tobytes()
+    codec, blob = _compress(raw, level)
+    info = {"kind": "int", "n": int(len(values)), "delta": bool(delta), "first": first,
+            "dtype": body.dtype.str, "shuffle": True, "codec": codec}
+    return info, blob
+
+
+def decode_ints(info: dict, blob: bytes) -> np.ndarray:
+    dtype = np.dtype(info["dtype"])
+    raw = np.frombuffer(_decompress(info["codec"], blob), dtype=np.uint8)
+    if info.get("shuffle"):
+        raw = np.ascontiguousarray(raw.reshape(dtype.itemsize, -1).T)
+    body = raw.view(dtype).ravel()
+    if not info["delta"]:
+        return body.astype(np.int64)
+    out = np.empty(info["n"], dtype=np.int64)
+    if info["n"]:
+        out[0] = info["first"]
+        np.cumsum(body, dtype=np.int64, out=out[1:])
+        out[1:] += info["first"]
+    return out
+
+
+def encode_bools(values, level: int = 3):
+    values = np.asarray(values, dtype=bool)
+    codec, blob = _compress(np.packbits(values).tobytes(), level)
+    return {"kind": "bool", "n": int(len(values)), "codec": codec}, blob
+
+
+def decode_bools(info: dict, blob: bytes) -> np.ndarray:
+    bits = np.frombuffer(_decompress(info["codec"], blob), dtype=np.uint8)
+    return np.unpackbits(bits, count=info["n"]).astype(bool)
+
+
+def to_ticks(values, tick: float) -> np.ndarray:
+    """float prices -> int64 multiples of `tick` (rounded; NaN -> 0)."""
+    return np.rint(np.nan_to_num(np.asarray(values, dtype=np.float64)) / tick).astype(np.int64)
+
+
+def from_ticks(ticks, tick: float) -> np.ndarray:
+    return np.asarray(ticks, dtype=np.float64) * tick
+
+
+def decimals_of(strings) -> int:
+    """Max number of decimals in Binance decimal strings ('100123.40' -> 1 after stripping zeros)."""
+    dec = 0
+    for s in strings:
+        s = str(s)
+        if "." in s:
+            dec = max(dec, len(s.rstrip("0").split(".")[1]))
+    return dec
+
+
+def write_block(path: str, columns: dict, meta: dict = None):
+    """
+    columns: {name: (info, blob)} as returned by encode_*; meta: JSON-serializable dict.
+    """
+    header = {"meta": meta or {}, "columns": []}
+    offset = 0
+    for name, (info, blob) in columns.items():
+        header["columns"].append(dict(info, name=name, offset=offset, size=len(blob)))
+        offset += len(blob)
+    hb = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(BLOCK_MAGIC + np.uint32(len(hb)).tobytes() + hb)
+        for _, blob in columns.values():
+            f.write(blob)
+
+
+def read_header(path: str) -> dict:
+    with open(path, "rb") as f:
+        head = f.read(8)
+        if head[:4] != BLOCK_MAGIC:
+            raise ValueError(f"{path}: not a delta_codec block")
+        n = int(np.frombuffer(head[4:8], dtype="<u4")[0])
+        header = json.loads(f.read(n))
+    header["data_offset"] = 8 + n
+    return header
+
+
+def read_block(path: str, names=None) -> tuple:
+    """-> (meta, {name: np.ndarray}); `names` limits which columns are decompressed."""
+    header = read_header(path)
+    out = {}
+    with open(path, "rb") as f:
+        for col in header["columns"]:
+            if names is not None and col["name"] not in names:
+                continue
+            f.seek(header["data_offset"] + col["offset"])
+            blob = f.read(col["size"])
+            out[col["name"]] = decode_bools(col, blob) if col["kind"] == "bool" else decode_ints(col, blob)
+    return header["meta"], out
@@ -0,0 +1,208 @@
+"""
+Funding-rate history store.
+
+One CSV per symbol in data/funding/<SYMBOL>_funding.csv, same layout rules as the kline store
+(get_history_1.py, csv_store.py): int64 epoch-ms UTC timestamps, typed float columns, append-only pages.
+
+- sync_symbol(): continue from the last stored funding_time (no re-download)
+- sync_all():    all symbols concurrently, every worker drawing from one shared RateBudget
+                 (default funding_budget(): the endpoint allows 500 requests / 5 min / IP)
+- load_funding() / join_funding(): time-range reads and an as-of join onto bar data
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import requests
+
+from csv_store import last_key_in_csv
+from rate_budget import RateBudget
+
+
+FUNDING_COLUMNS = ["funding_time", "symbol", "funding_rate", "mark_price"]
+FUNDING_DTYPES = {"funding_time": "int64", "symbol": str, "funding_rate": "float64", "mark_price": "float64"}
+FUNDING_START = "2019-09-01"        # Binance USDT-M perpetuals launch
+FUNDING_URL = "https://fapi.binance.com/fapi/v1/fundingRate"
+EXCHANGE_INFO_URL = "https://fapi.binance.com/fapi/v1/exchangeInfo"
+PAGE_LIMIT = 1000
+# /fapi/v1/fundingRate has its own cap: 500 requests / 5 min / IP (shared with nothing else),
+# far below the generic weight limit, so funding syncs get their own, slower default budget
+FUNDING_RATE_PER_S = 500 / 300
+FUNDING_BURST = 10
+
+
+def funding_budget() -> RateBudget:
+    """Default budget for funding requests: stays under 500 requests per 5 minutes."""
+    return RateBudget(rate=FUNDING_RATE_PER_S, burst=FUNDING_BURST)
+
+
+def funding_dir(data_dir: str = None) -> str:
+    return data_dir or os.path.join(os.getcwd(), "data", "funding")
+
+
+def funding_path(symbol: str, data_dir: str = None) -> str:
+    return os.path.join(funding_dir(data_dir), f"{symbol.upper()}_funding.csv")
+
+
+def _to_ms(t) -> int:
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value // 10**6)
+
+
+def _get(url: str, params: dict, budget: RateBudget, client=None, timeout: int = 10, max_retries: int = 5):
+    """
+    One REST call under the shared budget; 429/418 drain the bucket for every worker, and so do
+    timeouts / connection errors (retried with 2**attempt s backoff, raised after max_retries).
+    """
+    for attempt in range(max_retries + 1):
+        budget.acquire()
+        if client is not None:
+            try:
+                return client.futures_funding_rate(**params)
+            except Exception:
+                if attempt == max_retries:
+                    raise
+                budget.penalize(2 ** attempt)
+                continue
+        try:
+            resp = requests.get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                raise
+            print(f"\nRequest error: {e}. retrying in {2 ** attempt}s ({attempt + 1}/{max_retries})")
+            budget.penalize(2 ** attempt)
+            continue
+        if resp.status_code in (418, 429):
+            budget.penalize(float(resp.headers.get("Retry-After", 2 ** attempt)))
+            continue
+        resp.raise_for_status()
+        return resp.json()
+    raise RuntimeError(f"Rate limited too many times: {url} {params}")
+
+
+def _page_to_frame(rows) -> pd.DataFrame:
+    n = len(rows)
+    return pd.DataFrame({
+        "funding_time": np.fromiter((r["fundingTime"] for r in rows), dtype=np.int64, count=n),
+        "symbol": [r["symbol"] for r in rows],
+        "funding_rate": np.fromiter((float(r["fundingRate"]) for r in rows), dtype=np.float64, count=n),
+        # markPrice is "" for old records
+        "mark_price": np.fromiter((float(r.get("markPrice") or "nan") for r in rows), dtype=np.float64, count=n),
+    }, columns=FUNDING_COLUMNS)
+
+
+def sync_symbol(symbol: str, budget: RateBudget = None, data_dir: str = None, start=FUNDING_START,
+                end=None, client=None) -> int:
+    """
+    Append funding records newer than the last stored funding_time (or from `start` for a new file).
+    Returns number of rows appended.
+    """
+    symbol = symbol.upper()
+    budget = budget or funding_budget()
+    path = funding_path(symbol, data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    last = last_key_in_csv(path)
+    curr = _to_ms(start) if last is None else last + 1
+    end_ms = _to_ms(end) if end is not None else None
+    write_header = last is None
+    if write_header and os.path.exists(path):
+        os.remove(path)     # header-only / broken file
+
+    written = 0
+    while True:
+        params = {"symbol": symbol, "startTime": curr, "limit": PAGE_LIMIT}
+        if end_ms is not None:
+            params["endTime"] = end_ms
+        rows = _get(FUNDING_URL, params, budget, client=client)
+        if not rows:
+            break
+        page = _page_to_frame(rows)
+        page.to_csv(path, mode="a", header=write_header, index=False, encoding="utf-8")
+        write_header = False
+        written += len(page)
+        if len(rows) < PAGE_LIMIT:
+            break
+        curr = int(page["funding_time"].iloc[-1]) + 1
+    return written
+
+
+def futures_symbols(budget: RateBudget = None, quote: str = "USDT") -> list:
+    """All trading USDT-M perpetual symbols."""
+    budget = budget or funding_budget()
+    budget.acquire(weight=1)
+    resp = requests.get(EXCHANGE_INFO_URL, timeout=10)
+    resp.raise_for_status()
+    return sorted(s["symbol"] for s in resp.json()["symbols"]
+                  if s.get("contractType") == "PERPETUAL" and s.get("quoteAsset") == quote and s.get("status") == "TRADING")
+
+
+def sync_all(symbols=None, data_dir: str = None, max_workers: int = 8, budget: RateBudget = None,
+             start=FUNDING_START, client=None) -> dict:
+    """
+    Incremental sync for many symbols in parallel. All workers share one RateBudget, so adding
+    workers speeds up I/O waits without exceeding the per-IP request rate.
+    Returns {symbol: rows appended or the exception raised}.
+    """
+    budget = budget or funding_budget()
+    if symbols is None:
+        symbols = futures_symbols(budget)
+    result = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futs = {pool.submit(sync_symbol, s, budget, data_dir, start, None, client): s for s in symbols}
+        for i, fut in enumerate(as_completed(futs), 1):
+            s = futs[fut]
+            try:
+                result[s] = fut.result()
+            except Exception as e:
+                result[s] = e
+                print(f"\n❌ {s}: {e}")
+            print(f"\rFunding sync: {i}/{len(futs)} symbols", end="", flush=True)
+    print()
+    return result
+
+
+def load_funding(symbol: str, start=None, end=None, data_dir: str = None) -> pd.DataFrame:
+    """Stored funding records in [start, end] (inclusive), indexed by funding_time (UTC)."""
+    path = funding_path(symbol, data_dir)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No funding data for {symbol.upper()} in {funding_dir(data_dir)} (run sync_symbol first)")
+    df = pd.read_csv(path, dtype=FUNDING_DTYPES)
+    ms = df["funding_time"].to_numpy()
+    lo = 0 if start is None else np.searchsorted(ms, _to_ms(start), side="left")
+    hi = len(ms) if end is None else np.searchsorted(ms, _to_ms(end), side="right")
+    df = df.iloc[lo:hi]
+    df.index = pd.DatetimeIndex(pd.to_datetime(df["funding_time"].to_numpy(), unit="ms", utc=True), name="funding_time")
+    return df.drop(columns="funding_time")
+
+
+def join_funding(bars: pd.DataFrame, funding: pd.DataFrame) -> pd.DataFrame:
+    """
+    As-of join: each bar gets the latest funding_rate settled at or before its open time, plus
+    `funding_event` = True on the bar that contains a settlement. Both indexes must be tz-aware.
+    """
+    out = bars.copy()
+    if len(bars) == 0:
+        out["funding_rate"] = pd.Series(dtype="float64")
+        out["funding_event"] = pd.Series(dtype=bool)
+        return out
+    bar_ms = bars.index.as_unit("ms").asi8
+    f_ms = funding.index.as_unit("ms").asi8
+    pos = np.searchsorted(f_ms, bar_ms, side="right") - 1
+    rates = funding["funding_rate"].to_numpy()
+    out["funding_rate"] = np.where(pos >= 0, rates[np.clip(pos, 0, None)], np.nan) if len(rates) else np.nan
+    # bar i contains a settlement if one falls in [open_i, open_{i+1})
+    step = bar_ms[-1] - bar_ms[-2] if len(bar_ms) > 1 else 0
+    nxt = np.searchsorted(f_ms, np.r_[bar_ms[1:], bar_ms[-1:] + step], side="left")
+    out["funding_event"] = nxt > np.searchsorted(f_ms, bar_ms, side="left")
+    return out
+
+
+if __name__ == "__main__":
+    res = sync_all(["BTCUSDT", "ETHUSDT"])
+    print(res)
+    print(load_funding("BTCUSDT").tail())
@@ -2,8 +2,18 @@ import os
 import time
 import requests
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
+from csv_store import last_key_in_csv, first_key_in_csv, count_rows_in_csv
+
+KLINE_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume",
+    "close_time", "quote_asset_volume", "num_trades",
+    "taker_buy_base", "taker_buy_quote",
+]
+_KLINE_FLOAT_COLS = (1, 2, 3, 4, 5, 7, 9, 10)   # positions in the raw kline list
+
 # helper: convert interval like "1m","15m","1h","1d" to milliseconds
 def _interval_to_millis(interval: str) -> int:
     unit = interval[-1]
@@ -38,6 +48,75 @@ def _binance_klines_public(symbol: str, interval: str, startTime: int = None, en
     resp.raise_for_status()
     return resp.json()
 
+def _fetch_klines_page(symbol: str, interval: str, start_ms: int, end_ms: int, limit: int = 1500,
+                       futures: bool = True, client=None, sleep_on_rate_limit: float = 0.3, max_retries: int = 5):
+    """
+    One klines page [start_ms, end_ms] via the python-binance client or the public endpoint,
+    retried with exponential backoff (sleep_on_rate_limit * 2**k) on any request error (429, timeouts, ...).
+    Raises the last error after max_retries failed attempts.
+    """
+    retries = 0
+    while True:
+        try:
+            if client is not None:
+                # use python-binance client (may require API key for other endpoints but klines usually public)
+                if futures:
+                    return client.futures_klines(symbol=symbol, interval=interval, startTime=start_ms, endTime=end_ms, limit=limit)
+                return client.get_klines(symbol=symbol, interval=interval, startTime=start_ms, endTime=end_ms, limit=limit)
+            # use public REST endpoint (live data)
+            return _binance_klines_public(symbol=symbol, interval=interval, startTime=start_ms, endTime=end_ms, limit=limit, futures=futures)
+        except Exception as e:
+            retries += 1
+            if retries > max_retries:
+                raise
+            backoff = sleep_on_rate_limit * (2 ** (retries - 1))
+            print(f"\nRequest error: {e}. retrying in {backoff:.1f}s ({retries}/{max_retries})")
+            time.sleep(backoff)
+
+def _klines_page_to_frame(chunk) -> pd.DataFrame:
+    """
+    Convert one page of raw klines (list of lists from the API) to a typed DataFrame.
+    Columns are filled straight from numpy arrays so the raw Python lists can be
+    dropped as soon as the page is converted.
+    open_time / close_time stay int64 epoch-ms UTC (Binance format): no tz work per row,
+    local time is only applied when displaying / exporting.
+    """
+    n = len(chunk)
+    open_ms = np.fromiter((r[0] for r in chunk), dtype=np.int64, count=n)
+    close_ms = np.fromiter((r[6] for r in chunk), dtype=np.int64, count=n)
+    num_trades = np.fromiter((r[8] for r in chunk), dtype=np.int64, count=n)
+    floats = np.array([[r[i] for i in _KLINE_FLOAT_COLS] for r in chunk], dtype=np.float64).reshape(n, len(_KLINE_FLOAT_COLS))
+
+    df = pd.DataFrame({
+        "open_time": open_ms,
+        "open": floats[:, 0],
+        "high": floats[:, 1],
+        "low": floats[:, 2],
+        "close": floats[:, 3],
+        "volume": floats[:, 4],
+        "close_time": close_ms,
+        "quote_asset_volume": floats[:, 5],
+        "num_trades": num_trades,
+        "taker_buy_base": floats[:, 6],
+        "taker_buy_quote": floats[:, 7],
+    }, columns=KLINE_COLUMNS)
+    return df
+
+def _upgrade_csv_to_epoch_ms(filename: str) -> pd.DataFrame:
+    """
+    Rewrite a kline CSV written with tz-suffixed timestamps ('2025-10-01 00:00:00+07:00')
+    in the int64 epoch-ms layout, so new pages can be appended to it. Returns the frame.
+    """
+    df = pd.read_csv(filename)
+    changed = False
+    for col in ("open_time", "close_time"):
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.DatetimeIndex(pd.to_datetime(df[col], utc=True)).as_unit("ms").asi8
+            changed = True
+    if changed:
+        df.to_csv(filename, index=False, encoding="utf-8")
+    return df
+
 def fetch_futures_data_by_range(
     symbol: str,
     interval: str,
@@ -50,13 +129,23 @@ def fetch_futures_data_by_range(
     limit: int = 1500,
     sleep_on_rate_limit: float = 0.3,
     max_retries: int = 5,
+    stream: bool = False,
+    resume: bool = True,
 ):
     """
     Lấy klines giữa start_dt và end_dt (inclusive) và lưu CSV.
     - start_dt / end_dt: datetime hoặc string (ISO / 'YYYY-MM-DD' / 'YYYY-MM-DD HH:MM:SS')
     - Nếu filename=None -> mặc định lưu vào ./data/<symbol>_<interval>_<start>_to_<end>.csv
+    - open_time / close_time are written as int64 epoch-ms UTC; `tz` only applies to naive
+      start_dt / end_dt and to the file name labels
     - Nếu client được truyền (python-binance Client) thì dùng client; nếu client=None thì gọi public REST endpoints (LIVE data).
-    - Trả về dict {"ok": True, "rows": n, "filename": path, "df": df}
+    - stream=True: each page is converted to typed arrays and appended to `filename` right away,
+      so memory stays flat for multi-year 1m pulls. With resume=True an existing file is continued
+      from its last complete row instead of being downloaded again.
+      A file that does not start at the first candle >= start_dt (or holds candles after end_dt)
+      belongs to another range and is downloaded again from scratch.
+    - Trả về dict {"ok": True, "rows": n, "filename": path, "df": df}  (df is None in stream mode;
+      there rows counts the whole file and "appended" the rows added by this call)
     """
 
     # parse datetimes
@@ -86,46 +175,82 @@ def fetch_futures_data_by_range(
     if limit <= 0 or limit > 1500:
         limit = 1500
 
-    all_rows = []
+    # default filename if not provided
+    if filename is None:
+        # default to the uploaded path if exists (developer note) else create under ./data
+        default_uploaded = "/mnt/data/BTCUSDT_4h_20251101_to_20251120.csv"
+        if os.path.exists(default_uploaded):
+            filename = default_uploaded
+        else:
+            start_label = start.tz_convert(tz).strftime("%Y%m%d_%H%M")
+            end_label = end.tz_convert(tz).strftime("%Y%m%d_%H%M")
+            filename = os.path.join(os.getcwd(), "data", f"{symbol}_{interval}_{start_label}_to_{end_label}.csv")
+
+    # ensure directory exists
+    dirpath = os.path.dirname(filename)
+    if dirpath and not os.path.exists(dirpath):
+        os.makedirs(dirpath, exist_ok=True)
+
+    pages = []
     fetched_candles = 0
     expected_candles = max(1, int((end_ms - start_ms) // interval_ms) + 1)
 
     curr_start = start_ms
-    retries = 0
 
-    while curr_start <= end_ms:
-        try:
-            if client is not None:
-                # use python-binance client (may require API key for other endpoints but klines usually public)
-                if futures:
-                    chunk = client.futures_klines(symbol=symbol, interval=interval, startTime=curr_start, endTime=end_ms, limit=limit)
-                else:
-                    chunk = client.get_klines(symbol=symbol, interval=interval, startTime=curr_start, endTime=end_ms, limit=limit)
-            else:
-                # use public REST endpoint (live data)
-                chunk = _binance_klines_public(symbol=symbol, interval=interval, startTime=curr_start, endTime=end_ms, limit=limit, futures=futures)
-        except Exception as e:
-            retries += 1
-            if retries > max_retries:
-                raise
-            backoff = sleep_on_rate_limit * (2 ** (retries - 1))
-            print(f"\nRequest error: {e}. retrying in {backoff:.1f}s ({retries}/{max_retries})")
-            time.sleep(backoff)
-            continue
+    # stream mode: continue after the last page that made it to disk
+    rows_written = 0
+    rows_on_disk = 0
+    write_header = True
+    if stream:
+        last_open = last_key_in_csv(filename) if resume else None
+        if last_open is not None:
+            # only continue a file of this exact range: first candle = first one >= start, nothing after end
+            first_open = first_key_in_csv(filename)
+            if first_open is None or not (start_ms <= first_open < start_ms + interval_ms) or last_open > end_ms:
+                print(f"{filename} does not start at {start} / ends after {end} -> downloading again")
+                last_open = None
+        if last_open is not None:
+            write_header = False
+            rows_on_disk = count_rows_in_csv(filename)
+            with open(filename, "r", encoding="utf-8") as f:
+                f.readline()
+                if not f.readline().split(",", 1)[0].isdigit():
+                    _upgrade_csv_to_epoch_ms(filename)   # old tz-string file -> same layout as new pages
+            resume_from = last_open + interval_ms
+            if resume_from > curr_start:
+                done = int((resume_from - start_ms) // interval_ms)
+                fetched_candles = max(0, min(done, expected_candles))
+                curr_start = resume_from
+                print(f"Resuming {symbol} {interval} from {pd.to_datetime(curr_start, unit='ms', utc=True).tz_convert(tz)}")
+        elif os.path.exists(filename):
+            # not resuming -> start a fresh file
+            os.remove(filename)
 
-        retries = 0
+    while curr_start <= end_ms:
+        chunk = _fetch_klines_page(symbol, interval, curr_start, end_ms, limit=limit, futures=futures, client=client,
+                                   sleep_on_rate_limit=sleep_on_rate_limit, max_retries=max_retries)
         if not chunk:
             break
 
-        all_rows.extend(chunk)
+        last_open = int(chunk[-1][0])
+        page = _klines_page_to_frame(chunk)
         fetched_candles += len(chunk)
+        del chunk
+
+        if stream:
+            # one page = one append; a crash can only leave a partial last line,
+            # which last_key_in_csv trims on the next run
+            page.to_csv(filename, mode="a", header=write_header, index=False, encoding="utf-8")
+            write_header = False
+            rows_written += len(page)
+        else:
+            pages.append(page)
 
         # progress
         progress = min(100.0, fetched_candles / expected_candles * 100.0)
         print(f"\rFetching {symbol} {interval}: {progress:.1f}% ({fetched_candles}/{expected_candles} candles)", end="", flush=True)
 
         # advance cursor: last_open + interval_ms
-        last_open = int(chunk[-1][0])
         next_start = last_open + interval_ms
         if next_start <= curr_start:
             # safety break to avoid infinite loop
@@ -137,46 +262,85 @@ def fetch_futures_data_by_range(
 
     print()
 
+    if stream:
+        # rows = whole file (resumed part included), appended = this run only
+        return {"ok": True, "rows": rows_on_disk + rows_written, "appended": rows_written, "filename": filename, "df": None}
+
     # build dataframe
-    if not all_rows:
+    if not pages:
         df = pd.DataFrame()
     else:
-        cols = [
-            "open_time", "open", "high", "low", "close", "volume",
-            "close_time", "quote_asset_volume", "num_trades",
-            "taker_buy_base", "taker_buy_quote", "ignore"
-        ]
-        df = pd.DataFrame(all_rows, columns=cols)
-        # convert times to datetime (UTC -> user tz)
-        df["open_time"] = pd.to_datetime(df["open_time"], unit="ms", utc=True).dt.tz_convert(tz)
-        df["close_time"] = pd.to_datetime(df["close_time"], unit="ms", utc=True).dt.tz_convert(tz)
-        # numeric cast
-        for c in ("open","high","low","close","volume","quote_asset_volume","taker_buy_base","taker_buy_quote"):
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors="coerce")
-        if "ignore" in df.columns:
-            df = df.drop(columns=["ignore"])
-
-    # default filename if not provided
-    if filename is None:
-        # default to the uploaded path if exists (developer note) else create under ./data
-        default_uploaded = "/mnt/data/BTCUSDT_4h_20251101_to_20251120.csv"
-        if os.path.exists(default_uploaded):
-            filename = default_uploaded
-        else:
-            start_label = start.tz_convert(tz).strftime("%Y%m%d_%H%M")
-            end_label = end.tz_convert(tz).strftime("%Y%m%d_%H%M")
-            filename = os.path.join(os.getcwd(), "data", f"{symbol}_{interval}_{start_label}_to_{end_label}.csv")
-
-    # ensure directory exists
-    dirpath = os.path.dirname(filename)
-    if dirpath and not os.path.exists(dirpath):
-        os.makedirs(dirpath, exist_ok=True)
+        df = pd.concat(pages, ignore_index=True)
 
     # save CSV
     df.to_csv(filename, index=False, encoding="utf-8")
 
     return {"ok": True, "rows": len(df), "filename": filename, "df": df}
 
-res = fetch_futures_data_by_range("BTCUSDT", "1m", "2025-10-01", "2025-11-27", client=None, futures=True)
-print(res["filename"], res["rows"])
\ No newline at end of file
+def repair_gaps(
+    symbol: str,
+    interval: str,
+    filename: str,
+    gaps_file: str = None,
+    futures: bool = True,
+    client=None,
+    limit: int = 1500,
+    sleep_on_rate_limit: float = 0.3,
+    max_retries: int = 5,
+):
+    """
+    Re-download only the missing ranges listed in a gap index (backtest_engine/data_quality.py,
+    default <file>.gaps.csv next to the CSV) and merge them into `filename`.
+    Duplicated open_time rows are collapsed (newest download wins) and the file is re-sorted;
+    files still using tz-suffixed timestamps are rewritten in the int64 epoch-ms layout.
+    Pages are retried like fetch_futures_data_by_range; if a page still fails, the pages fetched
+    so far are merged before the error is raised, so a rerun only redoes the remaining gaps
+    (after re-running data_quality.py).
+    Returns {"ok": True, "filled": rows_added, "filename": filename}
+    """
+    if gaps_file is None:
+        root, _ = os.path.splitext(filename)
+        gaps_file = root + ".gaps.csv"
+    if not os.path.exists(gaps_file):
+        raise FileNotFoundError(f"Gap index not found: {gaps_file} (run backtest_engine/data_quality.py first)")
+
+    gaps = pd.read_csv(gaps_file)
+    gaps = gaps[gaps["kind"] == "gap"]
+    interval_ms = _interval_to_millis(interval)
+
+    pages = []
+    filled = 0
+    try:
+        for start_ms, end_ms in zip(gaps["start_ms"].astype("int64"), gaps["end_ms"].astype("int64")):
+            curr_start, end_ms = int(start_ms), int(end_ms)
+            while curr_start <= end_ms:
+                chunk = _fetch_klines_page(symbol, interval, curr_start, end_ms, limit=limit, futures=futures,
+                                           client=client, sleep_on_rate_limit=sleep_on_rate_limit, max_retries=max_retries)
+                if not chunk:
+                    break   # exchange has no data for this hole (maintenance) -> it stays a gap
+                curr_start = int(chunk[-1][0]) + interval_ms
+                pages.append(_klines_page_to_frame(chunk))
+                time.sleep(sleep_on_rate_limit)
+            print(f"\rRepairing {symbol} {interval}: {len(pages)} pages", end="", flush=True)
+    finally:
+        print()
+        if pages:
+            filled = _merge_pages(filename, pages)
+
+    return {"ok": True, "filled": filled, "filename": filename}
+
+def _merge_pages(filename: str, pages) -> int:
+    """Merge downloaded pages into the CSV (dedup on open_time, newest wins, sorted). Returns rows added."""
+    df = _upgrade_csv_to_epoch_ms(filename)
+    new = pd.concat(pages, ignore_index=True)
+
+    before = len(df)
+    df = (pd.concat([df, new[df.columns]], ignore_index=True)
+          .drop_duplicates("open_time", keep="last")
+          .sort_values("open_time", kind="stable"))
+    df.to_csv(filename, index=False, encoding="utf-8")
+    return len(df) - before
+
+if __name__ == "__main__":
+    res = fetch_futures_data_by_range("BTCUSDT", "1m", "2025-10-01", "2025-11-27", client=None, futures=True, stream=True)
+    print(res["filename"], res["rows"])
@@ -24,6 +24,12 @@ N_DISPLAY = 5       # Chỉ hiển thị 5 mức giá tốt nhất
 
 INTERVAL_S = 1      # Thời gian chờ giữa các lần cập nhật
 
+RECORD = False      # True: ghi snapshot vào file nhị phân (orderbook_recorder.py) thay vì in ra
+
+RECORD_LEVELS = 20  # Số mức giá mỗi phía được lưu
+
+USE_WS = False      # True: sổ lệnh cục bộ từ WebSocket @depth@100ms (local_order_book.py), không poll REST
+
 # 1. Khởi tạo Client
 
 
@@ -438,11 +444,109 @@ def continuous_order_book_display(symbol, limit, n_display, interval_s):
 
 
 
+def record_order_book(symbol, limit, levels, interval_s, duration_s=None):
+
+    """
+
+    Chế độ ghi: lưu snapshot Order Book vào file nhị phân theo giờ (int64 ts + float32 giá/khối lượng),
+
+    không tạo DataFrame. Đọc lại bằng orderbook_recorder.load_range(...) (memory-map).
+
+    """
+
+    from orderbook_recorder import OrderBookRecorder
+
+    print(f"--- Ghi Order Book {symbol} ({levels} mức) mỗi {interval_s} giây. Nhấn Ctrl+C để dừng ---")
+
+    t_end = None if duration_s is None else time.time() + duration_s
+
+    with OrderBookRecorder(symbol, levels=levels) as rec:
+
+        while t_end is None or time.time() < t_end:
+
+            try:
+
+                depth = client.futures_order_book(symbol=symbol, limit=limit)
+
+                ts_ms = int(depth.get('T') or depth.get('E') or time.time() * 1000)
+
+                rec.write(ts_ms, depth['bids'], depth['asks'], depth.get('lastUpdateId', 0))
+
+                print(f"\r[{datetime.now().strftime('%H:%M:%S')}] Đã ghi {rec.count} snapshot", end="", flush=True)
+
+            except Exception as e:
+
+                print(f"\n[LỖI] Không thể lấy Order Book: {e}")
+
+            time.sleep(interval_s)
+
+
+
+
+
+def continuous_order_book_ws(symbol, n_display, interval_s, record_levels=None):
+
+    """
+
+    Hiển thị Order Book từ sổ lệnh cục bộ: 1 snapshot REST + luồng diff @depth@100ms qua WebSocket.
+
+    Chỉ in mỗi interval_s giây; record_levels: ghi thêm snapshot top-N mỗi 100ms (orderbook_recorder.py).
+
+    """
+
+    from local_order_book import run_local_book
+
+    last_print = [0.0]
+
+    def show(book):
+
+        if time.time() - last_print[0] < interval_s:
+
+            return
+
+        last_print[0] = time.time()
+
+        bids, asks = book.top(n_display)
+
+        print("\n==================================================")
+
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Cặp: {symbol} | updateId: {book.last_update_id} | resync: {book.resyncs}")
+
+        print("==================================================")
+
+        print(f"--- TOP {n_display} ASKS (Bán Thấp nhất) ---")
+
+        print(pd.DataFrame(asks, columns=['Price', 'Quantity']).to_string(index=False))
+
+        print(f"\n  SPREAD: {book.best_ask - book.best_bid:.2f} | BEST BID: {book.best_bid:,.2f} | BEST ASK: {book.best_ask:,.2f}")
+
+        print(f"\n--- TOP {n_display} BIDS (Mua Cao nhất) ---")
+
+        print(pd.DataFrame(bids, columns=['Price', 'Quantity']).to_string(index=False))
+
+    print(f"--- Sổ lệnh cục bộ {symbol} qua WebSocket. Nhấn Ctrl+C để dừng ---")
+
+    run_local_book(symbol, client, record_levels=record_levels, on_update=show)
+
+
+
+
+
 # --- Thực thi hàm ---
 
 try:
 
-    continuous_order_book_display(SYMBOL, LIMIT, N_DISPLAY, INTERVAL_S)
+    if USE_WS:
+
+        continuous_order_book_ws(SYMBOL, N_DISPLAY, INTERVAL_S, record_levels=RECORD_LEVELS if RECORD else None)
+
+    elif RECORD:
+
+        record_order_book(SYMBOL, LIMIT, RECORD_LEVELS, INTERVAL_S)
+
+    else:
+
+        continuous_order_book_display(SYMBOL, LIMIT, N_DISPLAY, INTERVAL_S)
 
 except KeyboardInterrupt:
 
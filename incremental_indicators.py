@@ -0,0 +1,258 @@
+"""
+Incremental indicators for live bars: update(bar) costs O(1) per closed candle, so the bot can keep
+EMA / RSI / MACD / Bollinger / volume mean / regression slope per symbol x timeframe without
+re-fetching 200 candles and recomputing the whole history on every check.
+
+- bar: a number, a mapping ({'close': ..., 'volume': ...}, a DataFrame row) or an object with
+  attributes; `source` picks the field ('close' by default, RollingMean(20, source='volume'))
+- update() returns the current value (float, or a tuple for MACD / Bollinger); NaN until warmed up
+- once warmed up the values equal TA-Lib (EMA, RSI, MACD, BBANDS, LINEARREG_SLOPE) and
+  pandas rolling().mean(), see test-incremental-indicators.py
+
+    ema7 = EMA(7)
+    for c in closes: ema7.update(c)     # seed from history once
+    ema7.update(new_close)              # then one call per closed candle
+"""
+
+import math
+from collections import deque
+from numbers import Number
+
+NAN = float("nan")
+
+
+def _value(bar, source: str) -> float:
+    if isinstance(bar, Number):
+        return float(bar)
+    try:
+        return float(bar[source])
+    except (TypeError, KeyError, IndexError):
+        return float(getattr(bar, source))
+
+
+class Indicator:
+    """Base: subclasses implement _update(x) and keep `value`."""
+
+    def __init__(self, source: str = "close"):
+        self.source = source
+        self.count = 0
+        self.value = NAN
+
+    def update(self, bar):
+        self.count += 1
+        self.value = self._update(_value(bar, self.source))
+        return self.value
+
+    def _update(self, x: float):
+        raise NotImplementedError
+
+    @property
+    def ready(self) -> bool:
+        v = self.value[0] if isinstance(self.value, tuple) else self.value
+        return v == v
+
+
+class EMA(Indicator):
+    """TA-Lib EMA: seeded with the SMA of the first `period` values, then k = 2 / (period + 1)."""
+
+    def __init__(self, period: int, source: str = "close"):
+        super().__init__(source)
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self._seed = 0.0
+
+    def _update(self, x):
+        if self.count < self.period:
+            self._seed += x
+            return NAN
+        if self.count == self.period:
+            self._seed += x
+            return self._seed / self.period
+        return self.value + (x - self.value) * self.k
+
+
+class RSI(Indicator):
+    """Wilder RSI as TA-Lib: simple mean of the first `period` changes, then Wilder smoothing."""
+
+    def __init__(self, period: int = 14, source: str = "close"):
+        super().__init__(source)
+        self.period = period
+        self._prev = None
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def _update(self, x):
+        prev, self._prev = self._prev, x
+        if prev is None:
+            return NAN
+        ch = x - prev
+        gain, loss = (ch, 0.0) if ch > 0 else (0.0, -ch)
+        n = self.period
+        changes = self.count - 1
+        if changes < n:
+            self._gain += gain
+            self._loss += loss
+            return NAN
+        if changes == n:
+            self._gain = (self._gain + gain) / n
+            self._loss = (self._loss + loss) / n
+        else:
+            self._gain = (self._gain * (n - 1) + gain) / n
+            self._loss = (self._loss * (n - 1) + loss) / n
+        return self._rsi()
+
+    def _rsi(self):
+        total = self._gain + self._loss
+        return 100.0 * self._gain / total if total != 0 else 0.0
+
+
+class MACD(Indicator):
+    """
+    TA-Lib MACD -> (macd, signal, hist). Like TA-Lib, the fast EMA is seeded on the same bar as the
+    slow one (its SMA seed covers the `fast` closes ending there) and all three outputs start
+    once the signal EMA is seeded, i.e. after slow + signal - 1 bars.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9, source: str = "close"):
+        super().__init__(source)
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast, self.slow = fast, slow
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+        self.value = (NAN, NAN, NAN)
+
+    def _update(self, x):
+        if self.count > self.slow - self.fast:
+            self._fast.update(x)
+        self._slow.update(x)
+        if not self._slow.ready:
+            return (NAN, NAN, NAN)
+        macd = self._fast.value - self._slow.value
+        sig = self._signal.update(macd)
+        if sig != sig:
+            return (NAN, NAN, NAN)
+        return (macd, sig, macd - sig)
+
+
+class RollingWindow:
+    """Fixed-size window with running sum / sum of squares (re-summed every `resum` updates to stop drift)."""
+
+    def __init__(self, period: int, resum: int = 1000):
+        self.period = period
+        self.buf = deque(maxlen=period)
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self._resum = resum
+        self._n = 0
+
+    def push(self, x: float):
+        if len(self.buf) == self.period:
+            old = self.buf[0]
+            self.sum -= old
+            self.sumsq -= old * old
+        self.buf.append(x)
+        self.sum += x
+        self.sumsq += x * x
+        self._n += 1
+        if self._n % self._resum == 0:
+            self.sum = math.fsum(self.buf)
+            self.sumsq = math.fsum(v * v for v in self.buf)
+
+    def __len__(self):
+        return len(self.buf)
+
+
+class RollingMean(Indicator):
+    """pandas rolling(period, min_periods).mean(); NaN inputs are skipped like pandas does."""
+
+    def __init__(self, period: int, min_periods: int = None, source: str = "close"):
+        super().__init__(source)
+        self.period = period
+        self.min_periods = period if min_periods is None else min_periods
+        self._win = deque(maxlen=period)
+        self._sum = 0.0
+        self._valid = 0
+
+    def _update(self, x):
+        if len(self._win) == self.period:
+            old = self._win[0]
+            if old == old:
+                self._sum -= old
+                self._valid -= 1
+        self._win.append(x)
+        if x == x:
+            self._sum += x
+            self._valid += 1
+        if self.count % 1000 == 0:
+            self._sum = math.fsum(v for v in self._win if v == v)
+        return self._sum / self._valid if self._valid >= max(self.min_periods, 1) else NAN
+
+
+class Bollinger(Indicator):
+    """TA-Lib BBANDS (SMA, population std) -> (upper, mid, lower) from rolling sums."""
+
+    def __init__(self, period: int = 20, nbdev_up: float = 2.0, nbdev_dn: float = None, source: str = "close"):
+        super().__init__(source)
+        self.period = period
+        self.nbdev_up = nbdev_up
+        self.nbdev_dn = nbdev_up if nbdev_dn is None else nbdev_dn
+        self._win = RollingWindow(period)
+        self.value = (NAN, NAN, NAN)
+
+    def _update(self, x):
+        self._win.push(x)
+        if len(self._win) < self.period:
+            return (NAN, NAN, NAN)
+        n = self.period
+        mid = self._win.sum / n
+        var = self._win.sumsq / n - mid * mid
+        std = math.sqrt(var) if var > 0 else 0.0
+        return (mid + self.nbdev_up * std, mid, mid - self.nbdev_dn * std)
+
+
+class LinRegSlope(Indicator):
+    """
+    TA-Lib LINEARREG_SLOPE over the last `period` values (x = 0 .. period-1).
+    Shifting the window only needs sum(y) and sum(i * y): drop y0, every other x drops by one.
+    `slope_norm` = slope / window mean, the measure strategy_signal.slope_of_series uses.
+    """
+
+    def __init__(self, period: int, source: str = "close", resum: int = 1000):
+        super().__init__(source)
+        self.period = period
+        n = period
+        self._sx = n * (n - 1) / 2.0
+        self._div = n * (n - 1) * (2 * n - 1) / 6.0 * n - self._sx * self._sx
+        self._buf = deque(maxlen=period)
+        self._sy = 0.0
+        self._sxy = 0.0
+        self._resum = resum
+
+    def _update(self, y):
+        n = self.period
+        if len(self._buf) == n:
+            y0 = self._buf[0]
+            self._sxy -= self._sy - y0         # every remaining point moves one step left
+            self._sy -= y0
+            self._buf.append(y)
+            self._sy += y
+            self._sxy += (n - 1) * y
+        else:
+            self._sxy += len(self._buf) * y
+            self._buf.append(y)
+            self._sy += y
+        if self.count % self._resum == 0:
+            self._sy = math.fsum(self._buf)
+            self._sxy = math.fsum(i * v for i, v in enumerate(self._buf))
+        if len(self._buf) < n:
+            return NAN
+        return (n * self._sxy - self._sx * self._sy) / self._div
+
+    @property
+    def slope_norm(self) -> float:
+        if len(self._buf) < self.period:
+            return NAN
+        mean = self._sy / self.period
+        return self.value / (mean if mean != 0 else 1.0)
@@ -0,0 +1,222 @@
+"""
+Compressed monthly archive for long kline histories.
+
+One file per symbol / interval / calendar month (UTC):
+    data/archive/<SYMBOL>/<SYMBOL>_<interval>_<YYYY-MM>.kla      (delta_codec block)
+
+- timestamps are not stored: the month has a fixed grid start_ms + i * step_ms and a bit mask marks
+  which grid rows exist (exchange outages stay visible as missing rows)
+- prices are int64 tick multiples: close is delta-encoded, open / high / low are stored as small
+  offsets (o - previous close, h - max(o, c), min(o, c) - l), mostly zeros
+- volume-like columns are int ticks, num_trades is delta-encoded; everything is zstd-compressed
+- a month is decoded straight into NumPy arrays (read_month); load_archive() stitches the months
+  of a range into the same frame layout as backtest_engine/init.read_ohlc_csv (UTC open_time index)
+
+    python kline_archive.py data/BTCUSDT_1m_....csv     # archive a CSV and print size / read timings
+"""
+
+import os
+import re
+import glob
+
+import numpy as np
+import pandas as pd
+
+from delta_codec import encode_ints, encode_bools, write_block, read_block, read_header
+from get_history_1 import _interval_to_millis
+
+PRICE_COLS = ("open", "high", "low", "close")
+AMOUNT_COLS = ("volume", "quote_asset_volume", "taker_buy_base", "taker_buy_quote")
+_FNAME_RE = re.compile(r"^(?P<symbol>[A-Z0-9]+)_(?P<interval>\d+[mhdwM])_")
+
+
+def archive_dir(symbol: str, out_dir: str = None) -> str:
+    return os.path.join(out_dir or os.path.join(os.getcwd(), "data", "archive"), symbol.upper())
+
+
+def month_file(symbol: str, interval: str, month: str, out_dir: str = None) -> str:
+    return os.path.join(archive_dir(symbol, out_dir), f"{symbol.upper()}_{interval}_{month}.kla")
+
+
+def infer_decimals(values: np.ndarray, max_dec: int = 10) -> int:
+    """Smallest number of decimals that represents every value exactly (float noise tolerated)."""
+    v = np.asarray(values, dtype=np.float64)
+    v = v[np.isfinite(v)]
+    tol = 1e-13 * np.maximum(np.abs(v), 1.0)
+    for d in range(max_dec + 1):
+        if np.all(np.abs(np.rint(v * 10.0**d) / 10.0**d - v) <= tol):
+            return d
+    return max_dec
+
+
+def _month_bounds(month_start: pd.Timestamp):
+    nxt = month_start + pd.offsets.MonthBegin(1)
+    return int(month_start.value // 10**6), int(nxt.value // 10**6)
+
+
+def write_month(path: str, interval: str, open_ms: np.ndarray, cols: dict):
+    """open_ms: sorted unique epoch-ms of one month; cols: {name: float / int array} aligned with open_ms."""
+    step = _interval_to_millis(interval)
+    month_start = pd.Timestamp(int(open_ms[0]), unit="ms", tz="UTC").tz_localize(None).to_period("M").to_timestamp().tz_localize("UTC")
+    start_ms, end_ms = _month_bounds(month_start)
+    n_grid = (end_ms - start_ms + step - 1) // step
+    if ((open_ms - start_ms) % step).any():
+        raise ValueError(f"{path}: open_time not aligned to {interval}")
+    mask = np.zeros(n_grid, dtype=bool)
+    mask[(open_ms - start_ms) // step] = True
+
+    meta = {"interval": interval, "start_ms": start_ms, "step_ms": step, "n_grid": int(n_grid),
+            "rows": int(len(open_ms)), "first_ms": int(open_ms[0]), "last_ms": int(open_ms[-1]), "scale": {}}
+    blocks = {"mask": encode_bools(mask)}
+
+    dec = max(infer_decimals(cols[c]) for c in PRICE_COLS)
+    meta["scale"]["price"] = dec
+    o, h, l, c = (np.rint(np.asarray(cols[k], dtype=np.float64) * 10.0**dec).astype(np.int64) for k in PRICE_COLS)
+    blocks["close"] = encode_ints(c)
+    c_prev = np.r_[c[:1], c[:-1]]
+    blocks["open_off"] = encode_ints(o - c_prev, delta=False)
+    blocks["high_off"] = encode_ints(h - np.maximum(o, c), delta=False)
+    blocks["low_off"] = encode_ints(np.minimum(o, c) - l, delta=False)
+
+    for k in AMOUNT_COLS:
+        if k in cols:
+            d = infer_decimals(cols[k])
+            meta["scale"][k] = d
+            blocks[k] = encode_ints(np.rint(np.asarray(cols[k], dtype=np.float64) * 10.0**d).astype(np.int64), delta=False)
+    if "num_trades" in cols:
+        blocks["num_trades"] = encode_ints(np.asarray(cols["num_trades"], dtype=np.int64))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    write_block(tmp, blocks, meta=meta)
+    os.replace(tmp, path)
+
+
+def read_month(path: str, columns=None) -> dict:
+    """
+    Decode one month into NumPy arrays:
+    {'open_time': int64 ms, 'open','high','low','close', <amount cols>: float64, 'num_trades': int64,
+     'mask': bool grid mask}. columns: optional subset of value columns to decode.
+    """
+    meta = read_header(path)["meta"]
+    want = None
+    if columns is not None:
+        want = {"mask"}
+        if any(c in PRICE_COLS for c in columns):
+            want |= {"close", "open_off", "high_off", "low_off"}
+        want |= {c for c in columns if c not in PRICE_COLS}
+    meta, blk = read_block(path, names=want)
+    mask = blk["mask"]
+    out = {"open_time": meta["start_ms"] + meta["step_ms"] * np.flatnonzero(mask).astype(np.int64), "mask": mask}
+    if "close" in blk:
+        scale = 10.0 ** meta["scale"]["price"]       # divide, not * 10**-d: exact for tick multiples
+        c = blk["close"]
+        o = np.r_[c[:1], c[:-1]] + blk["open_off"]
+        out["open"] = o / scale
+        out["high"] = (np.maximum(o, c) + blk["high_off"]) / scale
+        out["low"] = (np.minimum(o, c) - blk["low_off"]) / scale
+        out["close"] = c / scale
+    for k in AMOUNT_COLS:
+        if k in blk:
+            out[k] = blk[k] / 10.0 ** meta["scale"][k]
+    if "num_trades" in blk:
+        out["num_trades"] = blk["num_trades"]
+    if columns is not None:
+        out = {k: v for k, v in out.items() if k in ("open_time", "mask") or k in columns}
+    return out
+
+
+def _read_csv_ms(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path).rename(columns=str.lower)
+    ot = df["open_time"]
+    if not pd.api.types.is_integer_dtype(ot):
+        df["open_time"] = pd.DatetimeIndex(pd.to_datetime(ot, utc=True)).as_unit("ms").asi8
+    return df.drop_duplicates("open_time", keep="last").sort_values("open_time", kind="stable")
+
+
+def archive_csv(csv_path: str, symbol: str = None, interval: str = None, out_dir: str = None) -> list:
+    """
+    Split a kline CSV (int ms or tz-string open_time) into monthly archive files. Months that already
+    exist are merged (rows from the CSV win). Returns the written paths.
+    """
+    if symbol is None or interval is None:
+        m = _FNAME_RE.match(os.path.basename(csv_path))
+        if m is None:
+            raise ValueError(f"Cannot infer symbol / interval from '{csv_path}', pass them explicitly")
+        symbol, interval = symbol or m["symbol"], interval or m["interval"]
+
+    df = _read_csv_ms(csv_path)
+    ms = df["open_time"].to_numpy(np.int64)
+    months = pd.to_datetime(ms, unit="ms").to_period("M")
+    paths = []
+    for month in months.unique():
+        sel = (months == month)
+        part = df[sel]
+        path = month_file(symbol, interval, str(month), out_dir)
+        if os.path.exists(path):
+            old = read_month(path)
+            old.pop("mask")
+            old = pd.DataFrame(old)
+            part = (pd.concat([old, part[[c for c in part.columns if c in old.columns]]], ignore_index=True)
+                    .drop_duplicates("open_time", keep="last").sort_values("open_time"))
+        cols = {c: part[c].to_numpy() for c in PRICE_COLS + AMOUNT_COLS + ("num_trades",) if c in part.columns}
+        write_month(path, interval, part["open_time"].to_numpy(np.int64), cols)
+        paths.append(path)
+    return paths
+
+
+def load_archive(symbol: str, interval: str, start=None, end=None, out_dir: str = None, columns=None) -> pd.DataFrame:
+    """Rows of [start, end] (inclusive; naive = UTC) as a DataFrame indexed by open_time (UTC)."""
+    def to_ms(t):
+        ts = pd.Timestamp(t)
+        return int((ts.tz_localize("UTC") if ts.tzinfo is None else ts).value // 10**6)
+
+    lo = None if start is None else to_ms(start)
+    hi = None if end is None else to_ms(end)
+    parts = []
+    for path in sorted(glob.glob(os.path.join(archive_dir(symbol, out_dir), f"{symbol.upper()}_{interval}_*.kla"))):
+        m0 = pd.Timestamp(path[-11:-4] + "-01", tz="UTC")
+        m_lo, m_hi = _month_bounds(m0)
+        if (lo is not None and m_hi <= lo) or (hi is not None and m_lo > hi):
+            continue            # random access: untouched months are never opened
+        arr = read_month(path, columns)
+        t = arr.pop("open_time")
+        arr.pop("mask")
+        i = 0 if lo is None else np.searchsorted(t, lo, side="left")
+        j = len(t) if hi is None else np.searchsorted(t, hi, side="right")
+        parts.append(pd.DataFrame({k: v[i:j] for k, v in arr.items()},
+                                  index=pd.DatetimeIndex(pd.to_datetime(t[i:j], unit="ms", utc=True), name="open_time")))
+    if not parts:
+        return pd.DataFrame(index=pd.DatetimeIndex([], tz="UTC", name="open_time"))
+    return parts[0] if len(parts) == 1 else pd.concat(parts)
+
+
+def missing_rows(path: str) -> np.ndarray:
+    """Epoch-ms of grid rows absent from one month (cheap: only the mask column is decoded)."""
+    meta = read_header(path)["meta"]
+    _, blk = read_block(path, names={"mask"})
+    idx = np.flatnonzero(~blk["mask"]).astype(np.int64)
+    t = meta["start_ms"] + meta["step_ms"] * idx
+    return t[(t >= meta["first_ms"]) & (t <= meta["last_ms"])]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    csv = sys.argv[1]
+    t0 = time.perf_counter()
+    written = archive_csv(csv)
+    print(f"Archived {csv} -> {len(written)} month file(s) in {time.perf_counter() - t0:.2f}s")
+    csv_size = os.path.getsize(csv)
+    kla_size = sum(os.path.getsize(p) for p in written)
+    print(f"Size: CSV {csv_size / 1e6:.1f} MB -> archive {kla_size / 1e6:.2f} MB ({csv_size / kla_size:.1f}x smaller)")
+
+    m = _FNAME_RE.match(os.path.basename(csv))
+    t0 = time.perf_counter()
+    pd.read_csv(csv)
+    t_csv = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    df = load_archive(m["symbol"], m["interval"])
+    t_kla = time.perf_counter() - t0
+    print(f"Read: CSV {t_csv * 1000:.0f} ms | archive {t_kla * 1000:.0f} ms ({len(df)} rows)")
@@ -0,0 +1,314 @@
+"""
+Local order book from one REST snapshot + the <symbol>@depth@100ms diff stream (USDⓈ-M Futures).
+
+Sync rules (Binance "How to manage a local order book correctly"):
+1. buffer stream events, fetch a REST snapshot (lastUpdateId)
+2. drop events with u < lastUpdateId
+3. the first applied event must satisfy U <= lastUpdateId <= u
+4. afterwards every event's pu must equal the previous event's u, otherwise resync from step 1
+5. qty == 0 removes the price level
+
+Each side is kept as two parallel lists sorted by price ascending (best bid = last, best ask = first);
+a level is located with bisect (O(log n)); a new / removed level is a list insert / del, i.e. a
+memmove of the levels after it (O(n), but n <= a few thousand floats, so it stays in the µs range).
+There is no re-sorting and no DataFrame per update.
+
+Snapshots (REST weight 20 at limit=1000) are rate limited: while the book is out of sync, events
+are buffered and at most one snapshot request is in flight; it is charged to a RateBudget and a
+snapshot that turns out stale (older than the buffered stream) or a failed request backs off
+exponentially before the next one. background=True fetches on a worker thread so the websocket
+callback never blocks on REST.
+
+Network is optional: LocalOrderBook only needs a snapshot function and event dicts, so recorded
+sessions (record_path=...) can be replayed offline with replay(), see test-local-order-book.py.
+"""
+
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Optional
+
+from rate_budget import RateBudget
+
+DEPTH_LIMIT = 1000
+SNAPSHOT_WEIGHT = 20        # GET /fapi/v1/depth limit=1000
+
+
+class BookSide:
+    """Price levels of one side, sorted ascending."""
+
+    def __init__(self):
+        self.prices = []
+        self.qtys = []
+
+    def clear(self):
+        self.prices.clear()
+        self.qtys.clear()
+
+    def load(self, levels):
+        pairs = sorted((float(p), float(q)) for p, q in levels if float(q) > 0)
+        self.prices = [p for p, _ in pairs]
+        self.qtys = [q for _, q in pairs]
+
+    def update(self, price: float, qty: float):
+        i = bisect_left(self.prices, price)
+        found = i < len(self.prices) and self.prices[i] == price
+        if qty == 0:
+            if found:
+                del self.prices[i]
+                del self.qtys[i]
+        elif found:
+            self.qtys[i] = qty
+        else:
+            self.prices.insert(i, price)
+            self.qtys.insert(i, qty)
+
+    def __len__(self):
+        return len(self.prices)
+
+
+class LocalOrderBook:
+    """
+    book = LocalOrderBook('BTCUSDT', snapshot_fn=lambda: client.futures_order_book(symbol='BTCUSDT', limit=1000))
+    book.on_event(msg)   # for every depthUpdate message (raw or combined-stream {'stream', 'data'})
+    book.top(20)         # -> (bids best-first, asks best-first) as [[price, qty], ...]
+    """
+
+    def __init__(self, symbol: str, snapshot_fn: Optional[Callable[[], dict]], record_path: Optional[str] = None,
+                 max_buffer: int = 10_000, budget: RateBudget = None, background: bool = False,
+                 backoff: float = 1.0, max_backoff: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.symbol = symbol.upper()
+        self.snapshot_fn = snapshot_fn      # None: never fetch (replay feeds snapshots itself)
+        self.bids = BookSide()
+        self.asks = BookSide()
+        self.last_update_id = None      # u of the last applied event (or snapshot id)
+        self.synced = False
+        self.resyncs = 0
+        self.snapshots = 0              # snapshot requests sent
+        self.events_applied = 0
+        self.event_time = None          # E (ms) of the last applied event
+        self.budget = budget or RateBudget(rate=5.0, burst=SNAPSHOT_WEIGHT)
+        if self.budget.burst < SNAPSHOT_WEIGHT:
+            raise ValueError(f"budget burst {self.budget.burst} < snapshot weight {SNAPSHOT_WEIGHT}")
+        self.background = background
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._clock = clock
+        self._failures = 0              # stale / failed snapshots in a row
+        self._next_snapshot_at = 0.0
+        self._in_flight = False
+        self._lock = threading.RLock()
+        self._buffer = []
+        self._max_buffer = max_buffer
+        self._record = open(record_path, "a", encoding="utf-8") if record_path else None
+
+    # ---------- sync ----------
+    def _write(self, kind: str, payload: dict):
+        if self._record is not None:
+            self._record.write(json.dumps({"k": kind, "d": payload}, separators=(",", ":")) + "\n")
+
+    def _buffer_event(self, ev: dict):
+        self._buffer.append(ev)
+        if len(self._buffer) > self._max_buffer:
+            del self._buffer[0]
+
+    def _backoff(self):
+        self._failures += 1
+        delay = min(self.max_backoff, self.backoff * 2 ** (self._failures - 1))
+        self._next_snapshot_at = self._clock() + delay
+        return delay
+
+    def request_snapshot(self):
+        """
+        Ask for a new snapshot unless one is already in flight or the backoff has not expired
+        (events keep being buffered meanwhile). Returns True if a request was started.
+        """
+        with self._lock:
+            if self.snapshot_fn is None or self._in_flight or self._clock() < self._next_snapshot_at:
+                return False
+            self._in_flight = True
+            self.snapshots += 1
+        if self.background:
+            threading.Thread(target=self._fetch_snapshot, name=f"{self.symbol}-snapshot", daemon=True).start()
+        else:
+            self._fetch_snapshot()
+        return True
+
+    def _fetch_snapshot(self):
+        try:
+            self.budget.acquire(SNAPSHOT_WEIGHT)
+            snap = self.snapshot_fn()
+        except Exception as e:
+            with self._lock:
+                self._in_flight = False
+                delay = self._backoff()
+            self.budget.penalize(delay)
+            print(f"\n[LỖI] {self.symbol} snapshot: {e} -> retry in {delay:.1f}s")
+            return
+        with self._lock:
+            self._in_flight = False
+            self.apply_snapshot(snap)
+
+    def apply_snapshot(self, snap: dict):
+        """Load a snapshot and replay the buffered events on top of it."""
+        with self._lock:
+            self._write("snapshot", snap)
+            self.bids.load(snap["bids"])
+            self.asks.load(snap["asks"])
+            self.last_update_id = int(snap["lastUpdateId"])
+            self.synced = False
+            buffered, self._buffer = self._buffer, []
+            for ev in buffered:
+                self._apply_or_buffer(ev, allow_resync=False)
+            if self.synced:
+                self._failures = 0
+                self._next_snapshot_at = 0.0
+            elif self._buffer:
+                self._backoff()          # stale snapshot: the stream is already past it
+
+    def resync(self):
+        """Drop the book state and rebuild it from a new snapshot + the buffered events."""
+        with self._lock:
+            self.synced = False
+            self.resyncs += 1
+        self.request_snapshot()
+
+    def reset(self):
+        """Forget everything (e.g. after a websocket error); the next event starts a fresh sync."""
+        with self._lock:
+            self.synced, self.last_update_id, self._buffer = False, None, []
+
+    def on_event(self, msg: dict):
+        ev = msg.get("data", msg)
+        if ev.get("e") not in (None, "depthUpdate"):
+            return
+        with self._lock:
+            self._write("diff", ev)
+            if self.last_update_id is None:
+                # no snapshot yet: buffer until one arrives
+                self._buffer_event(ev)
+                start = True
+            else:
+                start = self._apply_or_buffer(ev)
+        if start:
+            self.request_snapshot()
+
+    def _apply_or_buffer(self, ev: dict, allow_resync: bool = True) -> bool:
+        """Apply one event; returns True when a new snapshot is needed."""
+        U, u = int(ev["U"]), int(ev["u"])
+        if not self.synced:
+            if u < self.last_update_id:
+                return False                    # already contained in the snapshot
+            if U > self.last_update_id:
+                # snapshot is older than the stream: keep the event and wait for a newer snapshot
+                self._buffer_event(ev)
+                return allow_resync
+            self.synced = True
+        elif int(ev.get("pu", self.last_update_id)) != self.last_update_id:
+            # gap in the stream -> rebuild from a new snapshot
+            self.synced = False
+            self.resyncs += 1
+            self._buffer = [ev]
+            return allow_resync
+
+        for p, q in ev.get("b", ()):
+            self.bids.update(float(p), float(q))
+        for p, q in ev.get("a", ()):
+            self.asks.update(float(p), float(q))
+        self.last_update_id = u
+        self.event_time = ev.get("E")
+        self.events_applied += 1
+        return False
+
+    # ---------- views ----------
+    def top(self, n: int = 20):
+        bids = [[p, q] for p, q in zip(self.bids.prices[:-n - 1:-1], self.bids.qtys[:-n - 1:-1])]
+        asks = [[p, q] for p, q in zip(self.asks.prices[:n], self.asks.qtys[:n])]
+        return bids, asks
+
+    @property
+    def best_bid(self):
+        return self.bids.prices[-1] if self.bids.prices else None
+
+    @property
+    def best_ask(self):
+        return self.asks.prices[0] if self.asks.prices else None
+
+    @property
+    def mid(self):
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    def close(self):
+        if self._record is not None:
+            self._record.close()
+            self._record = None
+
+
+def replay(path: str, symbol: str = None, on_update: Callable[[LocalOrderBook], None] = None) -> LocalOrderBook:
+    """
+    Rebuild a book from a session recorded with record_path=..., without network.
+    Snapshots are applied at the position they were recorded (when the live book loaded them),
+    so a replay goes through the same buffering / resyncs as the live session.
+    """
+    book = LocalOrderBook(symbol or "", snapshot_fn=None)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            r = json.loads(line)
+            if r["k"] == "snapshot":
+                book.apply_snapshot(r["d"])
+                continue
+            book.on_event(r["d"])
+            if on_update is not None and book.synced:
+                on_update(book)
+    return book
+
+
+def run_local_book(symbol: str, client, record_levels: int = None, record_path: str = None,
+                   on_update: Callable[[LocalOrderBook], None] = None, budget: RateBudget = None):
+    """
+    Live mode: python-binance ThreadedWebsocketManager streams <symbol>@depth@100ms into a LocalOrderBook.
+    record_levels: also write top-N snapshots (every update, 100ms) with orderbook_recorder.OrderBookRecorder.
+    budget: RateBudget shared with other REST users of the same IP (burst >= SNAPSHOT_WEIGHT).
+    Blocks until Ctrl+C.
+    """
+    from binance import ThreadedWebsocketManager
+
+    book = LocalOrderBook(symbol, lambda: client.futures_order_book(symbol=symbol.upper(), limit=DEPTH_LIMIT),
+                          record_path=record_path, budget=budget, background=True)
+    recorder = None
+    if record_levels:
+        from orderbook_recorder import OrderBookRecorder
+        recorder = OrderBookRecorder(symbol, levels=record_levels)
+
+    def handle(msg):
+        if msg.get("e") == "error":
+            print(f"\n[LỖI] WebSocket: {msg}")
+            book.reset()    # rebuild on the next event
+            return
+        book.on_event(msg)
+        if not book.synced:
+            return
+        if recorder is not None:
+            bids, asks = book.top(record_levels)
+            recorder.write(int(book.event_time or time.time() * 1000), bids, asks, book.last_update_id)
+        if on_update is not None:
+            on_update(book)
+
+    twm = ThreadedWebsocketManager()
+    twm.start()
+    twm.start_futures_multiplex_socket(callback=handle, streams=[f"{symbol.lower()}@depth@100ms"])
+    try:
+        twm.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        twm.stop()
+        book.close()
+        if recorder is not None:
+            recorder.close()
+    return book
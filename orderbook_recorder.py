@@ -0,0 +1,208 @@
+"""
+Order-book depth recorder with a compact fixed-width binary format.
+
+File layout (little endian), one file per symbol per UTC hour:
+    data/orderbook/<SYMBOL>/<SYMBOL>_d<N>_<YYYYMMDD>_<HH>.obk
+    header  16 bytes : b'OBK1' | uint32 levels | 8 bytes reserved
+    records N levels : int64 ts (epoch-ms UTC) | int64 last_update_id
+                       float32 bid_px[N] | float32 bid_qty[N] | float32 ask_px[N] | float32 ask_qty[N]
+Missing levels (thin book) are NaN. float32 keeps ~7 significant digits (0.01 at 100k), enough for
+liquidity / slippage studies; exact prices stay in the exchange feed.
+
+Reading never builds DataFrames: open_records() returns an np.memmap of structured records,
+load_range() concatenates the hourly files of a time range, and depth_metrics() / slippage()
+work on the level arrays directly.
+"""
+
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"OBK1"
+HEADER_SIZE = 16
+
+
+def record_dtype(levels: int) -> np.dtype:
+    return np.dtype([
+        ("ts", "<i8"),
+        ("last_update_id", "<i8"),
+        ("bid_px", "<f4", (levels,)),
+        ("bid_qty", "<f4", (levels,)),
+        ("ask_px", "<f4", (levels,)),
+        ("ask_qty", "<f4", (levels,)),
+    ])
+
+
+def orderbook_dir(symbol: str, out_dir: str = None) -> str:
+    return os.path.join(out_dir or os.path.join(os.getcwd(), "data", "orderbook"), symbol.upper())
+
+
+def hour_file(symbol: str, levels: int, ts_ms: int, out_dir: str = None) -> str:
+    hour = pd.Timestamp(ts_ms, unit="ms", tz="UTC").strftime("%Y%m%d_%H")
+    return os.path.join(orderbook_dir(symbol, out_dir), f"{symbol.upper()}_d{levels}_{hour}.obk")
+
+
+def _levels_to_arrays(side, levels: int):
+    """[[price, qty], ...] (strings or numbers, best first) -> float32 (px, qty) padded with NaN."""
+    px = np.full(levels, np.nan, dtype=np.float32)
+    qty = np.full(levels, np.nan, dtype=np.float32)
+    if side is not None and len(side):
+        arr = np.asarray(side[:levels], dtype=np.float64).reshape(-1, 2)
+        px[:len(arr)] = arr[:, 0]
+        qty[:len(arr)] = arr[:, 1]
+    return px, qty
+
+
+class OrderBookRecorder:
+    """
+    Append depth snapshots to hourly .obk files.
+
+        with OrderBookRecorder('BTCUSDT', levels=20) as rec:
+            rec.write(ts_ms, depth['bids'], depth['asks'], depth['lastUpdateId'])
+
+    Records are buffered and flushed every `flush_every` snapshots and on rotation / close.
+    """
+
+    def __init__(self, symbol: str, levels: int = 20, out_dir: str = None, flush_every: int = 60):
+        self.symbol = symbol.upper()
+        self.levels = int(levels)
+        self.out_dir = out_dir
+        self.flush_every = max(1, int(flush_every))
+        self.dtype = record_dtype(self.levels)
+        self._buf = np.zeros(self.flush_every, dtype=self.dtype)
+        self._n = 0
+        self._path = None
+        self._hour = None
+        self.records_written = 0
+
+    def write(self, ts_ms: int, bids, asks, last_update_id: int = 0):
+        hour = int(ts_ms) // 3_600_000
+        if hour != self._hour:
+            self.flush()
+            self._hour = hour
+            self._path = hour_file(self.symbol, self.levels, ts_ms, self.out_dir)
+            self._open_file(self._path)
+
+        rec = self._buf[self._n]
+        rec["ts"] = ts_ms
+        rec["last_update_id"] = last_update_id
+        rec["bid_px"], rec["bid_qty"] = _levels_to_arrays(bids, self.levels)
+        rec["ask_px"], rec["ask_qty"] = _levels_to_arrays(asks, self.levels)
+        self._n += 1
+        if self._n == self.flush_every:
+            self.flush()
+
+    def _open_file(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE:
+            with open(path, "wb") as f:
+                f.write(MAGIC + np.uint32(self.levels).tobytes() + bytes(8))
+            return
+        # existing file (restart within the same hour): drop a partial trailing record
+        body = os.path.getsize(path) - HEADER_SIZE
+        extra = body % self.dtype.itemsize
+        if extra:
+            with open(path, "rb+") as f:
+                f.truncate(HEADER_SIZE + body - extra)
+
+    def flush(self):
+        if self._n == 0 or self._path is None:
+            return
+        with open(self._path, "ab") as f:
+            f.write(self._buf[:self._n].tobytes())
+        self.records_written += self._n
+        self._n = 0
+
+    @property
+    def count(self) -> int:
+        """Snapshots written so far, including the ones still buffered."""
+        return self.records_written + self._n
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_records(path: str) -> np.memmap:
+    """Memory-map one .obk file as a structured array (read-only, no copy)."""
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if header[:4] != MAGIC:
+        raise ValueError(f"{path}: not an order-book record file")
+    levels = int(np.frombuffer(header[4:8], dtype="<u4")[0])
+    dtype = record_dtype(levels)
+    n = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(n,))
+
+
+def load_range(symbol: str, start=None, end=None, levels: int = 20, out_dir: str = None) -> np.ndarray:
+    """Records of [start, end] (inclusive; int = epoch-ms, naive = UTC) across the hourly files, in time order."""
+    def to_ms(t):
+        if isinstance(t, (int, np.integer)):
+            return int(t)
+        ts = pd.Timestamp(t)
+        return int((ts.tz_localize("UTC") if ts.tzinfo is None else ts).value // 10**6)
+
+    lo = None if start is None else to_ms(start)
+    hi = None if end is None else to_ms(end)
+    parts = []
+    pattern = os.path.join(orderbook_dir(symbol, out_dir), f"{symbol.upper()}_d{levels}_*.obk")
+    for path in sorted(glob.glob(pattern)):
+        hour_ms = int(pd.to_datetime(path[-15:-4], format="%Y%m%d_%H", utc=True).value // 10**6)
+        if (hi is not None and hour_ms > hi) or (lo is not None and hour_ms + 3_600_000 <= lo):
+            continue
+        rec = open_records(path)
+        ts = rec["ts"]
+        i = 0 if lo is None else np.searchsorted(ts, lo, side="left")
+        j = len(ts) if hi is None else np.searchsorted(ts, hi, side="right")
+        if j > i:
+            parts.append(rec[i:j])
+    if not parts:
+        return np.zeros(0, dtype=record_dtype(levels))
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def depth_metrics(rec: np.ndarray) -> dict:
+    """Vectorized top-of-book stats per record: mid, spread, spread_bps, bid/ask depth and imbalance."""
+    best_bid = rec["bid_px"][:, 0].astype(np.float64)
+    best_ask = rec["ask_px"][:, 0].astype(np.float64)
+    mid = (best_bid + best_ask) / 2
+    bid_depth = np.nansum(rec["bid_qty"], axis=1, dtype=np.float64)
+    ask_depth = np.nansum(rec["ask_qty"], axis=1, dtype=np.float64)
+    return {
+        "ts": np.asarray(rec["ts"]),
+        "mid": mid,
+        "spread": best_ask - best_bid,
+        "spread_bps": (best_ask - best_bid) / mid * 1e4,
+        "bid_depth": bid_depth,
+        "ask_depth": ask_depth,
+        "imbalance": (bid_depth - ask_depth) / (bid_depth + ask_depth),
+    }
+
+
+def slippage(rec: np.ndarray, qty: float, side: str = "BUY") -> np.ndarray:
+    """
+    Average fill price vs. best price (in bps) for a market order of `qty` at every snapshot,
+    walking the recorded levels. NaN where the recorded depth is smaller than `qty`.
+    """
+    px_key, qty_key = ("ask_px", "ask_qty") if side.upper() == "BUY" else ("bid_px", "bid_qty")
+    px = np.asarray(rec[px_key], dtype=np.float64)
+    q = np.nan_to_num(np.asarray(rec[qty_key], dtype=np.float64))
+    cum = np.cumsum(q, axis=1)
+    prev = cum - q
+    take = np.clip(qty - prev, 0.0, q)              # qty filled at each level
+    cost = np.nansum(take * px, axis=1)
+    filled = take.sum(axis=1)
+    avg = np.where(np.isclose(filled, qty), cost / qty, np.nan)
+    best = px[:, 0]
+    sign = 1.0 if side.upper() == "BUY" else -1.0
+    return sign * (avg - best) / best * 1e4
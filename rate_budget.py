@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class RateBudget:
+    """
+    Thread-safe token bucket shared by all download workers.
+    Binance limits REST weight per IP, not per symbol, so concurrent fetchers must draw
+    from one budget: `rate` tokens are refilled per second up to `burst`.
+
+        budget = RateBudget(rate=5, burst=10)
+        budget.acquire()          # blocks until a token is free
+        budget.acquire(weight=5)  # heavier endpoint
+    """
+
+    def __init__(self, rate: float = 5.0, burst: float = 10.0):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be > 0")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, weight: float = 1.0):
+        """Take `weight` tokens, sleeping (outside the lock) until they are available."""
+        if weight > self.burst:
+            raise ValueError(f"weight {weight} exceeds burst {self.burst}")
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = (weight - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Drain the bucket after a 429/418 so every worker backs off, not only the one that was hit."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
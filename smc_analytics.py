@@ -0,0 +1,324 @@
+"""
+Vectorized SMC analytics (swings, BOS / CHoCH, order blocks, fair value gaps) on OHLC arrays.
+Same rules as SMC.py, but without per-bar Python loops, so years of 1m bars take milliseconds
+and strategies get plain numpy arrays aligned to the input bars:
+
+- detect_swings(high, low, left, right): a bar is a swing high when it is the unique maximum of
+  the window [i - left, i + right] (sliding_window_view, one comparison per window column
+  across all bars at once); same for lows
+- structure(high, low, swing_high, swing_low): every swing high is compared with the previous
+  swing high (higher -> BOS_up, else CHoCH_down), every swing low with the previous swing low
+  (lower -> BOS_down, else CHoCH_up)
+- last_candle_index(open, close, bullish): for each bar, index of the last bullish / bearish candle
+  at or before it (-1 if none), so an order block origin is one lookup instead of a backward walk
+- order_blocks(...): bullish OB = last bearish candle before a BOS_up, bearish OB = last bullish
+  candle before a BOS_down
+- fair_value_gaps(high, low): bull gap low[i] > high[i-1], bear gap high[i] < low[i-1]
+  (shifted-array comparisons; the last bar is not evaluated, as in SMC.py)
+- analyze(df): all of the above for a DataFrame with open/high/low/close columns
+- SMCTracker: the same structure kept live, one update(bar) per closed candle (see its docstring)
+
+Note: a swing needs `right` bars after it, so swing / BOS arrays at bar i are only known at
+bar i + right; shift them by `right` before using them as live entry conditions.
+See test-smc-analytics.py (parity with the SMC.py loops + timing).
+"""
+
+import heapq
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BULL, BEAR = 1, -1
+
+
+def _unique_extreme(x: np.ndarray, left: int, right: int, is_max: bool) -> np.ndarray:
+    n = len(x)
+    w = left + right + 1
+    out = np.zeros(n, dtype=bool)
+    if n < w:
+        return out
+    win = sliding_window_view(x, w)                 # (n - w + 1, w), row k = bars k .. k + w - 1
+    center = win[:, left]
+    # unique max (min) of the window == strictly above (below) every other bar of it
+    ok = np.ones(len(center), dtype=bool)
+    for k in range(w):
+        if k != left:
+            ok &= (center > win[:, k]) if is_max else (center < win[:, k])
+    out[left:n - right] = ok
+    return out
+
+
+def detect_swings(high, low, left: int = 2, right: int = 2):
+    """-> (swing_high, swing_low) boolean arrays."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    return _unique_extreme(high, left, right, True), _unique_extreme(low, left, right, False)
+
+
+def structure(high, low, swing_high, swing_low) -> dict:
+    """BOS / CHoCH flags per bar: {'bos_up', 'choch_down', 'bos_down', 'choch_up'} boolean arrays."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(high)
+    out = {k: np.zeros(n, dtype=bool) for k in ('bos_up', 'choch_down', 'bos_down', 'choch_up')}
+
+    ih = np.flatnonzero(swing_high)
+    if len(ih) > 1:
+        higher = high[ih[1:]] > high[ih[:-1]]
+        out['bos_up'][ih[1:][higher]] = True
+        out['choch_down'][ih[1:][~higher]] = True
+
+    il = np.flatnonzero(swing_low)
+    if len(il) > 1:
+        lower = low[il[1:]] < low[il[:-1]]
+        out['bos_down'][il[1:][lower]] = True
+        out['choch_up'][il[1:][~lower]] = True
+    return out
+
+
+def last_candle_index(open_, close, bullish: bool) -> np.ndarray:
+    """Index of the last strictly bullish (close > open) / bearish (close < open) candle <= i, else -1."""
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    hit = close > open_ if bullish else close < open_
+    return np.maximum.accumulate(np.where(hit, np.arange(len(close)), -1)) if len(close) else np.zeros(0, dtype=np.int64)
+
+
+def order_blocks(open_, high, low, close, bos_up, bos_down) -> dict:
+    """
+    Order blocks, one per BOS (BOS without an opposite candle before it is skipped), in bar order
+    of the BOS (BOS_up before BOS_down on the same bar, as SMC.py):
+    {'bos_idx', 'idx' (OB candle), 'side' (+1 bull / -1 bear), 'high', 'low'} arrays.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    last_bear = last_candle_index(open_, close, bullish=False)
+    last_bull = last_candle_index(open_, close, bullish=True)
+
+    up = np.flatnonzero(bos_up)
+    dn = np.flatnonzero(bos_down)
+    j_up = np.where(up > 0, last_bear[np.maximum(up - 1, 0)], -1)
+    j_dn = np.where(dn > 0, last_bull[np.maximum(dn - 1, 0)], -1)
+
+    bos_idx = np.concatenate([up, dn])
+    idx = np.concatenate([j_up, j_dn])
+    side = np.concatenate([np.full(len(up), BULL, dtype=np.int8), np.full(len(dn), BEAR, dtype=np.int8)])
+    order = np.lexsort((-side, bos_idx))           # by BOS bar, bull first
+    keep = idx[order] >= 0
+    bos_idx, idx, side = bos_idx[order][keep], idx[order][keep], side[order][keep]
+    return {'bos_idx': bos_idx, 'idx': idx, 'side': side, 'high': high[idx], 'low': low[idx]}
+
+
+def fair_value_gaps(high, low) -> dict:
+    """
+    {'bull', 'bear'} boolean masks per bar plus the gap bounds ('bull_low', 'bull_high',
+    'bear_low', 'bear_high'; NaN where there is no gap).
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(high)
+    bull = np.zeros(n, dtype=bool)
+    bear = np.zeros(n, dtype=bool)
+    if n >= 3:
+        bull[1:n - 1] = low[1:n - 1] > high[:n - 2]
+        bear[1:n - 1] = high[1:n - 1] < low[:n - 2]
+    prev_high = np.r_[np.nan, high[:-1]] if n else high
+    prev_low = np.r_[np.nan, low[:-1]] if n else low
+    return {
+        'bull': bull, 'bear': bear,
+        'bull_low': np.where(bull, prev_high, np.nan), 'bull_high': np.where(bull, low, np.nan),
+        'bear_low': np.where(bear, high, np.nan), 'bear_high': np.where(bear, prev_low, np.nan),
+    }
+
+
+def analyze(df, left: int = 2, right: int = 2) -> dict:
+    """
+    Everything for one OHLC DataFrame:
+    {'swing_high', 'swing_low', 'bos_up', 'choch_down', 'bos_down', 'choch_up',
+     'fvg_bull', 'fvg_bear', ... gap bounds ..., 'order_blocks': {...}}
+    Per-bar arrays have len(df) and follow the row order of df.
+    """
+    o, h, l, c = (df[col].to_numpy(dtype=np.float64) for col in ("open", "high", "low", "close"))
+    sw_high, sw_low = detect_swings(h, l, left, right)
+    out = {'swing_high': sw_high, 'swing_low': sw_low}
+    out.update(structure(h, l, sw_high, sw_low))
+    fvg = fair_value_gaps(h, l)
+    out['fvg_bull'], out['fvg_bear'] = fvg.pop('bull'), fvg.pop('bear')
+    out.update({f'fvg_{k}': v for k, v in fvg.items()})
+    out['order_blocks'] = order_blocks(o, h, l, c, out['bos_up'], out['bos_down'])
+    return out
+
+
+# ---------- streaming ----------
+def _field(bar, name: str) -> float:
+    try:
+        return float(bar[name])
+    except (TypeError, KeyError, IndexError):
+        return float(getattr(bar, name))
+
+
+class SMCTracker:
+    """
+    Live SMC structure, updated once per closed candle in O(1) amortized time (zone heaps add
+    O(log max_zones) per new zone):
+    - a deque of the last left + right + 1 bars confirms the swing `right` bars after it
+      (same unique-extreme rule as detect_swings), then BOS / CHoCH against the previous swing
+    - each bar in the deque remembers the last bullish / bearish candle before it (and the extreme
+      close since that candle), so the order block of a BOS is known without walking back, and an
+      OB already broken before its swing was confirmed is reported but not kept active
+    - active zones (unfilled FVGs, unbroken OBs) sit in min / max heaps keyed by the price that
+      invalidates them; a new bar pops only the zones it kills (each zone is pushed and popped once)
+        bull FVG filled: low <= gap low      bear FVG filled: high >= gap high
+        bull OB broken:  close < OB low      bear OB broken:  close > OB high
+    - at most `max_zones` zones are kept (oldest dropped first)
+
+        smc = SMCTracker()
+        for row in df.itertuples(): smc.update(row, time=row.Index)   # seed from history
+        events = smc.update(new_bar)       # [{'event': 'BOS_up', 'idx': ..}, {'event': 'ob', 'zone': {..}}, ..]
+        smc.active_fvgs(), smc.active_order_blocks()
+
+    Events and zones match analyze() on the same bars (test-smc-analytics.py); FVGs are reported
+    on the bar that closes them, including the latest one.
+    """
+
+    def __init__(self, left: int = 2, right: int = 2, max_zones: int = 500):
+        self.left, self.right = left, right
+        self.max_zones = max_zones
+        self.n = 0                              # bars seen; also the index of the next bar
+        self.window = deque(maxlen=left + right + 1)
+        self.last_peak = None                   # (idx, high) of the last swing high
+        self.last_valley = None                 # (idx, low) of the last swing low
+        self._last_bull = None                  # last close > open candle: (idx, high, low, time)
+        self._last_bear = None
+        self._bull_max_close = -np.inf          # highest close after _last_bull (breaks a bearish OB)
+        self._bear_min_close = np.inf           # lowest close after _last_bear (breaks a bullish OB)
+        self._prev = None                       # previous bar (high, low)
+        self.zones = {}                         # id -> zone dict, only active zones
+        self._age = deque()                     # zone ids in creation order (may hold dead ids)
+        self._heaps = {('fvg', BULL): [], ('fvg', BEAR): [], ('ob', BULL): [], ('ob', BEAR): []}
+        self._next_id = 0
+
+    # ---------- zones ----------
+    def _add_zone(self, kind, side, idx, low, high, time, active=True):
+        zid = self._next_id
+        self._next_id += 1
+        zone = {'id': zid, 'kind': kind, 'side': side, 'idx': idx, 'low': low, 'high': high, 'time': time}
+        if not active:
+            return zone
+        self.zones[zid] = zone
+        self._age.append(zid)
+        # bull zones die when price falls below them (max-heap on low), bear zones when it rises above
+        heapq.heappush(self._heaps[(kind, side)], (-low, zid) if side == BULL else (high, zid))
+        while len(self.zones) > self.max_zones:
+            old = self._age.popleft()
+            self.zones.pop(old, None)
+        if len(self._age) + sum(len(h) for h in self._heaps.values()) > 3 * len(self.zones) + 64:
+            self._compact()
+        return zone
+
+    def _compact(self):
+        """Drop heap / age entries of zones that are no longer active (keeps memory bounded)."""
+        for heap in self._heaps.values():
+            heap[:] = [e for e in heap if e[1] in self.zones]
+            heapq.heapify(heap)
+        self._age = deque(z for z in self._age if z in self.zones)
+
+    def _invalidate(self, kind, side, probe: float, inclusive: bool):
+        heap = self._heaps[(kind, side)]
+        dead = []
+        while heap:
+            key, zid = heap[0]
+            if zid not in self.zones:           # evicted earlier
+                heapq.heappop(heap)
+                continue
+            if side == BULL:
+                hit = probe <= -key if inclusive else probe < -key
+            else:
+                hit = probe >= key if inclusive else probe > key
+            if not hit:
+                break
+            heapq.heappop(heap)
+            dead.append(self.zones.pop(zid))
+        return dead
+
+    # ---------- per bar ----------
+    def update(self, bar, time=None) -> list:
+        """Apply one closed candle (mapping / row / object with open, high, low, close) -> new events."""
+        o, h, l, c = (_field(bar, k) for k in ('open', 'high', 'low', 'close'))
+        i = self.n
+        self.n += 1
+        events = []
+
+        # 1) existing zones invalidated by this bar
+        for z in self._invalidate('fvg', BULL, l, True) + self._invalidate('fvg', BEAR, h, True):
+            events.append({'event': 'fvg_filled', 'idx': i, 'zone': z})
+        for z in self._invalidate('ob', BULL, c, False) + self._invalidate('ob', BEAR, c, False):
+            events.append({'event': 'ob_broken', 'idx': i, 'zone': z})
+
+        # 2) swing confirmation for the bar `right` bars back
+        self.window.append((i, h, l, c, self._last_bull, self._bull_max_close, self._last_bear, self._bear_min_close))
+        if len(self.window) == self.window.maxlen:
+            events.extend(self._confirm_swing())
+
+        # 3) FVG between this bar and the previous one
+        if self._prev is not None:
+            ph, pl = self._prev
+            if l > ph:
+                events.append({'event': 'fvg', 'idx': i, 'zone': self._add_zone('fvg', BULL, i, ph, l, time)})
+            if h < pl:
+                events.append({'event': 'fvg', 'idx': i, 'zone': self._add_zone('fvg', BEAR, i, h, pl, time)})
+        self._prev = (h, l)
+
+        self._bull_max_close = max(self._bull_max_close, c)
+        self._bear_min_close = min(self._bear_min_close, c)
+        if c > o:
+            self._last_bull = (i, h, l, time)
+            self._bull_max_close = -np.inf
+        elif c < o:
+            self._last_bear = (i, h, l, time)
+            self._bear_min_close = np.inf
+        return events
+
+    def _confirm_swing(self) -> list:
+        win = self.window
+        idx, ch, cl, _, last_bull, bull_max, last_bear, bear_min = win[self.left]
+        others = [b for k, b in enumerate(win) if k != self.left]
+        later = [b[3] for b in list(win)[self.left:]]        # closes from the swing bar to now
+        events = []
+        if all(ch > b[1] for b in others):
+            events.append({'event': 'swing_high', 'idx': idx, 'price': ch})
+            if self.last_peak is not None:
+                if ch > self.last_peak[1]:
+                    events.append({'event': 'BOS_up', 'idx': idx})
+                    if last_bear is not None:
+                        j, oh, ol, t = last_bear
+                        alive = min(bear_min, *later) >= ol
+                        events.append({'event': 'ob', 'idx': idx,
+                                       'zone': self._add_zone('ob', BULL, j, ol, oh, t, active=alive)})
+                else:
+                    events.append({'event': 'CHoCH_down', 'idx': idx})
+            self.last_peak = (idx, ch)
+        if all(cl < b[2] for b in others):
+            events.append({'event': 'swing_low', 'idx': idx, 'price': cl})
+            if self.last_valley is not None:
+                if cl < self.last_valley[1]:
+                    events.append({'event': 'BOS_down', 'idx': idx})
+                    if last_bull is not None:
+                        j, oh, ol, t = last_bull
+                        alive = max(bull_max, *later) <= oh
+                        events.append({'event': 'ob', 'idx': idx,
+                                       'zone': self._add_zone('ob', BEAR, j, ol, oh, t, active=alive)})
+                else:
+                    events.append({'event': 'CHoCH_up', 'idx': idx})
+            self.last_valley = (idx, cl)
+        return events
+
+    # ---------- queries ----------
+    def active_fvgs(self, side: int = None) -> list:
+        return sorted((z for z in self.zones.values() if z['kind'] == 'fvg' and side in (None, z['side'])),
+                      key=lambda z: z['idx'])
+
+    def active_order_blocks(self, side: int = None) -> list:
+        return sorted((z for z in self.zones.values() if z['kind'] == 'ob' and side in (None, z['side'])),
+                      key=lambda z: z['idx'])
@@ -80,9 +80,12 @@ def timeframe_trend(df: pd.DataFrame, price_col="close", vol_col="volume",
     return "sideway"
 
 # ---------- Aggregate market trend across timeframes ----------
-def detect_market_trend(symbol: str):
+def detect_market_trend(symbol: str, mtf: dict = None):
     """
     Detect overall market trend using 1d, 4h, 1h timeframes.
+    mtf: optional {interval: DataFrame} (e.g. from backtest_engine/mtf.py) -> use these bars
+         instead of fetching each timeframe from the API.
+    Backtests: backtest_engine/trend.py market_trend_series() gives this vote for every bar.
     Returns one of: "up", "down", "sideway"
     """
     tf_cfg = [
@@ -93,7 +96,10 @@ def detect_market_trend(symbol: str):
     votes = {"up":0, "down":0, "sideway":0}
     for interval, price_window, vol_recent in tf_cfg:
         try:
-            df = fetch_klines(symbol, interval, limit=max(200, price_window+20))
+            if mtf is not None and interval in mtf:
+                df = mtf[interval]
+            else:
+                df = fetch_klines(symbol, interval, limit=max(200, price_window+20))
             t = timeframe_trend(df, price_window=price_window, vol_recent=vol_recent, vol_prev=5, slope_thresh=0.0004)
             votes[t] += 1
         except Exception as e:
@@ -212,6 +218,124 @@ def detect_m15_crossover(symbol):
 
 
 
+# ---------- Incremental state for the live loop ----------
+class LiveIndicators:
+    """
+    O(1)-per-candle counterpart of detect_m15_crossover + detect_market_trend (incremental_indicators.py):
+    seed once from REST, then feed each closed kline instead of re-fetching 200 candles per check.
+
+        live = LiveIndicators("BTCUSDT"); live.seed()
+        live.on_kline(msg)            # kline websocket message (only closed candles are applied)
+        live.signal()                 # same dict as generate_signal()
+    """
+    TREND_CFG = (("1d", 50), ("4h", 40), ("1h", 40))   # (interval, price_window) as detect_market_trend
+
+    def __init__(self, symbol: str, vol_recent: int = 5, vol_prev: int = 5, slope_thresh: float = 0.0004):
+        from incremental_indicators import EMA, RSI, MACD, RollingMean, LinRegSlope
+        from collections import deque
+        self.symbol = symbol.upper()
+        self.slope_thresh = slope_thresh
+        self.ema7, self.ema99 = EMA(7), EMA(99)
+        self.rsi14 = RSI(14)
+        self.macd = MACD(12, 26, 9)
+        self.prev_ema = (float("nan"), float("nan"))
+        self.last_close = float("nan")
+        self.trend_tf = {}
+        for interval, window in self.TREND_CFG:
+            self.trend_tf[interval] = {
+                "slope": LinRegSlope(window),
+                "vol_recent": RollingMean(vol_recent, source="volume"),
+                "vol_prev": RollingMean(vol_prev, source="volume"),
+                "prev_hist": deque(maxlen=vol_recent + 1),     # vol_prev mean `vol_recent` bars ago
+                "min_bars": max(window, vol_recent + vol_prev + 1),
+                "bars": 0,
+            }
+
+    def seed(self, mtf: dict = None):
+        """Warm up from history: mtf {interval: DataFrame} (backtest_engine/mtf.py) or the REST API."""
+        for interval in ["15m"] + [tf for tf, _ in self.TREND_CFG]:
+            if mtf is not None and interval in mtf:
+                df = mtf[interval]
+            else:
+                df = fetch_klines(self.symbol, interval, limit=200).iloc[:-1]   # drop the open candle
+            for close, volume in zip(df["close"].to_numpy(float), df["volume"].to_numpy(float)):
+                self.update(interval, {"close": close, "volume": volume})
+        return self
+
+    def update(self, interval: str, bar):
+        """Apply one closed candle (mapping / row with close + volume) of `interval`."""
+        if interval == "15m":
+            self.prev_ema = (self.ema7.value, self.ema99.value)
+            self.ema7.update(bar)
+            self.ema99.update(bar)
+            self.rsi14.update(bar)
+            self.macd.update(bar)
+            self.last_close = float(bar["close"])
+        elif interval in self.trend_tf:
+            st = self.trend_tf[interval]
+            st["slope"].update(bar)
+            st["vol_recent"].update(bar)
+            st["prev_hist"].append(st["vol_prev"].update(bar))
+            st["bars"] += 1
+
+    def on_kline(self, msg: dict):
+        """
+        python-binance kline socket message ({'k': {...}} or combined {'data': {'k': ...}}).
+        Candles of other symbols (a multiplexed socket shared by several instances) are ignored.
+        """
+        k = msg.get("data", msg).get("k")
+        if k and k.get("x") and k.get("s", self.symbol).upper() == self.symbol:
+            self.update(k["i"], {"close": float(k["c"]), "volume": float(k["v"])})
+
+    def timeframe_trend(self, interval: str) -> str:
+        st = self.trend_tf[interval]
+        if st["bars"] < st["min_bars"]:
+            return "sideway"
+        slope_norm = st["slope"].slope_norm
+        vol_trend_ok = st["vol_recent"].value >= st["prev_hist"][0]
+        if slope_norm > self.slope_thresh and vol_trend_ok:
+            return "up"
+        if slope_norm < -self.slope_thresh and vol_trend_ok:
+            return "down"
+        return "sideway"
+
+    def trend(self) -> str:
+        votes = [self.timeframe_trend(tf) for tf, _ in self.TREND_CFG]
+        if votes.count("up") >= 2:
+            return "up"
+        if votes.count("down") >= 2:
+            return "down"
+        return "sideway"
+
+    def crossover(self) -> dict:
+        prev7, prev99 = self.prev_ema
+        cur7, cur99 = self.ema7.value, self.ema99.value
+        out = {"crossover": None, "close": self.last_close, "ema7": cur7, "ema99": cur99,
+               "rsi14": self.rsi14.value, "macd": self.macd.value}
+        if prev7 <= prev99 and cur7 > cur99:
+            out["crossover"] = "BUY"
+        elif prev7 >= prev99 and cur7 < cur99:
+            out["crossover"] = "SELL"
+        return out
+
+    def signal(self, take_profit_pct: float = 0.02) -> dict:
+        """generate_signal() rules on the incremental state (no REST calls)."""
+        trend, cross = self.trend(), self.crossover()
+        if cross["crossover"] is None:
+            return {"signal": None, "reason": "No EMA crossover on M15", "trend": trend, "crossover": cross}
+        if trend == "sideway":
+            return {"signal": None, "reason": "Market is sideway on higher TFs", "trend": trend, "crossover": cross}
+        entry = cross["close"]
+        if cross["crossover"] == "BUY" and trend == "up":
+            return {"signal": "LONG", "reason": "EMA7 crossed above EMA99 on M15 and trend is UP", "entry_price": entry,
+                    "tp_price": entry * (1.0 + float(take_profit_pct)), "trend": trend, "crossover": cross}
+        if cross["crossover"] == "SELL" and trend == "down":
+            return {"signal": "SHORT", "reason": "EMA7 crossed below EMA99 on M15 and trend is DOWN", "entry_price": entry,
+                    "tp_price": entry * (1.0 - float(take_profit_pct)), "trend": trend, "crossover": cross}
+        return {"signal": None, "reason": "Crossover direction not aligned with higher-timeframe trend", "trend": trend, "crossover": cross}
+
+
+
 # ---------- Example usage ----------
 if __name__ == "__main__":
     symbol = "WLDUSDT"
@@ -0,0 +1,122 @@
+# test-aggtrades-store.py
+# Offline checks for aggtrades_store.py: chunk write -> load_trades round trip, range reads,
+# build_flow_bars / volume_profile totals, chunk ordering for delivery symbols ('_' in the name)
+# and sync_aggtrades paging / resume against a fake aggTrades endpoint (no network).
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import aggtrades_store as ats
+from rate_budget import RateBudget
+
+rng = np.random.default_rng(11)
+T0 = int(pd.Timestamp("2025-10-01", tz="UTC").value // 10**6)
+N = 25_000
+
+
+def make_trades(n, first_id=1, t0=T0):
+    t = t0 + np.cumsum(rng.integers(0, 400, n))                 # ~0.2 s apart, some equal times
+    price = 60000 + np.cumsum(rng.integers(-3, 4, n)) * 0.1
+    qty = rng.integers(1, 5000, n) / 1000
+    maker = rng.random(n) < 0.5
+    return [{"a": int(first_id + i), "p": f"{price[i]:.1f}", "q": f"{qty[i]:.3f}", "T": int(t[i]), "m": bool(maker[i])}
+            for i in range(n)]
+
+
+ROWS = make_trades(N)
+TIME = np.array([r["T"] for r in ROWS])
+PRICE = np.array([float(r["p"]) for r in ROWS])
+QTY = np.array([float(r["q"]) for r in ROWS])
+MAKER = np.array([r["m"] for r in ROWS])
+
+with tempfile.TemporaryDirectory() as d:
+    # 1) round trip through 3 chunks
+    for a, b in ((0, 10_000), (10_000, 20_000), (20_000, N)):
+        ats._write_chunk("BTCUSDT", ROWS[a:b], d)
+    tr = ats.load_trades("BTCUSDT", data_dir=d)
+    assert np.array_equal(tr["agg_id"], np.arange(1, N + 1)) and np.array_equal(tr["time"], TIME)
+    assert np.allclose(tr["price"], PRICE, rtol=0, atol=1e-9) and np.allclose(tr["qty"], QTY, rtol=0, atol=1e-12)
+    assert np.array_equal(tr["is_buyer_maker"], MAKER)
+    print(f"✅ round trip: {N} trades in 3 chunks")
+
+    # 2) range reads (inclusive, across a chunk boundary, empty window)
+    lo, hi = int(TIME[9_000]), int(TIME[12_000])
+    part = ats.load_trades("BTCUSDT", start=pd.Timestamp(lo, unit="ms", tz="UTC"), end=hi, data_dir=d)
+    want = (TIME >= lo) & (TIME <= hi)
+    assert np.array_equal(part["agg_id"], np.arange(1, N + 1)[want])
+    none = ats.load_trades("BTCUSDT", start=int(TIME[-1]) + 1, data_dir=d)
+    assert len(none["time"]) == 0 and none["price"].dtype == np.float64
+    print(f"✅ load_trades range: {int(want.sum())} trades across a chunk boundary, empty window ok")
+
+    # 3) flow bars: totals and per-bar values against pandas
+    bars = ats.build_flow_bars(tr, "1m")
+    assert abs(bars["volume"].sum() - tr["qty"].sum()) < 1e-6 and bars["trades"].sum() == N
+    assert abs(bars["buy_volume"].sum() - QTY[~MAKER].sum()) < 1e-6
+    df = pd.DataFrame({"bar": TIME // 60_000 * 60_000, "p": PRICE, "q": QTY, "pq": PRICE * QTY})
+    g = df.groupby("bar")
+    assert np.allclose(bars["vwap"].to_numpy(), (g["pq"].sum() / g["q"].sum()).to_numpy())
+    df["q_ticks"] = np.rint(QTY * 1000).astype(np.int64)             # exact sums: ties broken by price only
+    lvl = df.groupby(["bar", "p"])["q_ticks"].sum().reset_index().sort_values(["bar", "q_ticks", "p"],
+                                                                              ascending=[True, False, True])
+    assert np.allclose(bars["poc"].to_numpy(), lvl.drop_duplicates("bar")["p"].to_numpy(), rtol=0, atol=1e-6)
+    assert np.allclose(bars["delta"], bars["buy_volume"] - bars["sell_volume"])
+    print(f"✅ build_flow_bars: {len(bars)} bars, volume / buy volume / vwap / poc match")
+
+    # 4) volume profile: buckets sum back to the bars
+    vp = ats.volume_profile(tr, "1m", price_step=1.0)
+    per_bar = vp.groupby("open_time")["volume"].sum()
+    assert np.allclose(per_bar.to_numpy(), bars["volume"].to_numpy()) and (vp["price"] % 1.0 == 0).all()
+    sub = vp[vp["open_time"] == bars.index[3]]
+    in_bar = (TIME // 60_000 * 60_000) == bars.index[3].value // 10**6
+    for p_lo, v in zip(sub["price"], sub["volume"]):
+        assert abs(QTY[in_bar & (PRICE >= p_lo) & (PRICE < p_lo + 1.0)].sum() - v) < 1e-9
+    print(f"✅ volume_profile: {len(vp)} (bar, bucket) rows, totals match")
+
+with tempfile.TemporaryDirectory() as d:
+    # 5) delivery symbol: chunks written out of id order are still read / resumed by agg_id
+    sym = "BTCUSDT_250328"
+    ats._write_chunk(sym, make_trades(10, first_id=5000, t0=T0 + 100_000), d)
+    ats._write_chunk(sym, make_trades(10, first_id=100, t0=T0), d)
+    chunks = ats._chunks(sym, d)
+    assert [ats._chunk_ids(p) for p in chunks] == [(100, 109), (5000, 5009)]
+    assert np.all(np.diff(ats.load_trades(sym, data_dir=d)["agg_id"]) > 0)
+    print("✅ delivery symbol: chunks ordered by agg_id")
+
+
+class FakeExchange:
+    """aggTrades endpoint over ROWS: fromId paging, or a startTime / endTime window."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, params, budget, timeout=10, max_retries=5):
+        self.calls.append(dict(params))
+        if "fromId" in params:
+            i = params["fromId"] - 1
+            return ROWS[i:i + params["limit"]]
+        sel = [r for r in ROWS if params["startTime"] <= r["T"] <= params["endTime"]]
+        return sel[:params["limit"]]
+
+
+real_get = ats._get
+try:
+    with tempfile.TemporaryDirectory() as d:
+        budget = RateBudget(rate=1e6, burst=1e6)
+        # 6) first sync from a start time, stopping at `end`, then resume by fromId
+        ats._get = fake = FakeExchange()
+        end = int(TIME[12_345])
+        stored = ats.sync_aggtrades("BTCUSDT", start=T0, end=end, data_dir=d, budget=budget, chunk_trades=5_000)
+        n_end = int((TIME <= end).sum())
+        assert stored == n_end and "startTime" in fake.calls[0] and all("fromId" in c for c in fake.calls[1:])
+        assert [ats._chunk_ids(p) for p in ats._chunks("BTCUSDT", d)][:2] == [(1, 5000), (5001, 10000)]
+        ats._get = fake = FakeExchange()
+        stored = ats.sync_aggtrades("BTCUSDT", data_dir=d, budget=budget, chunk_trades=5_000)
+        assert fake.calls[0]["fromId"] == n_end + 1 and stored == N - n_end
+        tr = ats.load_trades("BTCUSDT", data_dir=d)
+        assert np.array_equal(tr["agg_id"], np.arange(1, N + 1)) and np.array_equal(tr["time"], TIME)
+        print(f"✅ sync_aggtrades: {n_end} trades to `end`, resumed from fromId={n_end + 1}, "
+              f"{len(fake.calls)} pages, no duplicates")
+finally:
+    ats._get = real_get
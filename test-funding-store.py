@@ -0,0 +1,115 @@
+# test-funding-store.py
+# Offline checks for funding_store.py / csv_store.py: a fake client serves funding records, then
+# sync_symbol is run on a fresh dir, a header-only file, a torn last row and a torn header,
+# and join_funding on normal and empty bars.
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from csv_store import last_key_in_csv
+from funding_store import sync_symbol, load_funding, join_funding, funding_path, FUNDING_COLUMNS
+from rate_budget import RateBudget
+
+H8 = 8 * 3600 * 1000
+T0 = int(pd.Timestamp("2025-01-01", tz="UTC").value // 10**6)
+RECORDS = [{"symbol": "BTCUSDT", "fundingTime": T0 + k * H8, "fundingRate": f"{k * 1e-5:.8f}",
+            "markPrice": f"{90000 + k}"} for k in range(2500)]
+
+
+class FakeClient:
+    """futures_funding_rate() paging like the REST endpoint (startTime inclusive, limit rows)."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def futures_funding_rate(self, symbol, startTime, limit, endTime=None):
+        self.calls += 1
+        rows = [r for r in RECORDS if r["fundingTime"] >= startTime and (endTime is None or r["fundingTime"] <= endTime)]
+        return rows[:limit]
+
+
+def sync(d, **kw):
+    return sync_symbol("BTCUSDT", budget=RateBudget(rate=1000, burst=1000), data_dir=d,
+                       start=pd.Timestamp(T0, unit="ms", tz="UTC"), client=FakeClient(), **kw)
+
+
+def stored(d):
+    return pd.read_csv(funding_path("BTCUSDT", d))["funding_time"].tolist()
+
+
+want = [r["fundingTime"] for r in RECORDS]
+with tempfile.TemporaryDirectory() as d:
+    path = funding_path("BTCUSDT", d)
+
+    # fresh file, then a no-op resume
+    assert sync(d) == len(RECORDS) and stored(d) == want
+    assert sync(d) == 0 and stored(d) == want
+    assert last_key_in_csv(path) == want[-1]
+    print(f"✅ fresh sync: {len(want)} rows, resume appends 0")
+
+    # header-only file -> treated as empty, not a parse error
+    with open(path, "w") as f:
+        f.write(",".join(FUNDING_COLUMNS) + "\n")
+    assert last_key_in_csv(path) is None
+    assert sync(d) == len(RECORDS) and stored(d) == want
+    print("✅ header-only file: re-downloaded from start")
+
+    # torn last row (killed mid-write) -> cut back to the last full row, then continued
+    with open(path, "rb") as f:
+        raw = f.read()
+    lines = raw.split(b"\n")
+    keep = b"\n".join(lines[:1001]) + b"\n" + lines[1001][:7]
+    with open(path, "wb") as f:
+        f.write(keep)
+    assert last_key_in_csv(path) == want[999]
+    assert sync(d) == len(RECORDS) - 1000 and stored(d) == want
+    print("✅ torn last row: truncated and resumed")
+
+    # header + torn first row -> header only after the cut
+    with open(path, "w") as f:
+        f.write(",".join(FUNDING_COLUMNS) + "\n" + str(want[0])[:5])
+    assert last_key_in_csv(path) is None
+    assert sync(d) == len(RECORDS) and stored(d) == want
+    # torn header (no newline at all)
+    with open(path, "w") as f:
+        f.write("funding_ti")
+    assert last_key_in_csv(path) is None
+    assert sync(d) == len(RECORDS) and stored(d) == want
+    print("✅ torn first row / torn header: file restarted")
+
+    # as-of join
+    f = load_funding("BTCUSDT", data_dir=d)
+    bars = pd.DataFrame({"close": 1.0}, index=pd.date_range(pd.Timestamp(T0, unit="ms", tz="UTC"), periods=48, freq="1h"))
+    j = join_funding(bars, f)
+    assert np.array_equal(j["funding_event"].to_numpy(), (np.arange(48) % 8) == 0)
+    assert abs(j["funding_rate"].iloc[9] - 1e-5) < 1e-12          # bar 09:00 -> settlement at 08:00
+    empty = join_funding(bars.iloc[:0], f)
+    assert len(empty) == 0 and {"funding_rate", "funding_event"} <= set(empty.columns)
+    print("✅ join_funding: events every 8h, empty bars ok")
+
+# REST path: a timeout / connection error is retried through the budget, not fatal for the symbol
+import requests
+import funding_store
+
+
+class _Resp:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return RECORDS[:3]
+
+
+_errors = [requests.Timeout("read timeout")]
+_real_get = requests.get
+requests.get = lambda url, params, timeout: (_ for _ in ()).throw(_errors.pop()) if _errors else _Resp()
+try:
+    rows = funding_store._get(funding_store.FUNDING_URL, {"symbol": "BTCUSDT"}, RateBudget(rate=1000, burst=1000))
+finally:
+    requests.get = _real_get
+assert rows == RECORDS[:3] and not _errors
+print("✅ _get: timeout retried with backoff")
@@ -0,0 +1,103 @@
+# test-get-history.py
+# Offline checks for get_history_1.py with a fake python-binance client (no network):
+# repair_gaps retries transient errors, and keeps the pages it already fetched when a page fails for good;
+# stream + resume continues an interrupted file, reports the total row count and re-downloads a file of
+# another range.
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import get_history_1 as gh
+
+MIN = 60_000
+T0 = int(pd.Timestamp("2025-10-01", tz="UTC").value // 10**6)
+N = 5000
+
+
+def kline(t):
+    return [t, "100.0", "101.0", "99.0", "100.5", "10.0", t + MIN - 1, "1005.0", 42, "5.0", "502.5"]
+
+
+class FakeClient:
+    """futures_klines over T0 .. T0 + N minutes; `fail` maps call number -> exception to raise."""
+
+    def __init__(self, fail=None):
+        self.calls = 0
+        self.fail = fail or {}
+
+    def futures_klines(self, symbol, interval, startTime, endTime, limit):
+        self.calls += 1
+        if self.calls in self.fail:
+            raise self.fail[self.calls]
+        first = max(startTime, T0)
+        first += (-(first - T0)) % MIN
+        stop = min(endTime, T0 + (N - 1) * MIN)
+        return [kline(t) for t in range(first, stop + 1, MIN)][:limit]
+
+
+def write_with_gaps(path, holes):
+    full = gh._klines_page_to_frame([kline(T0 + i * MIN) for i in range(N)])
+    keep = np.ones(N, dtype=bool)
+    for a, b in holes:
+        keep[a:b] = False
+    full[keep].to_csv(path, index=False)
+    gaps = pd.DataFrame({"kind": "gap", "start_ms": [T0 + a * MIN for a, _ in holes],
+                         "end_ms": [T0 + (b - 1) * MIN for _, b in holes]})
+    gaps.to_csv(os.path.splitext(path)[0] + ".gaps.csv", index=False)
+    return full
+
+
+HOLES = [(100, 2100), (3000, 3010), (4000, 4500)]
+with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, "TESTUSDT_1m.csv")
+
+    # transient errors (429 / timeout) are retried, every hole filled
+    full = write_with_gaps(path, HOLES)
+    client = FakeClient(fail={2: ConnectionError("429 Too Many Requests"), 3: TimeoutError("read timeout")})
+    res = gh.repair_gaps("TESTUSDT", "1m", path, client=client, limit=1500, sleep_on_rate_limit=0.001)
+    got = pd.read_csv(path)
+    assert res["filled"] == sum(b - a for a, b in HOLES) and got["open_time"].tolist() == full["open_time"].tolist()
+    print(f"✅ repair_gaps: {res['filled']} rows filled through 2 transient errors ({client.calls} calls)")
+
+    # a page that keeps failing: the pages fetched before it are still merged, then the error is raised
+    write_with_gaps(path, HOLES)
+    client = FakeClient(fail={k: ConnectionError("418 banned") for k in range(3, 100)})
+    try:
+        gh.repair_gaps("TESTUSDT", "1m", path, client=client, limit=1500, sleep_on_rate_limit=0.001, max_retries=2)
+        raise AssertionError("repair_gaps should raise after max_retries")
+    except ConnectionError:
+        pass
+    got = pd.read_csv(path)["open_time"].to_numpy()
+    assert len(got) == N - sum(b - a for a, b in HOLES) + 2000 and np.all(np.diff(got) > 0)
+    print("✅ repair_gaps: 2000 rows of the first hole kept after a permanent error")
+
+
+def fetch(path, start_min, client, **kw):
+    return gh.fetch_futures_data_by_range("TESTUSDT", "1m", pd.Timestamp(T0 + start_min * MIN, unit="ms", tz="UTC"),
+                                          pd.Timestamp(T0 + (N - 1) * MIN, unit="ms", tz="UTC"), filename=path,
+                                          client=client, stream=True, resume=True, sleep_on_rate_limit=0.001, **kw)
+
+
+with tempfile.TemporaryDirectory() as d:
+    path = os.path.join(d, "TESTUSDT_1m_stream.csv")
+
+    # killed after 2 pages, then resumed: rows = whole file, appended = this run
+    try:
+        fetch(path, 0, FakeClient(fail={k: ConnectionError("429") for k in range(3, 100)}), max_retries=0)
+        raise AssertionError("fetch should raise with max_retries=0")
+    except ConnectionError:
+        pass
+    assert len(pd.read_csv(path)) == 3000
+    res = fetch(path, 0, FakeClient())
+    got = pd.read_csv(path)["open_time"].to_numpy()
+    assert res["rows"] == N and res["appended"] == N - 3000
+    assert len(got) == N and np.array_equal(got, T0 + np.arange(N) * MIN)
+    print(f"✅ resume: {res['appended']} rows appended, rows = {res['rows']} (whole file)")
+
+    # same file name, later start -> the stored file belongs to another range: fresh download
+    res = fetch(path, 100, FakeClient())
+    got = pd.read_csv(path)["open_time"].to_numpy()
+    assert res["rows"] == res["appended"] == N - 100 and got[0] == T0 + 100 * MIN and len(got) == N - 100
+    print(f"✅ resume: file with another start re-downloaded ({res['rows']} rows)")
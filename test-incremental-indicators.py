@@ -0,0 +1,83 @@
+# test-incremental-indicators.py
+# Checks incremental_indicators.py against TA-Lib / pandas on the stored 15m + 1m data
+# (synthetic random walk if no data file is found) and times update() per bar.
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import talib
+
+from incremental_indicators import EMA, RSI, MACD, Bollinger, RollingMean, LinRegSlope
+
+RTOL, ATOL = 1e-9, 1e-8
+
+
+def load_bars():
+    files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "*_1m_*.csv")))
+    files = files or sorted(glob.glob(os.path.join("data", "*_1m_*.csv")))
+    if files:
+        df = pd.read_csv(files[0], usecols=["close", "volume"])
+        print(f"data: {os.path.basename(files[0])} ({len(df)} bars)")
+        return df["close"].to_numpy(np.float64), df["volume"].to_numpy(np.float64)
+    rng = np.random.default_rng(1)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, 50_000))
+    print("data: synthetic random walk (50000 bars)")
+    return close, rng.uniform(1, 100, len(close))
+
+
+def run(ind, values):
+    out = [ind.update(v) for v in values]
+    return np.array(out, dtype=np.float64)
+
+
+def check(label, got, ref):
+    got, ref = np.asarray(got, dtype=np.float64), np.asarray(ref, dtype=np.float64)
+    assert got.shape == ref.shape, f"{label}: shape {got.shape} != {ref.shape}"
+    nan_ok = np.array_equal(np.isnan(got), np.isnan(ref))
+    ok = np.isfinite(ref)
+    err = np.max(np.abs(got[ok] - ref[ok]) / np.maximum(np.abs(ref[ok]), 1.0)) if ok.any() else 0.0
+    assert nan_ok, f"{label}: warm-up (NaN) positions differ"
+    assert np.allclose(got[ok], ref[ok], rtol=RTOL, atol=ATOL), f"{label}: max rel err {err:.3g}"
+    print(f"✅ {label:<24} max rel err {err:.2e}")
+
+
+close, volume = load_bars()
+
+check("EMA(7)", run(EMA(7), close), talib.EMA(close, 7))
+check("EMA(99)", run(EMA(99), close), talib.EMA(close, 99))
+check("RSI(14)", run(RSI(14), close), talib.RSI(close, 14))
+
+m = MACD(12, 26, 9)
+got = np.array([m.update(c) for c in close])
+ref = talib.MACD(close, 12, 26, 9)
+for i, name in enumerate(("macd", "signal", "hist")):
+    check(f"MACD {name}", got[:, i], ref[i])
+
+b = Bollinger(20, 2.0)
+got = np.array([b.update(c) for c in close])
+ref = talib.BBANDS(close, 20, 2.0, 2.0)
+for i, name in enumerate(("upper", "mid", "lower")):
+    check(f"BBANDS {name}", got[:, i], ref[i])
+
+check("vol rolling(20, mp=1)", run(RollingMean(20, min_periods=1), volume),
+      pd.Series(volume).rolling(20, min_periods=1).mean())
+check("LINEARREG_SLOPE(40)", run(LinRegSlope(40), close), talib.LINEARREG_SLOPE(close, 40))
+
+# dict bars / source field
+rm = RollingMean(5, source="volume")
+for c, v in zip(close[:10], volume[:10]):
+    rm.update({"close": c, "volume": v})
+assert abs(rm.value - volume[5:10].mean()) < 1e-9
+print("✅ mapping bars (source='volume')")
+
+# cost per update: constant, independent of history length
+inds = [EMA(7), EMA(99), RSI(14), MACD(), Bollinger(20), RollingMean(20), LinRegSlope(40)]
+n = min(len(close), 20_000)
+t0 = time.perf_counter()
+for c in close[:n]:
+    for ind in inds:
+        ind.update(c)
+dt = time.perf_counter() - t0
+print(f"⏱  {len(inds)} indicators x {n} bars: {dt * 1e6 / (n * len(inds)):.2f} µs per update")
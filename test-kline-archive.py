@@ -0,0 +1,96 @@
+# test-kline-archive.py
+# Offline checks for kline_archive.py on synthetic 1m klines: archive_csv -> load_archive gives back
+# exactly the CSV columns, month-range slicing, merging a second CSV into an existing month,
+# and missing_rows() listing the holes of a month.
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import kline_archive as ka
+from get_history_1 import _klines_page_to_frame
+
+MIN = 60_000
+rng = np.random.default_rng(5)
+VALUE_COLS = ["open", "high", "low", "close", "volume", "quote_asset_volume", "num_trades",
+              "taker_buy_base", "taker_buy_quote"]
+
+
+def klines(t0, n, holes=(), seed_price=60000.0):
+    """n 1m bars from t0 (ms) minus the [a, b) row ranges in `holes`, as get_history_1 writes them."""
+    close = np.round(seed_price + np.cumsum(rng.integers(-50, 51, n)) * 0.1, 1)
+    open_ = np.r_[close[:1], close[:-1]]
+    high = np.maximum(open_, close) + rng.integers(0, 30, n) * 0.1
+    low = np.minimum(open_, close) - rng.integers(0, 30, n) * 0.1
+    vol = rng.integers(0, 200_000, n) / 1000
+    keep = np.ones(n, dtype=bool)
+    for a, b in holes:
+        keep[a:b] = False
+    rows = [[t0 + i * MIN, f"{open_[i]:.1f}", f"{high[i]:.1f}", f"{low[i]:.1f}", f"{close[i]:.1f}", f"{vol[i]:.3f}",
+             t0 + (i + 1) * MIN - 1, f"{vol[i] * close[i]:.4f}", int(rng.integers(1, 2000)), f"{vol[i] / 2:.4f}",
+             f"{vol[i] * close[i] / 2:.4f}"] for i in range(n) if keep[i]]
+    return _klines_page_to_frame(rows)
+
+
+def same_columns(got, want):
+    for c in VALUE_COLS:
+        if not np.array_equal(got[c].to_numpy(), want[c].to_numpy()):
+            return False
+    return np.array_equal(got.index.as_unit("ms").asi8, want["open_time"].to_numpy())
+
+
+T0 = int(pd.Timestamp("2025-09-28", tz="UTC").value // 10**6)
+N = 7 * 1440                                                    # Sep 28 .. Oct 4, across a month boundary
+HOLES = [(100, 130), (4400, 4401), (6000, 6500)]                # Sep 28, Oct 1, Oct 2
+
+with tempfile.TemporaryDirectory() as d:
+    out = os.path.join(d, "archive")
+    csv_a = os.path.join(d, "BTCUSDT_1m_a.csv")
+    klines(T0, N, HOLES).to_csv(csv_a, index=False)
+    want = pd.read_csv(csv_a)
+
+    # 1) round trip: every value column equal to what pandas reads from the CSV
+    paths = ka.archive_csv(csv_a, out_dir=out)
+    assert [os.path.basename(p) for p in paths] == ["BTCUSDT_1m_2025-09.kla", "BTCUSDT_1m_2025-10.kla"]
+    got = ka.load_archive("BTCUSDT", "1m", out_dir=out)
+    assert sorted(got.columns) == sorted(VALUE_COLS) and same_columns(got, want)
+    assert got["num_trades"].dtype == np.int64 and str(got.index.tz) == "UTC"
+    csv_size, kla_size = os.path.getsize(csv_a), sum(os.path.getsize(p) for p in paths)
+    print(f"✅ archive_csv -> load_archive: {len(got)} rows, columns exact ({csv_size / kla_size:.1f}x smaller)")
+
+    # 2) range slicing: inclusive, across the month boundary, only one month, outside the data
+    lo, hi = "2025-09-30 23:30", pd.Timestamp("2025-10-01 07:30", tz="Asia/Ho_Chi_Minh")   # = 00:30 UTC
+    part = ka.load_archive("BTCUSDT", "1m", lo, hi, out_dir=out)
+    lo_ms, hi_ms = int(pd.Timestamp(lo, tz="UTC").value // 10**6), int(hi.value // 10**6)
+    sel = want[(want["open_time"] >= lo_ms) & (want["open_time"] <= hi_ms)]
+    assert len(part) == 61 and same_columns(part, sel)
+    oct_only = ka.load_archive("BTCUSDT", "1m", "2025-10-01", out_dir=out)
+    assert oct_only.index[0] == pd.Timestamp("2025-10-01", tz="UTC")
+    assert len(oct_only) == (want["open_time"] >= lo_ms + 30 * MIN).sum()
+    sub = ka.load_archive("BTCUSDT", "1m", "2025-10-02", "2025-10-02 23:59", out_dir=out, columns=["close"])
+    assert list(sub.columns) == ["close"] and len(sub) == 1440 - 500
+    assert len(ka.load_archive("BTCUSDT", "1m", "2025-11-01", out_dir=out)) == 0
+    print(f"✅ load_archive slicing: {len(part)} rows across the month boundary, column subset, empty range ok")
+
+    # 3) missing_rows: the holes of each month, nothing before the first / after the last stored row
+    miss_sep = ka.missing_rows(paths[0])
+    miss_oct = ka.missing_rows(paths[1])
+    assert miss_sep.tolist() == [T0 + i * MIN for i in range(100, 130)]
+    assert miss_oct.tolist() == [T0 + i * MIN for a, b in HOLES[1:] for i in range(a, b)]
+    print(f"✅ missing_rows: {len(miss_sep)} (Sep) + {len(miss_oct)} (Oct) missing bars")
+
+    # 4) a second CSV overlapping October: merged into the existing month, its rows win, September untouched
+    t1 = T0 + (N - 1440) * MIN                                  # Oct 4 .. Oct 6, first day overlaps
+    csv_b = os.path.join(d, "BTCUSDT_1m_b.csv")
+    klines(t1, 3 * 1440, seed_price=61000.0).to_csv(csv_b, index=False)
+    new = pd.read_csv(csv_b)
+    sep_bytes = open(paths[0], "rb").read()
+    assert ka.archive_csv(csv_b, out_dir=out) == [paths[1]]
+    assert open(paths[0], "rb").read() == sep_bytes
+    merged = (pd.concat([want, new]).drop_duplicates("open_time", keep="last")
+              .sort_values("open_time").reset_index(drop=True))
+    got = ka.load_archive("BTCUSDT", "1m", out_dir=out)
+    assert same_columns(got, merged) and len(got) == len(want) - 1440 + len(new)
+    assert ka.missing_rows(paths[1]).tolist() == miss_oct.tolist()
+    print(f"✅ merge: {len(new)} rows into the existing October file, overlap taken from the new CSV")
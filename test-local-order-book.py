@@ -0,0 +1,122 @@
+# test-local-order-book.py
+# Offline harness for local_order_book.py: a simulated exchange emits depthUpdate diffs,
+# the local book is built from snapshot + diffs (with a snapshot newer than the first
+# events and a dropped message forcing a resync), then the recorded session is replayed
+# from disk and both books are compared with the exchange state. Stale / failing snapshots
+# must back off instead of hitting REST on every event. No network needed.
+import os
+import random
+import tempfile
+
+from local_order_book import LocalOrderBook, replay
+from rate_budget import RateBudget
+
+random.seed(7)
+N_EVENTS = 3000
+SNAPSHOT_LAG = 5        # snapshot is taken a few updates after the first buffered event
+DROP_AT = 1500          # this message is "lost" -> pu mismatch -> resync
+
+
+def simulate():
+    """Exchange side: list of events and the book state after each one."""
+    bids = {round(100.0 - i * 0.1, 1): 1.0 for i in range(50)}
+    asks = {round(100.1 + i * 0.1, 1): 1.0 for i in range(50)}
+    states, events = [], []
+    uid = 1000
+    states.append((uid, dict(bids), dict(asks)))
+    for _ in range(N_EVENTS):
+        U = uid + 1
+        uid += random.randint(1, 3)
+        b, a = [], []
+        for _ in range(random.randint(1, 6)):
+            side, book = random.choice([("b", bids), ("a", asks)])
+            base = 100.0 if side == "b" else 100.1
+            px = round(base + (-1 if side == "b" else 1) * random.randint(0, 60) * 0.1, 1)
+            qty = 0.0 if (px in book and random.random() < 0.3) else round(random.uniform(0.1, 5), 3)
+            if qty == 0:
+                book.pop(px, None)
+            else:
+                book[px] = qty
+            (b if side == "b" else a).append([str(px), str(qty)])
+        events.append({"e": "depthUpdate", "E": 1_700_000_000_000 + len(events) * 100, "s": "TESTUSDT",
+                       "U": U, "u": uid, "pu": states[-1][0], "b": b, "a": a})
+        states.append((uid, dict(bids), dict(asks)))
+    return events, states
+
+
+def snapshot_at(state):
+    uid, bids, asks = state
+    return {"lastUpdateId": uid,
+            "bids": [[str(p), str(q)] for p, q in sorted(bids.items(), reverse=True)],
+            "asks": [[str(p), str(q)] for p, q in sorted(asks.items())]}
+
+
+def assert_same(book, state, label):
+    uid, bids, asks = state
+    got_b = dict(zip(book.bids.prices, book.bids.qtys))
+    got_a = dict(zip(book.asks.prices, book.asks.qtys))
+    assert book.last_update_id == uid, f"{label}: last_update_id {book.last_update_id} != {uid}"
+    assert got_b == bids, f"{label}: bids differ"
+    assert got_a == asks, f"{label}: asks differ"
+    print(f"✅ {label}: {len(got_b)} bids / {len(got_a)} asks, best {book.best_bid} / {book.best_ask}, "
+          f"resyncs={book.resyncs}")
+
+
+events, states = simulate()
+delivered = {"n": 0}
+
+
+def exchange_snapshot():
+    # the exchange is a bit ahead of what the client has received
+    i = min(delivered["n"] + SNAPSHOT_LAG, len(states) - 1)
+    return snapshot_at(states[i])
+
+
+record = os.path.join(tempfile.mkdtemp(), "TESTUSDT_depth.jsonl")
+book = LocalOrderBook("TESTUSDT", snapshot_fn=exchange_snapshot, record_path=record,
+                      budget=RateBudget(rate=1000, burst=1000))
+for i, ev in enumerate(events):
+    delivered["n"] = i + 1
+    if i == DROP_AT:
+        continue
+    book.on_event({"stream": "testusdt@depth@100ms", "data": ev})
+book.close()
+
+assert book.synced, "book should be synced at the end"
+assert book.resyncs >= 1, "dropped message should have forced a resync"
+assert_same(book, states[-1], "live")
+
+replayed = replay(record, "TESTUSDT")
+assert_same(replayed, states[-1], "replay")
+
+bids, asks = book.top(5)
+assert [p for p, _ in bids] == sorted(book.bids.prices, reverse=True)[:5]
+assert [p for p, _ in asks] == sorted(book.asks.prices)[:5]
+print("✅ top(5):", bids[0], asks[0])
+
+
+# stale snapshots: the exchange serves an old book for a while (e.g. a lagging REST node).
+# Events keep arriving every 100 ms; requests must follow the backoff (1, 2, 4, ... s), not the stream.
+clock = {"t": 0.0}
+calls = {"n": 0, "fail": 0}
+
+
+def lagging_snapshot():
+    calls["n"] += 1
+    if calls["n"] == 2:
+        calls["fail"] += 1
+        raise ConnectionError("HTTP 503")
+    i = 0 if calls["n"] <= 4 else min(delivered["n"] + SNAPSHOT_LAG, len(states) - 1)
+    return snapshot_at(states[i])
+
+
+stale = LocalOrderBook("TESTUSDT", snapshot_fn=lagging_snapshot, budget=RateBudget(rate=1000, burst=1000),
+                       clock=lambda: clock["t"])
+for i, ev in enumerate(events[100:], start=100):
+    delivered["n"] = i + 1
+    clock["t"] = (i - 100) * 0.1
+    stale.on_event(ev)
+assert stale.synced and calls["fail"] == 1
+assert calls["n"] == 5, f"{calls['n']} snapshot requests, expected 5 (1 + 4 after backoff)"
+assert_same(stale, states[-1], "stale snapshots")
+print(f"✅ backoff: {calls['n']} snapshot requests for {len(events) - 100} events (stale x3, failed x1)")
@@ -0,0 +1,87 @@
+# test-orderbook-recorder.py
+# Offline checks for orderbook_recorder.py: hourly rotation, reopening a file with a torn trailing
+# record, load_range bounds, NaN padding of thin books, depth_metrics / slippage on a hand-built book.
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import orderbook_recorder as obr
+
+LEVELS = 5
+H = 3_600_000
+T0 = int(pd.Timestamp("2025-10-01 10:00", tz="UTC").value // 10**6)
+BIDS = [["100.0", "1.0"], ["99.5", "2.0"], ["99.0", "3.0"]]            # thin book: 3 of 5 levels
+ASKS = [["100.5", "1.0"], ["101.0", "2.0"], ["102.0", "4.0"]]
+
+
+def write_all(rec, ts_list):
+    for i, ts in enumerate(ts_list):
+        rec.write(ts, BIDS, ASKS, last_update_id=1000 + i)
+
+
+with tempfile.TemporaryDirectory() as d:
+    # 1) writes across an hour boundary rotate the file (and flush what is buffered)
+    ts_list = [T0 + H - 30_000 + k * 10_000 for k in range(6)]           # 10:59:30 .. 11:00:20
+    with obr.OrderBookRecorder("btcusdt", levels=LEVELS, out_dir=d, flush_every=4) as rec:
+        write_all(rec, ts_list)
+        assert rec.count == 6
+    p10, p11 = obr.hour_file("BTCUSDT", LEVELS, T0, d), obr.hour_file("BTCUSDT", LEVELS, T0 + H, d)
+    assert sorted(os.listdir(obr.orderbook_dir("BTCUSDT", d))) == [os.path.basename(p10), os.path.basename(p11)]
+    r10, r11 = obr.open_records(p10), obr.open_records(p11)
+    assert r10["ts"].tolist() == ts_list[:3] and r11["ts"].tolist() == ts_list[3:]
+    assert r11["last_update_id"].tolist() == [1003, 1004, 1005]
+    print(f"✅ rotation: {len(r10)} + {len(r11)} records in {os.path.basename(p10)} / {os.path.basename(p11)}")
+
+    # 2) thin book: missing levels are NaN
+    assert np.allclose(r10["bid_px"][0, :3], [100.0, 99.5, 99.0]) and np.isnan(r10["bid_px"][:, 3:]).all()
+    assert np.isnan(r10["ask_qty"][:, 3:]).all() and not np.isnan(r10["ask_qty"][:, :3]).any()
+    empty = obr.OrderBookRecorder("BTCUSDT", levels=LEVELS, out_dir=os.path.join(d, "x"))
+    empty.write(T0, [], None)
+    empty.close()
+    r = obr.open_records(obr.hour_file("BTCUSDT", LEVELS, T0, os.path.join(d, "x")))
+    assert np.isnan(r["bid_px"]).all() and np.isnan(r["ask_px"]).all()
+    print("✅ thin book: levels past the recorded depth are NaN")
+
+    # 3) torn trailing record (killed mid-write): readers ignore it, a restart truncates it and appends
+    itemsize = obr.record_dtype(LEVELS).itemsize
+    with open(p11, "ab") as f:
+        f.write(b"\x01" * (itemsize // 2))
+    assert len(obr.open_records(p11)) == 3
+    with obr.OrderBookRecorder("BTCUSDT", levels=LEVELS, out_dir=d) as rec:
+        rec.write(T0 + H + 60_000, BIDS, ASKS, last_update_id=2000)
+    assert (os.path.getsize(p11) - obr.HEADER_SIZE) % itemsize == 0
+    r11 = obr.open_records(p11)
+    assert r11["ts"].tolist() == ts_list[3:] + [T0 + H + 60_000] and r11["last_update_id"][-1] == 2000
+    print("✅ torn record: truncated on reopen, new record appended after the 3 intact ones")
+
+    # 4) load_range: inclusive bounds across files, naive = UTC, files outside the range skipped
+    all_ts = ts_list + [T0 + H + 60_000]
+    got = obr.load_range("BTCUSDT", levels=LEVELS, out_dir=d)
+    assert got["ts"].tolist() == all_ts
+    got = obr.load_range("BTCUSDT", ts_list[1], ts_list[4], levels=LEVELS, out_dir=d)
+    assert got["ts"].tolist() == ts_list[1:5]
+    got = obr.load_range("BTCUSDT", "2025-10-01 11:00", pd.Timestamp("2025-10-01 18:00:10", tz="Asia/Ho_Chi_Minh"),
+                         levels=LEVELS, out_dir=d)
+    assert got["ts"].tolist() == [T0 + H, T0 + H + 10_000]
+    got = obr.load_range("BTCUSDT", T0 + 2 * H, levels=LEVELS, out_dir=d)
+    assert len(got) == 0 and got.dtype == obr.record_dtype(LEVELS)
+    assert len(obr.load_range("BTCUSDT", levels=20, out_dir=d)) == 0       # other depth: other files
+    print("✅ load_range: inclusive bounds across hours, naive = UTC, empty window ok")
+
+    # 5) depth_metrics / slippage on the hand-built book
+    rec = obr.load_range("BTCUSDT", end=ts_list[0], levels=LEVELS, out_dir=d)
+    m = obr.depth_metrics(rec)
+    assert m["ts"].tolist() == [ts_list[0]]
+    assert np.isclose(m["mid"][0], 100.25) and np.isclose(m["spread"][0], 0.5)
+    assert np.isclose(m["spread_bps"][0], 0.5 / 100.25 * 1e4)
+    assert m["bid_depth"][0] == 6.0 and m["ask_depth"][0] == 7.0 and np.isclose(m["imbalance"][0], -1 / 13)
+    # BUY 2: 1 @ 100.5 + 1 @ 101 -> 100.75;  BUY 5: 1 @ 100.5 + 2 @ 101 + 2 @ 102 -> 101.3
+    assert np.isclose(obr.slippage(rec, 2.0, "BUY")[0], (100.75 - 100.5) / 100.5 * 1e4)
+    assert np.isclose(obr.slippage(rec, 5.0, "BUY")[0], (101.3 - 100.5) / 100.5 * 1e4)
+    assert obr.slippage(rec, 1.0, "BUY")[0] == 0.0
+    # SELL 2: 1 @ 100 + 1 @ 99.5 -> 99.75 (cost reported as positive bps)
+    assert np.isclose(obr.slippage(rec, 2.0, "SELL")[0], 25.0)
+    assert np.isnan(obr.slippage(rec, 7.5, "BUY")[0]) and np.isnan(obr.slippage(rec, 6.5, "SELL")[0])
+    print("✅ depth_metrics / slippage: hand-built book values, NaN past the recorded depth")
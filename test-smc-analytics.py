@@ -0,0 +1,176 @@
+# test-smc-analytics.py
+# Checks smc_analytics.py against the per-bar loops SMC.py used before (swings, BOS / CHoCH,
+# order blocks, FVG) on the stored 1m data + a tie-heavy synthetic series, then times 3 years of 1m.
+# SMCTracker (streaming) is checked against analyze() and a brute-force replay of zone invalidation.
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from smc_analytics import analyze, SMCTracker, BULL
+
+
+def load_bars():
+    files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "*_1m_*.csv")))
+    files = files or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "*_1m_*.csv")))
+    if files:
+        df = pd.read_csv(files[0], usecols=["open", "high", "low", "close"])
+        print(f"data: {os.path.basename(files[0])} ({len(df)} bars)")
+        return df
+    return synthetic(50_000, seed=1)
+
+
+def synthetic(n, seed=0):
+    """Integer prices (many equal highs / lows) with opening gaps, so every FVG / tie branch is hit."""
+    rng = np.random.default_rng(seed)
+    close = np.round(30000 + np.cumsum(rng.normal(0, 20, n)))
+    open_ = np.r_[close[0], close[:-1]] + np.round(rng.normal(0, 15, n))
+    high = np.maximum(open_, close) + np.round(rng.uniform(0, 10, n))
+    low = np.minimum(open_, close) - np.round(rng.uniform(0, 10, n))
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close})
+
+
+# ---------- reference: the loops from the previous SMC.py ----------
+def ref_smc(df, left=2, right=2):
+    highs, lows = df["high"].values, df["low"].values
+    opens, closes = df["open"].values, df["close"].values
+    n = len(df)
+    sw_high = np.zeros(n, dtype=bool)
+    sw_low = np.zeros(n, dtype=bool)
+    for i in range(left, n - right):
+        if highs[i] == max(highs[i - left:i + right + 1]):
+            if np.sum(highs[i - left:i + right + 1] == highs[i]) == 1:
+                sw_high[i] = True
+        if lows[i] == min(lows[i - left:i + right + 1]):
+            if np.sum(lows[i - left:i + right + 1] == lows[i]) == 1:
+                sw_low[i] = True
+
+    structure, last_peak, last_valley = [], None, None
+    for i in range(n):
+        if sw_high[i]:
+            if last_peak is not None:
+                structure.append((i, "BOS_up" if highs[i] > highs[last_peak] else "CHoCH_down"))
+            last_peak = i
+        if sw_low[i]:
+            if last_valley is not None:
+                structure.append((i, "BOS_down" if lows[i] < lows[last_valley] else "CHoCH_up"))
+            last_valley = i
+
+    obs = []
+    for idx, t in structure:
+        if t == "BOS_up":
+            j = idx - 1
+            while j >= 0 and closes[j] >= opens[j]:
+                j -= 1
+            if j >= 0:
+                obs.append((1, j, highs[j], lows[j]))
+        elif t == "BOS_down":
+            j = idx - 1
+            while j >= 0 and closes[j] <= opens[j]:
+                j -= 1
+            if j >= 0:
+                obs.append((-1, j, highs[j], lows[j]))
+
+    fvg = []
+    for i in range(1, n - 1):
+        if lows[i] > highs[i - 1]:
+            fvg.append(("bull", i, highs[i - 1], lows[i]))
+        if highs[i] < lows[i - 1]:
+            fvg.append(("bear", i, highs[i], lows[i - 1]))
+    return sw_high, sw_low, structure, obs, fvg
+
+
+def vec_lists(r):
+    structure = []
+    for i in np.flatnonzero(r["bos_up"] | r["choch_down"] | r["bos_down"] | r["choch_up"]):
+        if r["bos_up"][i] or r["choch_down"][i]:
+            structure.append((i, "BOS_up" if r["bos_up"][i] else "CHoCH_down"))
+        if r["bos_down"][i] or r["choch_up"][i]:
+            structure.append((i, "BOS_down" if r["bos_down"][i] else "CHoCH_up"))
+    ob = r["order_blocks"]
+    obs = list(zip(ob["side"].tolist(), ob["idx"].tolist(), ob["high"].tolist(), ob["low"].tolist()))
+    fvg = []
+    for i in np.flatnonzero(r["fvg_bull"] | r["fvg_bear"]):
+        if r["fvg_bull"][i]:
+            fvg.append(("bull", i, r["fvg_bull_low"][i], r["fvg_bull_high"][i]))
+        if r["fvg_bear"][i]:
+            fvg.append(("bear", i, r["fvg_bear_low"][i], r["fvg_bear_high"][i]))
+    return structure, obs, fvg
+
+
+def compare(label, df):
+    t0 = time.perf_counter()
+    sw_high, sw_low, structure, obs, fvg = ref_smc(df)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    r = analyze(df)
+    t_vec = time.perf_counter() - t0
+    v_structure, v_obs, v_fvg = vec_lists(r)
+    assert np.array_equal(r["swing_high"], sw_high) and np.array_equal(r["swing_low"], sw_low), f"{label}: swings differ"
+    assert [(int(i), t) for i, t in v_structure] == [(int(i), t) for i, t in structure], f"{label}: BOS/CHoCH differ"
+    assert [(int(s), int(j), float(h), float(l)) for s, j, h, l in v_obs] == \
+           [(int(s), int(j), float(h), float(l)) for s, j, h, l in obs], f"{label}: order blocks differ"
+    assert [(t, int(i), float(a), float(b)) for t, i, a, b in v_fvg] == \
+           [(t, int(i), float(a), float(b)) for t, i, a, b in fvg], f"{label}: FVG differ"
+    print(f"✅ {label:<10} {len(df)} bars: {int(sw_high.sum())}/{int(sw_low.sum())} swings, {len(structure)} BOS/CHoCH, "
+          f"{len(obs)} OB, {len(fvg)} FVG | loops {t_loop:.2f} s -> vectorized {t_vec * 1000:.1f} ms")
+
+
+def stream(label, df):
+    r = analyze(df)
+    o, h, l, c = (df[k].to_numpy(np.float64) for k in ("open", "high", "low", "close"))
+    n = len(df)
+    smc = SMCTracker(max_zones=10 ** 9)
+    t0 = time.perf_counter()
+    events = [e for bar in zip(o, h, l, c) for e in smc.update(dict(zip(("open", "high", "low", "close"), bar)))]
+    dt = time.perf_counter() - t0
+
+    def idx_of(name):
+        return [e["idx"] for e in events if e["event"] == name]
+
+    for name, key in (("swing_high", "swing_high"), ("swing_low", "swing_low"), ("BOS_up", "bos_up"),
+                      ("BOS_down", "bos_down"), ("CHoCH_up", "choch_up"), ("CHoCH_down", "choch_down")):
+        assert idx_of(name) == np.flatnonzero(r[key]).tolist(), f"{label}: stream {name} differs"
+    ob = r["order_blocks"]
+    s_ob = [(e["zone"]["side"], e["zone"]["idx"], e["zone"]["high"], e["zone"]["low"]) for e in events if e["event"] == "ob"]
+    assert s_ob == list(zip(ob["side"].tolist(), ob["idx"].tolist(), ob["high"].tolist(), ob["low"].tolist())), \
+        f"{label}: stream order blocks differ"
+    s_fvg = [(e["idx"], e["zone"]["side"]) for e in events if e["event"] == "fvg" and e["idx"] < n - 1]
+    v_fvg = sorted([(i, BULL) for i in np.flatnonzero(r["fvg_bull"])] + [(i, -BULL) for i in np.flatnonzero(r["fvg_bear"])])
+    assert s_fvg == v_fvg, f"{label}: stream FVG differ"
+
+    # brute force: a zone is still active iff no later bar hit its invalidation level
+    # (FVG: bars after the one that closed it; OB: bars after the OB candle itself)
+    created = {e["zone"]["id"]: (e["idx"] if e["event"] == "fvg" else e["zone"]["idx"], e["zone"])
+               for e in events if e["event"] in ("fvg", "ob")}
+    active = set()
+    for zid, (at, z) in created.items():
+        if z["kind"] == "fvg":
+            hit = (l[at + 1:] <= z["low"]) if z["side"] == BULL else (h[at + 1:] >= z["high"])
+        else:
+            hit = (c[at + 1:] < z["low"]) if z["side"] == BULL else (c[at + 1:] > z["high"])
+        if not hit.any():
+            active.add(zid)
+    assert active == set(smc.zones), f"{label}: active zones differ ({len(active)} vs {len(smc.zones)})"
+    print(f"✅ {label:<10} stream: {len(events)} events, {len(smc.active_fvgs())} open FVG, "
+          f"{len(smc.active_order_blocks())} live OB | {dt / max(n, 1) * 1e6:.1f} µs/bar")
+
+
+compare("data", load_bars())
+compare("ties", synthetic(20_000, seed=2))
+compare("tiny", synthetic(4, seed=3))
+stream("data", load_bars().iloc[:20_000])
+stream("ties", synthetic(20_000, seed=2))
+
+smc = SMCTracker(max_zones=50)
+for bar in synthetic(200_000, seed=5).itertuples():
+    smc.update(bar)
+assert len(smc.zones) <= 50 and sum(len(hp) for hp in smc._heaps.values()) <= 3 * 50 + 64 + 4
+print(f"✅ max_zones=50 after 200000 bars: {len(smc.zones)} zones kept")
+
+big = synthetic(3 * 365 * 1440, seed=4)
+t0 = time.perf_counter()
+r = analyze(big)
+print(f"⏱ analyze(): {len(big)} bars (3 years of 1m) in {(time.perf_counter() - t0) * 1000:.0f} ms")
@@ -1,4 +1,5 @@
 from include import *
+from zigzag import zigzag_pivots, pivots_to_dense
 
 #============================================================#
 #  LOAD CSV (CHỈ SỬA ĐƯỜNG DẪN NÀY)
@@ -43,57 +44,9 @@ high  = df["high"].values
 low   = df["low"].values
 dates = df.index
 
-# ---------- 1) ZigZag pivot detector (uses numpy arrays) ----------
-def zigzag_pivots_np(high_np, low_np, close_np, pct=3.0):
-    n = len(high_np)
-    pivots = np.zeros(n, dtype=int)
-    # keep last pivot price and type as numpy scalars
-    last_price = close_np[0]
-    last_idx = 0
-    trend = None
-
-    for i in range(1, n):
-        # use numpy indexing (no pandas Series)
-        up = (high_np[i] - last_price) / last_price * 100.0
-        down = (last_price - low_np[i]) / last_price * 100.0
-
-        if trend is None:
-            if up > pct:
-                pivots[i] = 1
-                trend = "up"
-                last_idx = i
-                last_price = high_np[i]
-            elif down > pct:
-                pivots[i] = -1
-                trend = "down"
-                last_idx = i
-                last_price = low_np[i]
-        elif trend == "up":
-            if high_np[i] > last_price:
-                # extend pivot high
-                pivots[last_idx] = 0
-                pivots[i] = 1
-                last_idx = i
-                last_price = high_np[i]
-            elif down > pct:
-                pivots[i] = -1
-                trend = "down"
-                last_idx = i
-                last_price = low_np[i]
-        else:  # trend == "down"
-            if low_np[i] < last_price:
-                pivots[last_idx] = 0
-                pivots[i] = -1
-                last_idx = i
-                last_price = low_np[i]
-            elif up > pct:
-                pivots[i] = 1
-                trend = "up"
-                last_idx = i
-                last_price = high_np[i]
-    return pivots
-
-df["pivot"] = zigzag_pivots_np(high, low, close, pct=3.0)
+# ---------- 1) ZigZag pivot detector (zigzag.py: compact pivot arrays, many pct at once) ----------
+piv_idx, piv_side = zigzag_pivots(high, low, close, pct=3.0)
+df["pivot"] = pivots_to_dense(piv_idx, piv_side, len(df))
 
 # build segments by using df.iloc for positions -> safe
 def build_segments_from_pivots(df, pivot_col="pivot"):
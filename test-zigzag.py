@@ -0,0 +1,97 @@
+# test-zigzag.py
+# Checks zigzag.py (numpy legs, the per-bar kernel and the incremental ZigZag) against the
+# zigzag_pivots_np loop test-trending.py used before, on the stored 1m data + synthetic walks, for a sweep
+# of thresholds, and times the sweep.
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from zigzag import zigzag_pivots_multi, pivots_to_dense, ZigZag, _zigzag_kernel
+
+PCTS = [0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0]
+
+
+def load_bars():
+    files = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "*_1m_*.csv")))
+    files = files or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "*_1m_*.csv")))
+    if files:
+        df = pd.read_csv(files[0], usecols=["high", "low", "close"])
+        print(f"data: {os.path.basename(files[0])} ({len(df)} bars)")
+        return df
+    return synthetic(50_000, seed=1)
+
+
+def synthetic(n, seed=0, vol=2e-3):
+    rng = np.random.default_rng(seed)
+    close = np.round(30000 * np.exp(np.cumsum(rng.normal(0, vol, n))), 1)
+    high = close + np.round(rng.uniform(0, 40 * vol / 2e-3, n), 1)
+    low = close - np.round(rng.uniform(0, 40 * vol / 2e-3, n), 1)
+    return pd.DataFrame({"high": high, "low": low, "close": close})
+
+
+# ---------- reference: zigzag_pivots_np (previously in test-trending.py) ----------
+def zigzag_pivots_np(high_np, low_np, close_np, pct=3.0):
+    n = len(high_np)
+    pivots = np.zeros(n, dtype=int)
+    last_price = close_np[0]
+    last_idx = 0
+    trend = None
+    for i in range(1, n):
+        up = (high_np[i] - last_price) / last_price * 100.0
+        down = (last_price - low_np[i]) / last_price * 100.0
+        if trend is None:
+            if up > pct:
+                pivots[i] = 1; trend = "up"; last_idx = i; last_price = high_np[i]
+            elif down > pct:
+                pivots[i] = -1; trend = "down"; last_idx = i; last_price = low_np[i]
+        elif trend == "up":
+            if high_np[i] > last_price:
+                pivots[last_idx] = 0; pivots[i] = 1; last_idx = i; last_price = high_np[i]
+            elif down > pct:
+                pivots[i] = -1; trend = "down"; last_idx = i; last_price = low_np[i]
+        else:
+            if low_np[i] < last_price:
+                pivots[last_idx] = 0; pivots[i] = -1; last_idx = i; last_price = low_np[i]
+            elif up > pct:
+                pivots[i] = 1; trend = "up"; last_idx = i; last_price = high_np[i]
+    return pivots
+
+
+def compare(label, df):
+    h, l, c = (df[k].to_numpy(np.float64) for k in ("high", "low", "close"))
+    n = len(df)
+    t0 = time.perf_counter()
+    ref = [zigzag_pivots_np(h, l, c, p) for p in PCTS]
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = zigzag_pivots_multi(h, l, c, PCTS, use_numba=False)
+    t_vec = time.perf_counter() - t0
+
+    zz = ZigZag(PCTS)
+    for bar in zip(h, l, c):
+        zz.update({"high": bar[0], "low": bar[1], "close": bar[2]})
+    buf_i, buf_s = np.empty(n, dtype=np.int64), np.empty(n, dtype=np.int8)
+    for p, r, (idx, side) in zip(PCTS, ref, got):
+        assert np.array_equal(pivots_to_dense(idx, side, n), r), f"{label} pct={p}: numpy legs differ"
+        # the kernel as numba would run it (arrays, from the first bar)
+        count = _zigzag_kernel(h, l, p, buf_i, buf_s, 1, 0, c[0], 0) if n else 0
+        assert np.array_equal(buf_i[:count], idx) and np.array_equal(buf_s[:count], side), f"{label} pct={p}: kernel differs"
+        z_idx, z_side = zz.pivots(p)
+        assert np.array_equal(z_idx, idx) and np.array_equal(z_side, side), f"{label} pct={p}: ZigZag differs"
+    counts = ", ".join(f"{p}%:{len(i)}" for p, (i, _) in zip(PCTS, got))
+    print(f"✅ {label:<6} {n} bars | pivots {counts} | loop {t_loop:.2f} s -> legs {t_vec * 1000:.0f} ms")
+
+
+compare("data", load_bars())
+compare("walk", synthetic(30_000, seed=2))
+compare("tiny", synthetic(3, seed=3))
+
+big = synthetic(3 * 365 * 1440, seed=4, vol=5e-4)      # ~BTC 1m volatility
+h, l, c = (big[k].to_numpy(np.float64) for k in ("high", "low", "close"))
+t0 = time.perf_counter()
+res = zigzag_pivots_multi(h, l, c, PCTS)
+print(f"⏱ {len(PCTS)} thresholds x {len(big)} bars (3 years of 1m): {(time.perf_counter() - t0) * 1000:.0f} ms, "
+      f"{sum(len(i) for i, _ in res)} pivots")
@@ -0,0 +1,262 @@
+"""
+ZigZag pivots for many thresholds at once, as compact index arrays.
+Same rules as the zigzag_pivots_np loop test-trending.py used (a move of more than `pct` % from the last pivot
+starts a new leg, a new extreme in the current leg moves the pivot), but:
+
+- zigzag_pivots(high, low, close, pct)        -> (idx int64, side int8) of the pivots only
+- zigzag_pivots_multi(high, low, close, pcts) -> [(idx, side), ...] one pair per threshold in one
+  call: the first-leg scan is shared, and each leg is found with running max / min over array
+  chunks (numpy per leg instead of Python per bar), so the cost grows with the number of legs;
+  thresholds with very short legs fall back to the per-bar kernel on plain lists
+- with numba installed that per-bar kernel is compiled and used for every threshold
+  (use_numba=None: auto, False: never, True: required)
+- pivots_to_dense(idx, side, n): the old +1 / -1 / 0 column, for plotting
+- ZigZag(pcts): incremental mode for live bars, update(bar) is O(len(pcts)) per closed candle
+
+Pivot side: +1 = swing high (price = high[idx]), -1 = swing low (price = low[idx]).
+The last pivot of each threshold is still provisional (its leg can extend); test-zigzag.py
+checks parity with the per-bar loop.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:          # optional: pure numpy path below
+    njit = None
+
+Pivots = Tuple[np.ndarray, np.ndarray]
+_CHUNK = 64
+_DENSE_LEG = 100          # bars per leg below which the per-bar kernel is faster than numpy legs
+
+
+def _as_arrays(high, low, close):
+    return (np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64),
+            np.asarray(close, dtype=np.float64))
+
+
+def _first_leg(high, low, close):
+    """% moves of every bar from close[0] (the reference before the first pivot), shared by all pcts."""
+    p0 = close[0]
+    up = (high[1:] - p0) / p0 * 100.0
+    down = (p0 - low[1:]) / p0 * 100.0
+    return up, down
+
+
+def _leg_end(high, low, start: int, side: int, pct: float, size: int = _CHUNK):
+    """
+    Follow the leg whose pivot is at `start` (side +1: pivot high, -1: pivot low), scanning
+    chunks of `size` bars (doubled while the leg goes on).
+    Returns (pivot index when the leg ends, bar that starts the next leg or -1 if the data ends).
+    """
+    n = len(high)
+    s = start
+    while True:
+        e = min(n, s + 1 + size)
+        if side > 0:
+            ext = np.maximum.accumulate(high[s:e])
+            last = ext[:-1]                                 # pivot price before bars s+1 .. e-1
+            rev = (high[s + 1:e] <= last) & ((last - low[s + 1:e]) / last * 100.0 > pct)
+        else:
+            ext = np.minimum.accumulate(low[s:e])
+            last = ext[:-1]
+            rev = (low[s + 1:e] >= last) & ((high[s + 1:e] - last) / last * 100.0 > pct)
+        if rev.any():
+            k = int(np.argmax(rev))
+            seg = high[s:s + k + 1] if side > 0 else low[s:s + k + 1]
+            piv = s + int(np.argmax(seg) if side > 0 else np.argmin(seg))   # first (strict) extreme
+            return piv, s + 1 + k
+        seg = high[s:e] if side > 0 else low[s:e]
+        piv = s + int(np.argmax(seg) if side > 0 else np.argmin(seg))
+        if e == n:
+            return piv, -1
+        s, size = piv, size * 2                             # resume from the current pivot
+
+
+def _zigzag_kernel(high, low, pct, out_idx, out_side, start, trend, last_price, count):
+    """
+    Per-bar state machine of zigzag_pivots_np from bar `start` on (trend 0 = no pivot yet, else the
+    side of the open pivot at out_idx[count - 1] with price last_price), writing only the pivots.
+    Runs on lists in pure Python, compiled on arrays with numba. Returns the pivot count.
+    """
+    for i in range(start, len(high)):
+        up = (high[i] - last_price) / last_price * 100.0
+        down = (last_price - low[i]) / last_price * 100.0
+        if trend == 0:
+            if up > pct:
+                trend, last_price = 1, high[i]
+                out_idx[count], out_side[count] = i, 1
+                count += 1
+            elif down > pct:
+                trend, last_price = -1, low[i]
+                out_idx[count], out_side[count] = i, -1
+                count += 1
+        elif trend == 1:
+            if high[i] > last_price:
+                last_price = high[i]
+                out_idx[count - 1] = i
+            elif down > pct:
+                trend, last_price = -1, low[i]
+                out_idx[count], out_side[count] = i, -1
+                count += 1
+        else:
+            if low[i] < last_price:
+                last_price = low[i]
+                out_idx[count - 1] = i
+            elif up > pct:
+                trend, last_price = 1, high[i]
+                out_idx[count], out_side[count] = i, 1
+                count += 1
+    return count
+
+
+_zigzag_kernel_jit = njit(cache=True)(_zigzag_kernel) if njit is not None else None
+
+
+class _Bars:
+    """high / low as arrays plus lazily built lists (the pure-Python kernel is faster on lists)."""
+
+    def __init__(self, high, low, close):
+        self.high, self.low, self.close = high, low, close
+        self._lists = None
+
+    def lists(self):
+        if self._lists is None:
+            self._lists = (self.high.tolist(), self.low.tolist())
+        return self._lists
+
+
+def _pivots_legs(bars: _Bars, first_up, first_down, pct: float) -> Pivots:
+    """
+    Leg by leg with numpy (_leg_end). Thresholds with short legs (< _DENSE_LEG bars on average)
+    switch to the per-bar kernel, which is cheaper than one numpy call per leg there.
+    """
+    high, low = bars.high, bars.low
+    n = len(high)
+    hit = (first_up > pct) | (first_down > pct)
+    if not hit.any():
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)
+    k = int(np.argmax(hit))
+    start, side = k + 1, (1 if first_up[k] > pct else -1)
+    idx, sides = [], []
+    size = _CHUNK
+    while start >= 0:
+        if len(idx) >= 32 and (start - idx[0]) < _DENSE_LEG * len(idx):
+            hl, ll = bars.lists()
+            out_idx = idx + [start] + [0] * (n - len(idx) - 1)
+            out_side = sides + [side] + [0] * (n - len(idx) - 1)
+            price = hl[start] if side > 0 else ll[start]
+            count = _zigzag_kernel(hl, ll, pct, out_idx, out_side, start + 1, side, price, len(idx) + 1)
+            return np.asarray(out_idx[:count], dtype=np.int64), np.asarray(out_side[:count], dtype=np.int8)
+        piv, nxt = _leg_end(high, low, start, side, pct, size)
+        idx.append(piv)
+        sides.append(side)
+        if nxt >= 0:            # next chunk ~ twice the last leg: few rescans, little wasted work
+            size = min(max(2 * (nxt - start), 16), 1 << 16)
+        start, side = nxt, -side
+    return np.asarray(idx, dtype=np.int64), np.asarray(sides, dtype=np.int8)
+
+
+def _pivots_jit(bars: _Bars, pct: float, buf_idx, buf_side) -> Pivots:
+    count = _zigzag_kernel_jit(bars.high, bars.low, float(pct), buf_idx, buf_side, 1, 0, bars.close[0], 0)
+    return buf_idx[:count].copy(), buf_side[:count].copy()
+
+
+def zigzag_pivots_multi(high, low, close, pcts: Sequence[float], use_numba=None) -> List[Pivots]:
+    """
+    Pivots for every threshold in `pcts` -> [(idx, side), ...] in the same order.
+    use_numba: None = compiled kernel when numba is installed, False = numpy legs, True = require numba.
+    """
+    high, low, close = _as_arrays(high, low, close)
+    pcts = [float(p) for p in np.atleast_1d(pcts)]
+    if len(high) < 2:
+        return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8)) for _ in pcts]
+    if use_numba and _zigzag_kernel_jit is None:
+        raise ImportError("zigzag_pivots_multi(use_numba=True) cần numba (pip install numba)")
+    bars = _Bars(high, low, close)
+    if use_numba or (use_numba is None and _zigzag_kernel_jit is not None):
+        buf_idx = np.empty(len(high), dtype=np.int64)
+        buf_side = np.empty(len(high), dtype=np.int8)
+        return [_pivots_jit(bars, p, buf_idx, buf_side) for p in pcts]
+    first_up, first_down = _first_leg(high, low, close)
+    return [_pivots_legs(bars, first_up, first_down, p) for p in pcts]
+
+
+def zigzag_pivots(high, low, close, pct: float = 3.0, use_numba=None) -> Pivots:
+    """Pivots for one threshold -> (idx, side)."""
+    return zigzag_pivots_multi(high, low, close, [pct], use_numba=use_numba)[0]
+
+
+def pivots_to_dense(idx, side, n: int) -> np.ndarray:
+    """(idx, side) -> int array of length n with +1 / -1 on pivots (the old zigzag_pivots_np column)."""
+    out = np.zeros(n, dtype=int)
+    out[np.asarray(idx, dtype=np.int64)] = side
+    return out
+
+
+def _field(bar, name: str) -> float:
+    try:
+        return float(bar[name])
+    except (TypeError, KeyError, IndexError):
+        return float(getattr(bar, name))
+
+
+class ZigZag:
+    """
+    Incremental ZigZag for live bars, one state per threshold:
+
+        zz = ZigZag([1.0, 3.0])
+        for row in df.itertuples(): zz.update(row)      # seed from history
+        events = zz.update(new_bar)    # [{'pct': 3.0, 'event': 'new'|'move', 'idx': i, 'side': +1, 'price': ..}]
+        zz.pivots(3.0)                 # (idx, side) so far, the last one provisional
+
+    'new' = a leg reversed (the previous pivot is now final), 'move' = the open pivot was extended.
+    """
+
+    def __init__(self, pcts=3.0):
+        self.pcts = [float(p) for p in np.atleast_1d(pcts)]
+        self.n = 0
+        self._ref = None                                 # close of the first bar
+        self._trend = [0] * len(self.pcts)
+        self._price = [0.0] * len(self.pcts)
+        self._idx = [[] for _ in self.pcts]
+        self._side = [[] for _ in self.pcts]
+
+    def update(self, bar) -> list:
+        h, l, c = (_field(bar, k) for k in ('high', 'low', 'close'))
+        i = self.n
+        self.n += 1
+        if self._ref is None:
+            self._ref = c
+            self._price = [c] * len(self.pcts)
+            return []
+        events = []
+        for k, pct in enumerate(self.pcts):
+            last, trend = self._price[k], self._trend[k]
+            up = (h - last) / last * 100.0
+            down = (last - l) / last * 100.0
+            if trend > 0 and h > last:
+                event, side, price = 'move', 1, h
+            elif trend < 0 and l < last:
+                event, side, price = 'move', -1, l
+            elif trend <= 0 and up > pct:
+                event, side, price = 'new', 1, h
+            elif trend >= 0 and down > pct:
+                event, side, price = 'new', -1, l
+            else:
+                continue
+            if event == 'move':
+                self._idx[k][-1] = i
+            else:
+                self._idx[k].append(i)
+                self._side[k].append(side)
+                self._trend[k] = side
+            self._price[k] = price
+            events.append({'pct': pct, 'event': event, 'idx': i, 'side': side, 'price': price})
+        return events
+
+    def pivots(self, pct: float = None) -> Pivots:
+        k = 0 if pct is None else self.pcts.index(float(pct))
+        return np.asarray(self._idx[k], dtype=np.int64), np.asarray(self._side[k], dtype=np.int8)